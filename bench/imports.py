@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياس أوامر الاستيراد وأداة إعادة التسمية على أحجام كبيرة.
+
+لكل حالة (import_employees / import_forms / tr) ولكل حجم:
+  - توليد ملفات Excel ومجلد PDF بالحجم المطلوب في مجلد مؤقت
+  - تشغيل الحالة في عملية مستقلة على قاعدة SQLite جديدة (migrate خارج القياس)
+  - تسجيل زمن ومراحل التنفيذ وعدد الاستعلامات لكل مرحلة وذروة الذاكرة (peak RSS)
+
+مثال (من جذر المشروع):
+    python -m bench.imports --sizes 1000,10000 --output import_bench.json
+    python -m bench.imports --cases import_forms --sizes 100000
+
+ملاحظة: import_employees يجزّئ كلمة مرور كل مستخدم (PBKDF2)؛ افتراضيًا نستخدم
+MD5PasswordHasher لقياس كلفة الاستيراد نفسه، و--real-hasher لقياس الكلفة الفعلية.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CASES = ("import_employees", "import_forms", "tr")
+SECTION_PREFIXES = ("HR", "FN", "WS", "RT", "PR", "NT", "PD", "MK", "IT", "AG")
+AR_WORDS = ("طلب", "إجازة", "سلفة", "عهدة", "تصفية", "نقل", "صيانة", "شراء", "تقييم", "موظف", "مالية", "عقد")
+EN_WORDS = ("request", "leave", "advance", "custody", "settlement", "transfer", "maintenance",
+            "purchase", "evaluation", "employee", "finance", "contract")
+
+
+# ---------------------------------------------------------------- generators
+def write_xlsx(path, sheets):
+    """sheets: {اسم الشيت: (headers, rows)} بوضع write_only لتوفير الذاكرة."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for title, (headers, rows) in sheets.items():
+        ws = wb.create_sheet(title=title[:31])
+        ws.append(headers)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+def form_rows(size, rnd):
+    for i in range(size):
+        prefix = SECTION_PREFIXES[i % len(SECTION_PREFIXES)]
+        words = rnd.sample(range(len(AR_WORDS)), 3)
+        yield (
+            f"{prefix}-{i:06d}", "عام",
+            "نموذج " + " ".join(AR_WORDS[w] for w in words) + f" {i}",
+            " ".join(EN_WORDS[w] for w in words).title() + f" Form {i}",
+            "",
+        )
+
+
+def generate_inputs(case, size, workdir, seed):
+    from core.management.commands.seed_scale import placeholder_pdf
+
+    rnd = random.Random(seed)
+    if case == "import_employees":
+        write_xlsx(workdir / "sections.xlsx", {"Sheet": (
+            ["name_ar", "name_en"],
+            ((f"قسم {i}", f"Section {i}") for i in range(max(1, size // 100))),
+        )})
+        write_xlsx(workdir / "employees.xlsx", {"Sheet": (
+            ["username", "password", "role"],
+            ((f"user{i:07d}", "Passw0rd!", rnd.choices(["employee", "hr", "manager"], [90, 6, 4])[0])
+             for i in range(size)),
+        )})
+        return
+
+    rows = list(form_rows(size, rnd))
+    data_dir = workdir / "data"
+    data_dir.mkdir(exist_ok=True)
+    headers = ["Serial Number", "Category", "Name (Arabic)", "Name (English)", "Description"]
+    write_xlsx(data_dir / "forms.xlsx", {"Forms": (headers, rows)})
+
+    pdf = placeholder_pdf("BENCH")
+    for serial, _, name_ar, name_en, _ in rows:
+        if case == "import_forms":
+            name = serial
+        else:
+            # tr: مزيج من أسماء مطابقة تمامًا، وأخطاء إملائية، وأكواد جاهزة
+            r = rnd.random()
+            name = serial if r < 0.2 else name_ar if r < 0.5 else name_en.lower() if r < 0.7 else name_en[:-2] + "xx"
+        (data_dir / f"{name}.pdf").write_bytes(pdf)
+
+
+# ---------------------------------------------------------------- runners
+def run_case(case, size, workdir, real_hasher):
+    """يُنفَّذ داخل عملية فرعية: يعيد dict بالنتائج."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bench.settings")
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+
+    if not real_hasher:
+        settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    call_command("migrate", interactive=False, verbosity=0)
+
+    devnull = open(os.devnull, "w")
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    t0 = time.perf_counter()
+    with connection.execute_wrapper(count):
+        if case == "tr":
+            phases = run_tr(workdir / "data")
+        else:
+            module = importlib.import_module(f"core.management.commands.{case}")
+            command = module.Command(stdout=devnull)
+            os.chdir(workdir)  # import_employees يقرأ الملفات من المجلد الحالي
+            kwargs = {"data_dir": str(workdir / "data")} if case == "import_forms" else {}
+            call_command(command, **kwargs)
+            phases = command.timings
+    total = time.perf_counter() - t0
+
+    return {
+        "case": case,
+        "size": size,
+        "total_s": round(total, 4),
+        "queries": queries,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "phases": phases,
+    }
+
+
+def run_tr(folder):
+    spec = importlib.util.spec_from_file_location("tr", BASE_DIR / "data" / "tr.py")
+    tr = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(tr)
+
+    phases = []
+
+    def timed(name, fn, *args):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        phases.append({"phase": name, "seconds": round(time.perf_counter() - t0, 4), "queries": 0})
+        return result
+
+    name_to_code, codekey_to_code = timed("build_mapping", tr.build_mapping_from_excel, folder / "forms.xlsx")
+    index = timed("fuzzy_index", tr.FuzzyIndex, name_to_code)
+    plans, unmatched, _ = timed("plan_renames", lambda: tr.plan_renames(folder, name_to_code, codekey_to_code, index))
+    phases.append({"phase": "summary", "planned": len(plans), "unmatched": len(unmatched)})
+    return phases
+
+
+def spawn(case, size, args):
+    with tempfile.TemporaryDirectory(prefix="bm-import-bench-") as tmp:
+        workdir = Path(tmp)
+        t0 = time.perf_counter()
+        generate_inputs(case, size, workdir, args.seed)
+        generate_s = time.perf_counter() - t0
+
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="bench.settings",
+            DATABASE_URL=f"sqlite:///{workdir / 'bench.sqlite3'}",
+            BENCH_MEDIA_ROOT=str(workdir / "media"),
+            PYTHONPATH=str(BASE_DIR),
+        )
+        cmd = [sys.executable, "-m", "bench.imports", "--child", case, "--child-size", str(size),
+               "--child-workdir", str(workdir)]
+        if args.real_hasher:
+            cmd.append("--real-hasher")
+        proc = subprocess.run(cmd, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"case": case, "size": size, "error": proc.stderr.strip().splitlines()[-5:]}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result["generate_inputs_s"] = round(generate_s, 4)
+        return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark import_employees, import_forms and data/tr.py")
+    ap.add_argument("--cases", default=",".join(CASES), help=f"comma separated: {', '.join(CASES)}")
+    ap.add_argument("--sizes", default="1000,10000", help="comma separated row counts (e.g. 1000,10000,100000)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--real-hasher", action="store_true", help="keep the production password hasher")
+    ap.add_argument("--output", help="write the JSON report here (default: stdout)")
+    ap.add_argument("--child", choices=CASES, help=argparse.SUPPRESS)
+    ap.add_argument("--child-size", type=int, help=argparse.SUPPRESS)
+    ap.add_argument("--child-workdir", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        result = run_case(args.child, args.child_size, Path(args.child_workdir), args.real_hasher)
+        sys.stdout.write(json.dumps(result) + "\n")
+        return
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bench.settings")
+    import django
+    django.setup()  # لمولّد ملفات PDF (placeholder_pdf) فقط، لا اتصال بقاعدة البيانات
+
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        ap.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    results = []
+    for case in cases:
+        for size in sizes:
+            result = spawn(case, size, args)
+            results.append(result)
+            sys.stderr.write(f"{case:>16} {size:>7}: {result.get('total_s', 'ERROR')}s\n")
+
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "real_hasher": args.real_hasher,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مجموعة قياس حمل HTTP للـ API كاملة، تعمل بلا إنترنت على جهاز Linux واحد.
+
+الخطوات:
+  1) قاعدة SQLite ووسائط في مجلد مؤقت، تهيئتها عبر bench/seed.py
+  2) إقلاع gunicorn (wsgi أو asgi) بإعدادات bench.settings (تضيف X-DB-Queries)
+  3) مستخدمون افتراضيون بعدد --concurrency ينفّذون مزيجًا موزونًا من السيناريوهات
+  4) تقرير JSON: RPS و p50/p95/p99 ومتوسط الاستعلامات لكل طلب، لكل مسار وللمجموع
+
+مثال (من جذر المشروع):
+    python -m bench.load --profile wsgi --workers 2 --concurrency 16 --duration 30 --output bench_output.json
+    python -m bench.load --mix inbox=10,catalog=5 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from bench.seed import BENCH_PASSWORD, ROLES
+from bench.slow_clients import PROFILES, percentile, wait_for_port
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = {
+    "login": 2,
+    "catalog": 20,
+    "preview": 5,
+    "inbox": 40,
+    "complaint_submit": 5,
+    "complaint_reply": 3,
+    "broadcast": 1,
+}
+
+
+class Client:
+    """عميل HTTP/1.1 بسيط فوق asyncio (اتصال لكل طلب، لا اعتماديات خارجية)."""
+
+    def __init__(self, host, port, timeout):
+        self.host, self.port, self.timeout = host, port, timeout
+
+    async def request(self, method, path, token=None, body=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", "Connection: close"]
+        if token:
+            headers.append(f"Authorization: Bearer {token}")
+        if body is not None:
+            headers += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+        raw = ("\r\n".join(headers) + "\r\n\r\n").encode() + payload
+
+        t0 = time.perf_counter()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        try:
+            writer.write(raw)
+            await writer.drain()
+            data = await asyncio.wait_for(reader.read(), self.timeout)
+        finally:
+            writer.close()
+        elapsed = time.perf_counter() - t0
+
+        head, _, content = data.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1]) if lines and len(lines[0].split()) > 1 else 0
+        resp_headers = {}
+        for line in lines[1:]:
+            k, _, v = line.partition(":")
+            resp_headers[k.strip().lower()] = v.strip()
+        return status, resp_headers, content, elapsed
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)   # label -> [(elapsed, queries, db_ms, ok)]
+        self.recording = False
+
+    def add(self, label, status, headers, elapsed):
+        if not self.recording:
+            return
+        ok = 200 <= status < 400
+        self.samples[label].append((
+            elapsed,
+            int(headers.get("x-db-queries", 0) or 0),
+            float(headers.get("x-db-time-ms", 0) or 0),
+            ok,
+        ))
+
+    def summary(self, duration):
+        def stats(samples):
+            lat = [s[0] * 1000 for s in samples if s[3]]
+            return {
+                "count": len(samples),
+                "errors": sum(1 for s in samples if not s[3]),
+                "rps": round(len(samples) / duration, 2),
+                "p50_ms": _round(percentile(lat, 50)),
+                "p95_ms": _round(percentile(lat, 95)),
+                "p99_ms": _round(percentile(lat, 99)),
+                "mean_ms": _round(sum(lat) / len(lat)) if lat else None,
+                "queries_per_request": _round(sum(s[1] for s in samples) / len(samples)) if samples else None,
+                "db_ms_per_request": _round(sum(s[2] for s in samples) / len(samples)) if samples else None,
+            }
+
+        routes = {label: stats(s) for label, s in sorted(self.samples.items())}
+        everything = [x for s in self.samples.values() for x in s]
+        return routes, stats(everything)
+
+
+def _round(v):
+    return round(v, 2) if v is not None else None
+
+
+class Workload:
+    def __init__(self, client, recorder, tokens, form_ids, complaint_ids, rnd):
+        self.client, self.rec, self.tokens = client, recorder, tokens
+        self.form_ids, self.complaint_ids, self.rnd = form_ids, complaint_ids, rnd
+
+    async def call(self, label, method, path, role="employee", body=None, token=None):
+        token = token or self.rnd.choice(self.tokens[role])[1]
+        try:
+            status, headers, content, elapsed = await self.client.request(method, path, token, body)
+        except (asyncio.TimeoutError, OSError):
+            self.rec.add(label, 0, {}, self.client.timeout)
+            return 0, b""
+        self.rec.add(label, status, headers, elapsed)
+        return status, content
+
+    async def login(self):
+        role = self.rnd.choice(ROLES)
+        username, _ = self.rnd.choice(self.tokens[role])
+        await self.call("POST /api/token/", "POST", "/api/token/", token="-",
+                        body={"username": username, "password": BENCH_PASSWORD})
+
+    async def catalog(self):
+        await self.call("GET /api/sections/", "GET", "/api/sections/")
+        await self.call("GET /api/forms/", "GET", "/api/forms/")
+
+    async def preview(self):
+        form_id = self.rnd.choice(self.form_ids)
+        await self.call("GET /api/preview-form/<id>/", "GET", f"/api/preview-form/{form_id}/")
+
+    async def inbox(self):
+        role = self.rnd.choice(ROLES)
+        await self.call("GET /api/complaints/has_unread/", "GET", "/api/complaints/has_unread/", role)
+        await self.call("GET /api/user-notifications/", "GET", "/api/user-notifications/", role)
+
+    async def complaint_submit(self):
+        status, content = await self.call(
+            "POST /api/complaints/submit/", "POST", "/api/complaints/submit/",
+            body={"recipient_type": "hr", "title": "bench", "message": "lorem ipsum " * 10},
+        )
+        if status == 201:
+            self.complaint_ids.append(json.loads(content)["id"])
+
+    async def complaint_reply(self):
+        if not self.complaint_ids:
+            return
+        pk = self.rnd.choice(self.complaint_ids)
+        await self.call("POST /api/complaints/<id>/hr_reply/", "POST", f"/api/complaints/{pk}/hr_reply/",
+                        role="hr", body={"response": "bench reply"})
+
+    async def broadcast(self):
+        await self.call("POST /api/notify-admin/send_notification/", "POST",
+                        "/api/notify-admin/send_notification/", role="hr",
+                        body={"title": "bench", "message": "broadcast", "importance": "normal"})
+
+
+async def login_pool(client, usernames, size):
+    pool = []
+    for username in usernames[:size]:
+        status, _, content, _ = await client.request(
+            "POST", "/api/token/", body={"username": username, "password": BENCH_PASSWORD})
+        if status != 200:
+            raise RuntimeError(f"login failed for {username}: {status} {content[:200]!r}")
+        pool.append((username, json.loads(content)["access"]))
+    return pool
+
+
+async def run_load(args, mix, usernames):
+    client = Client(args.host, args.port, args.timeout)
+    recorder = Recorder()
+    tokens = {role: await login_pool(client, usernames[role], args.token_pool) for role in ROLES}
+
+    _, _, content, _ = await client.request("GET", "/api/forms/", tokens["hr"][0][1])
+    form_ids = [f["id"] for f in json.loads(content)] or [1]
+    _, _, content, _ = await client.request("GET", "/api/complaints/hr_complaints/", tokens["hr"][0][1])
+    complaint_ids = [c["id"] for c in json.loads(content)][:500]
+
+    names, weights = zip(*mix.items())
+    stop_at = time.monotonic() + args.warmup + args.duration
+
+    async def virtual_user(i):
+        work = Workload(client, recorder, tokens, form_ids, complaint_ids, random.Random(args.seed + i))
+        while time.monotonic() < stop_at:
+            await getattr(work, work.rnd.choices(names, weights)[0])()
+
+    async def start_recording():
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+
+    await asyncio.gather(start_recording(), *(virtual_user(i) for i in range(args.concurrency)))
+    return recorder.summary(args.duration)
+
+
+def parse_mix(value):
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline HTTP load benchmark for the API")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="wsgi")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=20, help="measured seconds")
+    ap.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before recording")
+    ap.add_argument("--timeout", type=float, default=30)
+    ap.add_argument("--mix", type=parse_mix, default=None, help="e.g. inbox=40,catalog=20,login=2")
+    ap.add_argument("--users", type=int, default=60, help="seeded users")
+    ap.add_argument("--notifications", type=int, default=30, help="seeded notifications")
+    ap.add_argument("--complaints", type=int, default=200, help="seeded complaints")
+    ap.add_argument("--token-pool", type=int, default=5, help="logged-in users per role")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--workdir", help="keep DB/media here instead of a temp dir")
+    ap.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = ap.parse_args()
+    mix = args.mix or dict(DEFAULT_MIX)
+
+    with tempfile.TemporaryDirectory(prefix="bm-bench-") as tmp:
+        workdir = Path(args.workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="bench.settings",
+            DATABASE_URL=f"sqlite:///{workdir / 'bench.sqlite3'}",
+            BENCH_MEDIA_ROOT=str(workdir / "media"),
+            DJANGO_SECRET_KEY=os.environ.get("DJANGO_SECRET_KEY", "bench-secret-key-" + "x" * 32),
+            PYTHONPATH=str(BASE_DIR),
+        )
+        if args.profile == "asgi":
+            env["DB_CONN_MAX_AGE"] = "0"
+
+        from bench import seed as seed_module
+        os.environ.update({k: env[k] for k in ("DJANGO_SETTINGS_MODULE", "DATABASE_URL", "BENCH_MEDIA_ROOT", "DJANGO_SECRET_KEY")})
+        usernames = seed_module.seed(args.users, args.notifications, args.complaints, args.seed)
+
+        cmd = PROFILES[args.profile] + ["-w", str(args.workers), "-b", f"{args.host}:{args.port}",
+                                        "--timeout", str(int(args.timeout * 2))]
+        server = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.host, args.port)
+            routes, total = asyncio.run(run_load(args, mix, usernames))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "profile": args.profile,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "mix": mix,
+            "dataset": {"users": args.users, "notifications": args.notifications, "complaints": args.complaints},
+        },
+        "total": total,
+        "routes": routes,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياس كلفة MetricsMiddleware لكل طلب داخل العملية (بلا HTTP ولا قاعدة بيانات).
+
+نقارن استدعاء view فارغ مباشرة باستدعائه عبر MetricsMiddleware، في المسارين sync و async،
+ونطرح الفرق على عدد الطلبات (µs/طلب). flush() (نقل القياسات إلى Prometheus في الخيط الجانبي)
+يُقاس منفصلًا لأنه خارج مسار الطلب. نأخذ الوسيط من --repeat تكرارات.
+
+مثال (من جذر المشروع):
+    python -m bench.metrics_overhead --requests 100000
+    python -m bench.metrics_overhead --repeat 10 --output metrics_bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.load import git_commit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def timed_sync(handler, request, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        handler(request)
+    return time.perf_counter() - start
+
+
+async def timed_async(handler, request, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        await handler(request)
+    return time.perf_counter() - start
+
+
+def run(n, repeat):
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from core import metrics
+
+    request = RequestFactory().get("/api/me/")
+    request.resolver_match = resolve("/api/me/")
+    response = HttpResponse(b"x" * 100)
+
+    def bare(request):
+        return response
+
+    async def abare(request):
+        return response
+
+    middleware = metrics.MetricsMiddleware(bare)
+    amiddleware = metrics.MetricsMiddleware(abare)
+    results = {"sync_us": [], "async_us": [], "flush_us": []}
+    for _ in range(repeat):
+        metrics.flush()
+        base = timed_sync(bare, request, n)
+        results["sync_us"].append((timed_sync(middleware, request, n) - base) / n * 1e6)
+
+        start = time.perf_counter()
+        metrics.flush()
+        results["flush_us"].append((time.perf_counter() - start) / n * 1e6)
+
+        base = asyncio.run(timed_async(abare, request, n))
+        results["async_us"].append((asyncio.run(timed_async(amiddleware, request, n)) - base) / n * 1e6)
+        metrics.flush()
+    return {name: round(statistics.median(values), 2) for name, values in results.items()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-request overhead of MetricsMiddleware")
+    ap.add_argument("--requests", type=int, default=100000, help="requests per measurement")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bm-bench-") as tmp:
+        os.environ.update(
+            DJANGO_SETTINGS_MODULE="bench.settings",
+            DATABASE_URL=f"sqlite:///{Path(tmp) / 'bench.sqlite3'}",
+            BENCH_MEDIA_ROOT=str(Path(tmp) / "media"),
+            DJANGO_SECRET_KEY=os.environ.get("DJANGO_SECRET_KEY", "bench-secret-key-" + "x" * 32),
+        )
+        sys.path.insert(0, str(BASE_DIR))
+        import django
+        django.setup()
+        overhead = run(args.requests, args.repeat)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "requests": args.requests,
+            "repeat": args.repeat,
+        },
+        "overhead": overhead,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import time
+
+from django.db import connection
+
+
+class QueryCountMiddleware:
+    """يضيف عدد استعلامات الطلب وزمنها كترويسات كي يقرأها مولّد الحمل (للقياس فقط)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = {"count": 0, "time": 0.0}
+
+        def counter(execute, sql, params, many, context):
+            t0 = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats["count"] += 1
+                stats["time"] += time.perf_counter() - t0
+
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response["X-DB-Queries"] = str(stats["count"])
+        response["X-DB-Time-Ms"] = f"{stats['time'] * 1000:.2f}"
+        return response
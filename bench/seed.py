@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تهيئة قاعدة محلية لمجموعة القياس: migrate ثم import_forms (ملفات data/ الحقيقية)
+ثم seed_scale ببيانات حتمية وكلمة مرور معروفة.
+يُشغَّل بواسطة bench/load.py مع DJANGO_SETTINGS_MODULE=bench.settings.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bench.settings")
+
+BENCH_PASSWORD = "bench-pass-123"
+BENCH_PREFIX = "bench"
+ROLES = ("employee", "hr", "manager")
+
+
+def seed(users, notifications, complaints, seed_value=1):
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    User = get_user_model()
+    devnull = open(os.devnull, "w")
+
+    call_command("migrate", interactive=False, verbosity=0)
+    call_command("import_forms", data_dir=str(BASE_DIR / "data"), verbosity=0, stdout=devnull)
+    if not User.objects.filter(username__startswith=f"{BENCH_PREFIX}_").exists():
+        call_command(
+            "seed_scale", users=users, notifications=notifications, complaints=complaints,
+            forms=0, sections=0, seed=seed_value, prefix=BENCH_PREFIX, password=BENCH_PASSWORD,
+            stdout=devnull,
+        )
+
+    names = {role: [] for role in ROLES}
+    for username, role in User.objects.filter(username__startswith=f"{BENCH_PREFIX}_").order_by("id").values_list("username", "role"):
+        names[role].append(username)
+    return names
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Seed a local database for the load benchmark")
+    ap.add_argument("--users", type=int, default=60)
+    ap.add_argument("--notifications", type=int, default=30)
+    ap.add_argument("--complaints", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    users = seed(args.users, args.notifications, args.complaints, args.seed)
+    print({role: len(names) for role, names in users.items()})
+
+
+if __name__ == "__main__":
+    main()
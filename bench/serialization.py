@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياس تسلسل قوائم الـ API داخل العملية (بلا HTTP) لكل مسار، بثلاث طرق:
+
+  - drf:        ModelSerializer(many=True) + JSONRenderer (المسار السابق)
+  - drf_orjson: ModelSerializer(many=True) + FastJSONRenderer (أثر المُرمِّز وحده)
+  - values:     ValuesSerializer من صفوف values() + FastJSONRenderer (المسار الحالي)
+
+قبل القياس نتحقق أن بايتات values == بايتات drf لكل مسار (وإلا يتوقف بخطأ).
+الزمن يشمل الاستعلام والتسلسل والترميز؛ نأخذ الوسيط من --repeat تكرارات.
+
+مثال (من جذر المشروع):
+    python -m bench.serialization --users 300 --notifications 400 --complaints 20000
+    python -m bench.serialization --repeat 20 --output serialization_bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.load import git_commit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def endpoints():
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+    from django.test import RequestFactory
+
+    from core.models import Complaint, FormModel, UserNotification
+    from core.serializers import (
+        ComplaintSerializer, ComplaintValuesSerializer, FormModelSerializer, FormModelValuesSerializer,
+        UserNotificationSerializer, UserNotificationValuesSerializer,
+    )
+
+    User = get_user_model()
+    # أكبر صندوق إشعارات = أسوأ حالة
+    inbox_user = (User.objects.annotate(n=Count("usernotification")).order_by("-n").values_list("id", flat=True).first())
+    request = RequestFactory().get("/api/forms/", HTTP_HOST="localhost")
+
+    return {
+        "GET /api/forms/": (
+            lambda: FormModel.objects.all(),
+            lambda qs: FormModelSerializer(qs, many=True, context={"request": request}).data,
+            lambda qs: FormModelValuesSerializer(context={"request": request}).serialize(qs),
+        ),
+        "GET /api/user-notifications/": (
+            lambda: UserNotification.objects.filter(user_id=inbox_user).order_by("-notification__created_at"),
+            lambda qs: UserNotificationSerializer(qs.select_related("notification"), many=True).data,
+            lambda qs: UserNotificationValuesSerializer().serialize(qs),
+        ),
+        "GET /api/complaints/hr_complaints/": (
+            lambda: Complaint.objects.filter(recipient_type="hr").order_by("-created_at"),
+            lambda qs: ComplaintSerializer(qs, many=True).data,
+            lambda qs: ComplaintValuesSerializer().serialize(qs),
+        ),
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def run(repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.renderers import JSONRenderer
+
+    from core.renderers import FastJSONRenderer
+
+    drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    routes = {}
+    for name, (queryset, drf, values) in endpoints().items():
+        variants = {
+            "drf": lambda: drf_renderer.render(drf(queryset())),
+            "drf_orjson": lambda: fast_renderer.render(drf(queryset())),
+            "values": lambda: fast_renderer.render(values(queryset())),
+        }
+        expected = variants["drf"]()
+        for variant, fn in variants.items():
+            if fn() != expected:
+                raise SystemExit(f"{name}: {variant} output differs from the DRF serializer")
+
+        result = {"rows": len(json.loads(expected)), "bytes": len(expected)}
+        for variant, fn in variants.items():
+            with CaptureQueriesContext(connection) as queries:
+                fn()
+            result[variant] = {"median_ms": timed(fn, repeat), "queries": len(queries)}
+        result["speedup"] = round(result["drf"]["median_ms"] / max(result["values"]["median_ms"], 0.01), 2)
+        routes[name] = result
+    return routes
+
+
+def main():
+    ap = argparse.ArgumentParser(description="In-process serialization benchmark for list endpoints")
+    ap.add_argument("--users", type=int, default=200, help="seeded users")
+    ap.add_argument("--notifications", type=int, default=300, help="seeded notifications")
+    ap.add_argument("--complaints", type=int, default=5000, help="seeded complaints")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--workdir", help="keep DB/media here instead of a temp dir")
+    ap.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bm-bench-") as tmp:
+        workdir = Path(args.workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        os.environ.update(
+            DJANGO_SETTINGS_MODULE="bench.settings",
+            DATABASE_URL=f"sqlite:///{workdir / 'bench.sqlite3'}",
+            BENCH_MEDIA_ROOT=str(workdir / "media"),
+            DJANGO_SECRET_KEY=os.environ.get("DJANGO_SECRET_KEY", "bench-secret-key-" + "x" * 32),
+            RESPONSE_CACHE_TTL="0",
+        )
+        sys.path.insert(0, str(BASE_DIR))
+        from bench import seed as seed_module
+        seed_module.seed(args.users, args.notifications, args.complaints, args.seed)
+        routes = run(args.repeat)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "dataset": {"users": args.users, "notifications": args.notifications, "complaints": args.complaints},
+        },
+        "routes": routes,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
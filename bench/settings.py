@@ -0,0 +1,17 @@
+"""
+إعدادات مجموعة القياس: نفس إعدادات المشروع مع قاعدة/وسائط مؤقتة وعدّاد استعلامات.
+تُستخدم عبر DJANGO_SETTINGS_MODULE=bench.settings (انظر bench/load.py).
+"""
+import os
+from pathlib import Path
+
+from model_system.settings import *  # noqa: F401,F403
+from model_system.settings import MIDDLEWARE, CSRF_TRUSTED_ORIGINS
+
+CSRF_TRUSTED_ORIGINS = [o for o in CSRF_TRUSTED_ORIGINS if o]
+
+if os.environ.get("BENCH_MEDIA_ROOT"):
+    MEDIA_ROOT = Path(os.environ["BENCH_MEDIA_ROOT"])
+
+# X-DB-Queries / X-DB-Time-Ms في كل استجابة
+MIDDLEWARE = ["bench.middleware.QueryCountMiddleware"] + list(MIDDLEWARE)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مقارنة WSGI (gunicorn sync) مع ASGI (gunicorn + uvicorn worker) تحت عملاء بطيئين.
+
+السيناريو: N عميل بطيء يحمّلون PDF عبر /api/preview-form/<id>/ بمعدل قراءة منخفض،
+وفي نفس الوقت عميل سريع يستطلع /api/complaints/has_unread/ ونقيس زمن استجابته.
+مع worker واحد sync يحجز كل عميل بطيء الـ worker بالكامل؛ مع ASGI يبقى الاستطلاع سريعًا.
+
+مثال (من جذر المشروع، بعد migrate + import_forms + مستخدم للاختبار):
+    python bench/slow_clients.py --compare --username ameen --password ... --form-id 1
+
+المخرجات JSON على stdout (p50/p95/max للاستطلاع، عدد المهلات، وعدد التحميلات المكتملة).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    "wsgi": ["gunicorn", "model_system.wsgi:application", "-w", "1"],
+    "asgi": ["gunicorn", "model_system.asgi:application", "-w", "1", "-k", "uvicorn_worker.UvicornWorker"],
+}
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def fetch_token(base_url, username, password):
+    req = urllib.request.Request(
+        f"{base_url}/api/token/",
+        data=json.dumps({"username": username, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.load(resp)["access"]
+
+
+async def slow_download(host, port, path, rate, deadline):
+    """عميل بطيء: مخزن استقبال صغير وقراءة rate بايت/ثانية."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    loop = asyncio.get_running_loop()
+    await loop.sock_connect(sock, (host, port))
+    reader, writer = await asyncio.open_connection(sock=sock)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    chunk = max(1, rate // 10)
+    received = 0
+    try:
+        while time.monotonic() < deadline:
+            data = await reader.read(chunk)
+            if not data:
+                return True, received
+            received += len(data)
+            await asyncio.sleep(0.1)
+        return False, received
+    finally:
+        writer.close()
+
+
+async def probe(host, port, token, deadline, interval, timeout):
+    latencies, timeouts, errors = [], 0, 0
+    request = (
+        f"GET /api/complaints/has_unread/ HTTP/1.1\r\nHost: {host}\r\n"
+        f"Authorization: Bearer {token}\r\nConnection: close\r\n\r\n"
+    ).encode()
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            writer.write(request)
+            await writer.drain()
+            status = await asyncio.wait_for(reader.readline(), timeout)
+            await asyncio.wait_for(reader.read(), timeout)
+            writer.close()
+            if b" 200 " in status:
+                latencies.append((time.perf_counter() - t0) * 1000)
+            else:
+                errors += 1
+        except asyncio.TimeoutError:
+            timeouts += 1
+        except OSError:
+            errors += 1
+        await asyncio.sleep(interval)
+    return latencies, timeouts, errors
+
+
+async def scenario(args, token):
+    deadline = time.monotonic() + args.duration
+    path = f"/api/preview-form/{args.form_id}/"
+    slow = [slow_download(args.host, args.port, path, args.rate, deadline) for _ in range(args.slow)]
+    results = await asyncio.gather(
+        probe(args.host, args.port, token, deadline, args.interval, args.timeout),
+        *slow,
+        return_exceptions=True,
+    )
+    latencies, timeouts, errors = results[0]
+    downloads = [r for r in results[1:] if not isinstance(r, Exception)]
+    return {
+        "slow_clients": args.slow,
+        "slow_rate_bytes_per_s": args.rate,
+        "duration_s": args.duration,
+        "probe_ok": len(latencies),
+        "probe_timeouts": timeouts,
+        "probe_errors": errors,
+        "probe_p50_ms": percentile(latencies, 50),
+        "probe_p95_ms": percentile(latencies, 95),
+        "probe_max_ms": max(latencies) if latencies else None,
+        "probe_mean_ms": statistics.fmean(latencies) if latencies else None,
+        "downloads_completed": sum(1 for done, _ in downloads if done),
+        "bytes_received": sum(n for _, n in downloads),
+    }
+
+
+def wait_for_port(host, port, timeout=30):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not start on {host}:{port}")
+
+
+def run_profile(profile, args):
+    env = dict(os.environ, DB_CONN_MAX_AGE="0" if profile == "asgi" else os.environ.get("DB_CONN_MAX_AGE", "600"))
+    cmd = PROFILES[profile] + ["-b", f"{args.host}:{args.port}", "--timeout", str(args.duration * 4)]
+    server = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.host, args.port)
+        base_url = f"http://{args.host}:{args.port}"
+        token = args.token or fetch_token(base_url, args.username, args.password)
+        result = asyncio.run(scenario(args, token))
+        result["profile"] = profile
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="WSGI vs ASGI under slow clients")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--profile", choices=sorted(PROFILES), help="boot a single profile")
+    ap.add_argument("--compare", action="store_true", help="boot and measure both profiles")
+    ap.add_argument("--external", action="store_true", help="measure an already running server")
+    ap.add_argument("--token", help="JWT access token (otherwise --username/--password)")
+    ap.add_argument("--username")
+    ap.add_argument("--password")
+    ap.add_argument("--form-id", type=int, default=1)
+    ap.add_argument("--slow", type=int, default=8, help="number of slow clients")
+    ap.add_argument("--rate", type=int, default=8192, help="bytes/s read by each slow client")
+    ap.add_argument("--duration", type=int, default=15, help="seconds")
+    ap.add_argument("--interval", type=float, default=0.2, help="seconds between probes")
+    ap.add_argument("--timeout", type=float, default=5.0, help="probe timeout (seconds)")
+    args = ap.parse_args()
+
+    if not args.token and not (args.username and args.password):
+        ap.error("--token or --username/--password is required")
+
+    if args.external:
+        base_url = f"http://{args.host}:{args.port}"
+        token = args.token or fetch_token(base_url, args.username, args.password)
+        results = [dict(asyncio.run(scenario(args, token)), profile="external")]
+    else:
+        profiles = sorted(PROFILES) if args.compare or not args.profile else [args.profile]
+        results = [run_profile(p, args) for p in profiles]
+
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,186 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.text import Truncator
 from .models import Section, FormModel, UserSectionPermission, Notification, UserNotification
 from django.contrib.auth import get_user_model
-from .models import Complaint
+from .models import Complaint, Job, SlowQuery
+from django.conf import settings
 
 
 
 
 CustomUser = get_user_model()
 
+
+# 📊 قوائم الإدارة على الجداول الكبيرة: COUNT(*) كامل يمرّ على كل الصفوف مع كل صفحة.
+#   - بلا فلاتر على Postgres: تقدير المخطِّط من pg_class.reltuples (يُحدَّث مع ANALYZE/autovacuum)
+#   - غير ذلك: عدّ محدود بـ ADMIN_COUNT_LIMIT صف (SELECT COUNT(*) FROM (... LIMIT n))
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        limit = settings.ADMIN_COUNT_LIMIT
+        connection = connections[qs.db]
+        if not qs.query.where and connection.vendor == 'postgresql':
+            with connection.cursor() as cur:
+                cur.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [qs.model._meta.db_table])
+                row = cur.fetchone()
+            # -1: جدول لم يُحلَّل بعد
+            if row and row[0] > limit:
+                return row[0]
+        return qs.order_by()[:limit].count()
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # بدون COUNT(*) ثانٍ للجدول كاملًا بجانب نتيجة الفلترة
+
+
+def truncated(obj, field, length=80):
+    return Truncator(getattr(obj, field) or '').chars(length)
+
+
 @admin.register(Section)
 class SectionAdmin(admin.ModelAdmin):
     list_display = ('id', 'name_ar', 'name_en')
+    search_fields = ('name_ar', 'name_en')
 
 @admin.register(FormModel)
 class FormModelAdmin(admin.ModelAdmin):
     list_display = ('serial_number', 'name_ar', 'section', 'category')
     list_filter = ('section', 'category')
+    list_select_related = ('section',)
     search_fields = ('name_ar', 'name_en', 'serial_number')
+    autocomplete_fields = ('section',)
 
 @admin.register(UserSectionPermission)
-class UserSectionPermissionAdmin(admin.ModelAdmin):
+class UserSectionPermissionAdmin(ScalableAdmin):
     list_display = ('user', 'section')
+    list_filter = ('section',)
+    list_select_related = ('user', 'section')
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('user', 'section')
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('title', 'message', 'importance', 'created_at')
+class NotificationAdmin(ScalableAdmin):
+    list_display = ('title', 'short_message', 'importance', 'recipients_count', 'read_count', 'read_rate', 'created_at')
+    list_filter = ('importance',)
+    search_fields = ('title',)
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+    readonly_fields = ('recipients_count', 'read_count')
+    actions = ['broadcast']
+
+    @admin.display(description='message')
+    def short_message(self, obj):
+        return truncated(obj, 'message')
+
+    # من العدّادات المخزّنة (core/counters.py) بلا COUNT على UserNotification لكل صف
+    @admin.display(description='read rate')
+    def read_rate(self, obj):
+        if not obj.recipients_count:
+            return '-'
+        return f'{obj.read_count / obj.recipients_count:.0%}'
+
+    @admin.action(description='Send to original recipients, or all users if never sent (background job)')
+    def broadcast(self, request, queryset):
+        from .jobs import enqueue, original_usernames
+        queued, skipped = 0, []
+        for notification in queryset:
+            # إشعار موجّه يُعاد لمستلميه فقط (التوزيع لا يكرر من وصله)، لا لكل المستخدمين
+            usernames = original_usernames(notification)
+            if usernames is None:
+                skipped.append(str(notification.pk))
+                continue
+            enqueue('send_notification', {'notification_id': notification.pk, 'usernames': usernames},
+                    user=request.user)
+            queued += 1
+        self.message_user(request, f'{queued} send job(s) queued.')
+        if skipped:
+            self.message_user(request, f'Skipped (original recipients unknown): {", ".join(skipped)}',
+                              level=messages.WARNING)
 
 @admin.register(UserNotification)
-class UserNotificationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'notification')
+class UserNotificationAdmin(ScalableAdmin):
+    list_display = ('user', 'notification', 'is_read')
+    list_filter = ('is_read',)
+    list_select_related = ('user', 'notification')
+    # بحث بالبادئة فقط (^ → istartswith) كي لا يمسح الجدول كاملًا
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('user', 'notification')
+    ordering = ('-id',)
+    actions = ['mark_as_read']
+
+    @admin.action(description='Mark selected as read')
+    def mark_as_read(self, request, queryset):
+        from .counters import mark_read
+        self.message_user(request, f'{mark_read(queryset)} notification(s) marked as read.')
 
 @admin.register(CustomUser)
-class CustomUserAdmin(admin.ModelAdmin):
+class CustomUserAdmin(ScalableAdmin):
     list_display = ('username', 'email', 'role', 'is_staff', 'is_superuser')
     list_filter = ('role', 'is_staff')
     search_fields = ('username', 'email')
+    ordering = ('id',)
     
 @admin.register(Complaint)
-class ComplaintAdmin(admin.ModelAdmin):
-    list_display = ('title','message','response', 'sender', 'recipient_type', 'is_responded', 'created_at')
\ No newline at end of file
+class ComplaintAdmin(ScalableAdmin):
+    list_display = ('title', 'short_message', 'short_response', 'sender', 'recipient_type', 'is_responded', 'created_at')
+    list_filter = ('recipient_type', 'is_responded')
+    list_select_related = ('sender',)
+    search_fields = ('title', '^sender__username')
+    autocomplete_fields = ('sender', 'responded_by')
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+
+    @admin.display(description='message')
+    def short_message(self, obj):
+        return truncated(obj, 'message')
+
+    @admin.display(description='response')
+    def short_response(self, obj):
+        return truncated(obj, 'response')
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('short_sql', 'view', 'count', 'avg_ms', 'max_ms', 'last_seen')
+    list_filter = ('view',)
+    search_fields = ('sql', 'view', 'call_site')
+    ordering = ('-max_ms',)
+    readonly_fields = [f.name for f in SlowQuery._meta.fields]
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    @admin.display(description='avg ms')
+    def avg_ms(self, obj):
+        return round(obj.total_ms / obj.count, 2) if obj.count else 0
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(ScalableAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'max_attempts', 'run_at', 'created_by', 'finished_at')
+    list_filter = ('status', 'kind')
+    list_select_related = ('created_by',)
+    ordering = ('-id',)
+    readonly_fields = [f.name for f in Job._meta.fields]
+    actions = ['retry_jobs']
+
+    @admin.action(description='Retry selected jobs now')
+    def retry_jobs(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_at=timezone.now(), last_error='', finished_at=None,
+        )
+        self.message_user(request, f'{updated} job(s) queued.')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,217 @@
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+# الحقول التي يضيفها MyTokenObtainPairSerializer إلى التوكن ويكفي وجودها لبناء المستخدم
+CLAIM_FIELDS = ('username', 'email', 'role', 'is_staff', 'is_superuser')
+# CustomUser.claims_version وقت إصدار التوكن؛ يتغير مع كل حفظ للمستخدم (core/models.py)،
+# فتوكن يحمل نسخة أقدم من المخزّنة (أو صاحبه معطّل) لا يُوثق بحقوله
+CLAIMS_VERSION = 'claims_version'
+
+# كاش صفوف المستخدمين داخل العملية: {pk: (وقت الانتهاء, قاعدة البيانات, قيم الحقول)}
+# نخزّن القيم لا الكائن: كل طلب يأخذ نسخة User خاصة به (لا يتشارك الخيوط حالتها ولا تعديلاتها)
+_user_cache = {}
+USER_FIELDS = [f.attname for f in User._meta.concrete_fields]
+# نسخة الحقول الحالية لكل مستخدم من قاعدة البيانات: {pk: (وقت الانتهاء, version أو None إن كان معطّلًا/محذوفًا)}
+_claims_versions = {}
+_lock = threading.Lock()
+
+
+def user_cache_ttl():
+    return getattr(settings, 'USER_CACHE_TTL', 60)
+
+
+def token_claims(user):
+    """حقول التوكن من صف المستخدم (عند الإصدار وعند التجديد)."""
+    claims = {f: getattr(user, f) for f in CLAIM_FIELDS}
+    claims[CLAIMS_VERSION] = user.claims_version
+    return claims
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """access المُصدر من هذا الـ refresh يأخذ حقوله من صف المستخدم الحالي لا من الـ refresh."""
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = User.objects.get(**{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]})
+        for claim, value in token_claims(user).items():
+            access[claim] = value
+        return access
+
+
+def invalidate_user(user_id):
+    """
+    يُستدعى عند حفظ/تعطيل/حذف مستخدم (محليًا أو عبر ناقل الإبطال من عامل آخر):
+    يحذف صفه ونسخة حقوله من الكاش فتُقرأ من جديد. None = كل المستخدمين.
+    """
+    with _lock:
+        if user_id is None:
+            _user_cache.clear()
+            _claims_versions.clear()
+            return
+        user_id = int(user_id)
+        _user_cache.pop(user_id, None)
+        _claims_versions.pop(user_id, None)
+
+
+def get_cached_user(user_id):
+    """صف المستخدم من الكاش أو من قاعدة البيانات (ثم يُخزَّن لمدة USER_CACHE_TTL ثانية)."""
+    user_id = int(user_id)
+    now = time.monotonic()
+    entry = _user_cache.get(user_id)
+    if not entry or entry[0] <= now:
+        queryset = User.objects.filter(pk=user_id)
+        row = queryset.values_list(*USER_FIELDS).get()
+        entry = (now + user_cache_ttl(), queryset.db, row)
+        with _lock:
+            _user_cache[user_id] = entry
+    return User.from_db(entry[1], USER_FIELDS, entry[2])
+
+
+def _claims_version_query(user_id):
+    return User.objects.filter(pk=user_id, is_active=True).values_list('claims_version', flat=True)
+
+
+def _cached_claims_version(user_id):
+    entry = _claims_versions.get(user_id)
+    if entry and entry[0] > time.monotonic():
+        return entry
+    return None
+
+
+def _store_claims_version(user_id, version):
+    with _lock:
+        _claims_versions[user_id] = (time.monotonic() + user_cache_ttl(), version)
+    return version
+
+
+def current_claims_version(user_id):
+    """
+    نسخة حقول المستخدم في قاعدة البيانات (None: معطّل أو محذوف). من الكاش لمدة USER_CACHE_TTL،
+    ويُفرَّغ مع invalidate_user؛ بعد إعادة تشغيل العملية تُقرأ من قاعدة البيانات من جديد.
+    """
+    entry = _cached_claims_version(user_id)
+    if entry:
+        return entry[1]
+    return _store_claims_version(user_id, _claims_version_query(user_id).first())
+
+
+async def acurrent_claims_version(user_id):
+    entry = _cached_claims_version(user_id)
+    if entry:
+        return entry[1]
+    return _store_claims_version(user_id, await _claims_version_query(user_id).afirst())
+
+
+def _read_only_save(*args, **kwargs):
+    raise RuntimeError("Token-backed user cannot be saved; load it from the database first.")
+
+
+def user_from_claims(validated_token):
+    """
+    يبني كائن CustomUser غير محفوظ من حقول التوكن الموقّعة.
+    له pk صحيح، فيصلح للفلاتر والعلاقات (sender=request.user) دون أي استعلام.
+    يُستدعى بعد claims_are_fresh فقط: نسخة الحقول مطابقة والمستخدم نشط في قاعدة البيانات.
+    """
+    user = User(
+        pk=int(validated_token[api_settings.USER_ID_CLAIM]),
+        is_active=True,
+        claims_version=validated_token[CLAIMS_VERSION],
+        **{f: validated_token[f] for f in CLAIM_FIELDS},
+    )
+    user._state.adding = False
+    user._state.db = 'default'
+    user.save = _read_only_save
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    مصادقة JWT بدون استعلام لصف المستخدم:
+      1) توكن يحمل كل الحقول ونسخته = claims_version الحالية لمستخدم نشط → مستخدم مبني من الحقول
+         (النسخة من كاش العملية، استعلام واحد لكل مستخدم كل USER_CACHE_TTL).
+      2) غير ذلك (توكنات قديمة أو مستخدم عُدّل/عُطّل) → صف المستخدم من الكاش/قاعدة البيانات.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        if self.claims_are_fresh(validated_token, user_id):
+            return user_from_claims(validated_token)
+
+        try:
+            user = get_cached_user(user_id)
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed("User not found", code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+    async def aget_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if (
+            user_id is not None and str(user_id).isdigit() and self.has_claims(validated_token)
+            and await acurrent_claims_version(int(user_id)) == validated_token[CLAIMS_VERSION]
+        ):
+            return user_from_claims(validated_token)
+        return await sync_to_async(self.get_user)(validated_token)
+
+    async def aauthenticate(self, request):
+        """نسخة async من authenticate() لعروض ASGI: لا تلمس قاعدة البيانات في المسار الشائع."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    @staticmethod
+    def has_claims(validated_token):
+        return all(f in validated_token for f in CLAIM_FIELDS) and CLAIMS_VERSION in validated_token
+
+    @classmethod
+    def claims_are_fresh(cls, validated_token, user_id):
+        return cls.has_claims(validated_token) and current_claims_version(user_id) == validated_token[CLAIMS_VERSION]
+
+
+def async_jwt_required(view):
+    """
+    مكافئ @permission_classes([IsAuthenticated]) للعروض async (خارج DRF):
+    يضبط request.user أو يعيد 401 بنفس شكل رد DRF.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        auth = ClaimsJWTAuthentication()
+        try:
+            result = await auth.aauthenticate(request)
+        except (InvalidToken, AuthenticationFailed) as e:
+            return _unauthorized(auth, request, e.detail)
+        if result is None:
+            return _unauthorized(auth, request, "Authentication credentials were not provided.")
+        request.user = result[0]
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _unauthorized(auth, request, detail):
+    resp = JsonResponse(detail if isinstance(detail, dict) else {'detail': str(detail)}, status=401)
+    resp['WWW-Authenticate'] = auth.authenticate_header(request)
+    return resp
@@ -0,0 +1,196 @@
+"""
+🗜️ ضغط استجابات JSON في الـ API (/api/) حسب Accept-Encoding: brotli ثم gzip.
+
+  - GET/HEAD فقط: ردود POST (التوكنات مثلًا) تبقى غير مضغوطة (BREACH)
+  - JSON فقط: ملفات PDF (preview-form/public-form) مضغوطة أصلًا فلا تُلمس، وكذلك الملفات الثابتة
+    (WhiteNoise يخدم نسخها المضغوطة مسبقًا)
+  - الاستجابات العادية أصغر من COMPRESS_MIN_SIZE تُرسل كما هي
+  - الاستجابات المتدفقة (دليل المستخدمين) تُضغط أثناء البث، sync أو async، بلا Content-Length
+  - الاستجابة القادمة من كاش الاستجابات (core/response_cache.py يضع response.cache_key) يُخزَّن
+    جسمها المضغوط في الكاش نفسه ويُعاد استخدامه في الطلبات التالية بدل ضغطه من جديد
+
+brotli اختياري: بدونه يُعرض gzip فقط.
+"""
+import gzip
+import hashlib
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from .response_cache import cache_ttl
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+API_PREFIX = '/api/'
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # 11 (الافتراضي) أبطأ بكثير من أن يناسب ردودًا ديناميكية
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """أفضل ترميز يقبله العميل (أعلى q، وعند التساوي br قبل gzip) أو None."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(encoding, data):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """بدون flush بعد كل قطعة: الدليل يبث صفًا صفًا، والتفريغ المتكرر يُفسد نسبة الضغط."""
+
+    def __init__(self, encoding):
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.process, self.finish = self.compressor.process, self.compressor.finish
+        else:
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # غلاف gzip
+            self.process, self.finish = self.compressor.compress, self.compressor.flush
+
+    def sync(self, chunks):
+        for chunk in chunks:
+            data = self.process(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+    async def asynchronous(self, chunks):
+        async for chunk in chunks:
+            data = self.process(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+
+def is_json(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type == 'application/json' or content_type.endswith('+json')
+
+
+class CompressionMiddleware:
+    """
+    يُوضع قبل أي middleware يقرأ الجسم أو يعدّله (بعد مقاييس الطلب كي يُحسب زمن الضغط).
+    sync وasync: تحت ASGI يبقى في حلقة الأحداث، والبث غير المتزامن يُضغط دون تحويله إلى قائمة.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.min_size = settings.COMPRESS_MIN_SIZE
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        encoding = self.encoding_for(request, response)
+        if encoding is None:
+            return response
+        if response.streaming:
+            return self.compress_stream(response, encoding)
+        return self.replace_body(response, encoding, self.compressed(response, encoding))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        encoding = self.encoding_for(request, response)
+        if encoding is None:
+            return response
+        if response.streaming:
+            return self.compress_stream(response, encoding)
+        return self.replace_body(response, encoding, await self.acompressed(response, encoding))
+
+    def encoding_for(self, request, response):
+        """الترميز الذي تُضغط به الاستجابة، أو None إن كانت تُرسل كما هي."""
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(API_PREFIX) \
+                or response.has_header('Content-Encoding') or not is_json(response):
+            return None
+        if not response.streaming and len(response.content) < self.min_size:
+            return None
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    def compress_stream(self, response, encoding):
+        stream = StreamCompressor(encoding)
+        if response.is_async:
+            response.streaming_content = stream.asynchronous(response.streaming_content)
+        else:
+            response.streaming_content = stream.sync(response.streaming_content)
+        del response['Content-Length']
+        return self.mark_encoded(response, encoding)
+
+    def replace_body(self, response, encoding, body):
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        return self.mark_encoded(response, encoding)
+
+    @staticmethod
+    def mark_encoded(response, encoding):
+        # نفس سلوك GZipMiddleware: الجسم تغيّر بايتًا بايتًا فالـ ETag القوي يصبح ضعيفًا
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def body_key(response, encoding):
+        key = getattr(response, 'cache_key', None)
+        if key is None:
+            return None
+        # بصمة الجسم ضمن المفتاح: نفس مفتاح الكاش قد يُعرض بأكثر من شكل (Accept: ...; indent=4)
+        return f'{key}:{encoding}:{hashlib.blake2b(response.content, digest_size=12).hexdigest()}'
+
+    def compressed(self, response, encoding):
+        body_key = self.body_key(response, encoding)
+        if body_key is None:
+            return compress(encoding, response.content)
+        body = cache.get(body_key)
+        if body is None:
+            body = compress(encoding, response.content)
+            cache.set(body_key, body, cache_ttl())
+        return body
+
+    async def acompressed(self, response, encoding):
+        body_key = self.body_key(response, encoding)
+        if body_key is None:
+            return compress(encoding, response.content)
+        body = await cache.aget(body_key)
+        if body is None:
+            body = compress(encoding, response.content)
+            await cache.aset(body_key, body, cache_ttl())
+        return body
@@ -0,0 +1,91 @@
+"""
+📈 عدّادات وصول الإشعارات: Notification.recipients_count / read_count تُحدَّث مع كل تغيير بدل
+COUNT على UserNotification لكل إشعار (بث لكل المستخدمين = صف لكل مستخدم).
+
+  - التوزيع (jobs.send_notification): كل دفعة bulk_create وزيادة recipients_count في معاملة واحدة،
+    فإعادة محاولة المهمة لا تعدّ المستلمين مرتين
+  - القراءة (mark_read، فردية أو جماعية): صفوف is_read=False المقفلة فقط، والزيادة بعددها
+    في المعاملة نفسها، فطلبان متزامنان لا يعدّان القراءة مرتين
+  - إنشاء/حذف صف مفرد (لوحة الإدارة، حذف مستخدم): إشارات core/signals.py
+
+العدّادات تظهر في NotificationViewSet ولوحة الإدارة فقط (لا في الصندوق الوارد)، وكل تغيير يُبطل
+نطاق 'notification-counts' ويحدّث updated_at للمزامنة التفاضلية.
+
+الزيادة F() + n داخل UPDATE واحد لا تضيع مع الزيادات المتزامنة. ما لا يُتتبَّع (تعديل is_read من
+نموذج لوحة الإدارة، بث الإشعار نفسه مرتين بالتوازي، SQL يدوي) يصلحه:
+    python manage.py reconcile_notification_counts
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Notification, UserNotification
+from .response_cache import invalidate
+
+
+def add_counts(field, counts):
+    """{notification_id: n} → UPDATE واحد يضيف n (وقد تكون سالبة) إلى الحقل لكل إشعار."""
+    counts = {pk: n for pk, n in counts.items() if n}
+    if not counts:
+        return
+    delta = Case(*[When(pk=pk, then=Value(n)) for pk, n in counts.items()], default=Value(0),
+                 output_field=IntegerField())
+    Notification.objects.filter(pk__in=counts).update(
+        **{field: Greatest(F(field) + delta, Value(0))}, updated_at=timezone.now(),
+    )
+    invalidate('notification-counts')
+
+
+def fan_out(notification, user_ids):
+    """دفعة توزيع: صفوف المستلمين الناقصة فقط + recipients_count بعددها. يعيد عدد الجدد."""
+    with transaction.atomic():
+        existing = set(UserNotification.objects.filter(
+            notification=notification, user_id__in=user_ids,
+        ).values_list('user_id', flat=True))
+        rows = [UserNotification(user_id=pk, notification=notification) for pk in user_ids if pk not in existing]
+        UserNotification.objects.bulk_create(rows, ignore_conflicts=True)
+        add_counts('recipients_count', {notification.pk: len(rows)})
+    return len(rows)
+
+
+def mark_read(queryset):
+    """يعلّم صفوف UserNotification غير المقروءة في queryset كمقروءة ويعيد عددها."""
+    with transaction.atomic():
+        rows = list(queryset.filter(is_read=False).order_by().select_for_update()
+                    .values_list('id', 'user_id', 'notification_id'))
+        if not rows:
+            return 0
+        UserNotification.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+            is_read=True, updated_at=timezone.now(),
+        )
+        add_counts('read_count', Counter(notification_id for _, _, notification_id in rows))
+        # update() لا يطلق إشارات
+        invalidate(*{f'inbox:{user_id}' for _, user_id, _ in rows})
+    return len(rows)
+
+
+def actual_counts():
+    rows = UserNotification.objects.filter(notification=OuterRef('pk')).order_by().values('notification')
+    return {
+        'actual_recipients': Coalesce(Subquery(rows.annotate(n=Count('pk')).values('n')), 0),
+        'actual_read': Coalesce(Subquery(rows.filter(is_read=True).annotate(n=Count('pk')).values('n')), 0),
+    }
+
+
+def drifted(queryset):
+    """الإشعارات التي لا تطابق عدّاداتها العدّ الفعلي (مع actual_recipients/actual_read)."""
+    return queryset.annotate(**actual_counts()).exclude(
+        recipients_count=F('actual_recipients'), read_count=F('actual_read'),
+    )
+
+
+def recount(queryset):
+    counts = actual_counts()
+    updated = queryset.update(
+        recipients_count=counts['actual_recipients'], read_count=counts['actual_read'], updated_at=timezone.now(),
+    )
+    invalidate('notification-counts')
+    return updated
@@ -0,0 +1,203 @@
+"""
+🪞 توجيه القراءات إلى نسخ القراءة (DATABASE_REPLICA_URLS) مع "اقرأ ما كتبت":
+
+  - القراءات تذهب للنسخ فقط داخل طلبات HTTP آمنة (GET/HEAD/OPTIONS) يعلّمها ReplicaRoutingMiddleware؛
+    أوامر الإدارة والخيوط الخلفية والمعاملات (atomic) تبقى على الأساسية.
+  - أي طلب كتابة يثبّت صاحبه على الأساسية REPLICA_STICKY_SECONDS ثانية (مفتاح في الكاش الافتراضي،
+    ويلزم كاش مشترك CACHE_URL=redis/file كي يراه بقية العمّال: locmem → ImproperlyConfigured).
+  - استجابات كاش الاستجابات (core/response_cache.py) تُحسب من الأساسية فقط (primary_reads): نسخة
+    متأخرة كانت ستخزّن صفوفًا قبل الكتابة تحت الجيل الجديد طوال RESPONSE_CACHE_TTL.
+  - التأخر يُقاس بنبضة: عامل المهام (run_jobs) يكتب صف ReplicaHeartbeat على الأساسية كل
+    REPLICA_CHECK_SECONDS، والطلبات تقرؤه فقط من الأساسية والنسخة. نسخة متأخرة أكثر من
+    REPLICA_MAX_LAG_SECONDS أو معطلة، أو نبضة متوقفة (لا عامل) → الأساسية.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from prometheus_client import Gauge
+from rest_framework.exceptions import AuthenticationFailed
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY = 'replica-pin:{}'
+
+REPLICA_LAG = Gauge(
+    'db_replica_lag_seconds', 'Measured replica lag (heartbeat based)', ['alias'], multiprocess_mode='max',
+)
+REPLICA_HEALTHY = Gauge(
+    'db_replica_healthy', '1 if reads may use this replica', ['alias'], multiprocess_mode='min',
+)
+
+# هل يُسمح للطلب الحالي بالقراءة من النسخ (contextvar: يعمل مع العروض async أيضًا)
+_replica_allowed = contextvars.ContextVar('replica_allowed', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+@contextmanager
+def primary_reads():
+    """قراءات الكتلة من الأساسية مهما كان الطلب (ما يُخزَّن في الكاش مثلًا)."""
+    token = _replica_allowed.set(False)
+    try:
+        yield
+    finally:
+        _replica_allowed.reset(token)
+
+
+class ReplicaStatus:
+    __slots__ = ('lag', 'healthy', 'checked')
+
+    def __init__(self, lag, healthy, checked):
+        self.lag = lag
+        self.healthy = healthy
+        self.checked = checked
+
+
+_status = {}
+_check_lock = threading.Lock()
+
+
+def write_heartbeat():
+    """نبضة جديدة على الأساسية؛ يستدعيها عامل المهام (run_jobs) كل REPLICA_CHECK_SECONDS."""
+    from .models import ReplicaHeartbeat
+
+    now = time.time()
+    if not ReplicaHeartbeat.objects.using(PRIMARY).filter(pk=1).update(beat=now):
+        ReplicaHeartbeat.objects.using(PRIMARY).create(pk=1, beat=now)
+
+
+def measure_lag(alias):
+    """
+    الفرق بين آخر نبضة على الأساسية وآخر نبضة وصلت النسخة (دقته بحدود REPLICA_CHECK_SECONDS).
+    قراءة فقط (طلبات GET لا تكتب). نسخة لا يمكن قراءتها، أو نبضة أقدم من أن يُوثق بها → لا نهاية.
+    """
+    from .models import ReplicaHeartbeat
+
+    try:
+        primary_beat = ReplicaHeartbeat.objects.using(PRIMARY).filter(pk=1).values_list('beat', flat=True).first()
+        replica_beat = ReplicaHeartbeat.objects.using(alias).filter(pk=1).values_list('beat', flat=True).first()
+    except DatabaseError:
+        return float('inf')
+    if primary_beat is None or replica_beat is None:
+        return float('inf')
+    # العامل متوقف: لا نعرف ما كُتب بعد آخر نبضة
+    if time.time() - primary_beat > settings.REPLICA_CHECK_SECONDS + settings.REPLICA_MAX_LAG_SECONDS:
+        return float('inf')
+    return max(0.0, primary_beat - replica_beat)
+
+
+def replica_status(alias):
+    now = time.monotonic()
+    status = _status.get(alias)
+    if status is not None and now - status.checked < settings.REPLICA_CHECK_SECONDS:
+        return status
+    # خيط واحد يقيس؛ البقية يستخدمون آخر نتيجة (أو الأساسية إن لم يُقَس بعد)
+    if not _check_lock.acquire(blocking=False):
+        return status
+    try:
+        lag = measure_lag(alias)
+        status = _status[alias] = ReplicaStatus(lag, lag <= settings.REPLICA_MAX_LAG_SECONDS, time.monotonic())
+        REPLICA_LAG.labels(alias).set(lag if lag != float('inf') else -1)
+        REPLICA_HEALTHY.labels(alias).set(int(status.healthy))
+        return status
+    finally:
+        _check_lock.release()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if not _replica_allowed.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        healthy = [alias for alias in replica_aliases() if (s := replica_status(alias)) and s.healthy]
+        return random.choice(healthy) if healthy else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # النسخ والأساسية نفس البيانات
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def request_user_id(request):
+    from .authentication import ClaimsJWTAuthentication
+
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        result = None
+    user = result[0] if result else getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    يُوضع بعد AuthenticationMiddleware (لمستخدمي الجلسات في لوحة الإدارة). sync وasync: الـ contextvar
+    يُضبط في سياق الطلب وينتقل إلى خيوط sync_to_async التي تنفّذ استعلاماته.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        if isinstance(caches['default'], (LocMemCache, DummyCache)):
+            # التثبيت في كاش خاص بالعملية لا يراه بقية العمّال: قراءة ما كُتب للتو من نسخة متأخرة
+            raise ImproperlyConfigured(
+                'ReplicaRoutingMiddleware needs a shared cache for read-your-writes pins: '
+                'set CACHE_URL to redis:// or file://.'
+            )
+        self.get_response = get_response
+        self.sticky = settings.REPLICA_STICKY_SECONDS
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        user_id = request_user_id(request)
+        safe = request.method in SAFE_METHODS
+        allowed = safe and not (user_id is not None and cache.get(PIN_KEY.format(user_id)))
+
+        token = _replica_allowed.set(allowed)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_allowed.reset(token)
+
+        if not safe and user_id is not None and response.status_code < 400:
+            cache.set(PIN_KEY.format(user_id), 1, self.sticky)
+        return response
+
+    async def __acall__(self, request):
+        # المصادقة قد تقرأ صف المستخدم (core/authentication.py)
+        user_id = await sync_to_async(request_user_id)(request)
+        safe = request.method in SAFE_METHODS
+        allowed = safe and not (user_id is not None and await cache.aget(PIN_KEY.format(user_id)))
+
+        token = _replica_allowed.set(allowed)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_allowed.reset(token)
+
+        if not safe and user_id is not None and response.status_code < 400:
+            await cache.aset(PIN_KEY.format(user_id), 1, self.sticky)
+        return response
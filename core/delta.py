@@ -0,0 +1,79 @@
+"""
+🔄 مزامنة تفاضلية: ?since=<token> يعيد فقط الصفوف التي أُنشئت أو تغيّرت (رد، قراءة...) بعد الـ token.
+
+  GET /api/complaints/hr_complaints/?since=0      أول مزامنة (كل الصفوف على صفحات)
+  → {'results': [...], 'next': '<token>', 'has_more': false}
+  GET /api/complaints/hr_complaints/?since=<next> التغييرات فقط
+
+الترتيب والـ token على (updated_at, id) بفهرس لكل صندوق، أو على تعبير changed_at يمرره العرض
+(صندوق الإشعارات: الأحدث من updated_at للصف وedited_at للإشعار، فتعديله لا يكتب صفوف مستلميه).
+المعاملة قد تُثبَّت بعد أن كُتب updated_at بلحظات، لذا لا يتقدم الـ token أبعد من
+now - DELTA_SYNC_SKEW_SECONDS: الصفوف الأحدث قد تُعاد مرة ثانية، والعميل يحدّث حسب id. الحذف لا يُتتبَّع (الـ API لا يحذف هذه الصفوف).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+DELTA_PAGE_SIZE = 500
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_token(changed_at, pk):
+    return f'{(changed_at - EPOCH) // MICROSECOND}.{pk}'
+
+
+def parse_since(value):
+    """(updated_at, id) من الـ token؛ '0' = من البداية."""
+    if value in ('', '0'):
+        return None
+    try:
+        micros, _, pk = value.partition('.')
+        return EPOCH + int(micros) * MICROSECOND, int(pk or 0)
+    except (ValueError, OverflowError):
+        raise ValidationError({'since': ['Invalid sync token.']})
+
+
+def _changed(qs, since, changed_at):
+    field = 'updated_at'
+    if changed_at is not None:
+        field = 'delta_changed_at'
+        qs = qs.annotate(delta_changed_at=changed_at)
+    if since is not None:
+        after, pk = since
+        qs = qs.filter(Q(**{f'{field}__gt': after}) | Q(**{field: after, 'id__gt': pk}))
+    return qs.order_by(field, 'id'), field
+
+
+def _page(qs, since, edge, started):
+    """edge: آخر صف في الصفحة وأول صف بعدها (إن وجد) من values_list('updated_at', 'id')."""
+    has_more = len(edge) > 1
+    # لا نتقدم أبعد مما قد يكون ما زال في معاملة لم تُثبَّت
+    horizon = (started - timedelta(seconds=settings.DELTA_SYNC_SKEW_SECONDS), 0)
+    last = edge[0] if has_more else horizon
+    if last > horizon:
+        # صفحة كاملة داخل نافذة الانحراف: الـ token لا يتقدم، فلا نطلب الصفحة التالية فورًا
+        # (كانت ستعيد الصفوف نفسها)؛ الاستطلاع التالي يكملها بعد أن يتجاوزها الأفق
+        has_more = False
+    next_key = min(last, horizon)
+    if since is not None:
+        next_key = max(next_key, since)
+    return qs[:DELTA_PAGE_SIZE], encode_token(*next_key), has_more
+
+
+def changed_since(qs, since, changed_at=None):
+    """(صفحة الصفوف المتغيرة، الـ token التالي، has_more). changed_at: تعبير بدل updated_at."""
+    started = timezone.now()
+    qs, field = _changed(qs, since, changed_at)
+    edge = list(qs.values_list(field, 'id')[DELTA_PAGE_SIZE - 1:DELTA_PAGE_SIZE + 1])
+    return _page(qs, since, edge, started)
+
+
+async def achanged_since(qs, since, changed_at=None):
+    started = timezone.now()
+    qs, field = _changed(qs, since, changed_at)
+    edge = [row async for row in qs.values_list(field, 'id')[DELTA_PAGE_SIZE - 1:DELTA_PAGE_SIZE + 1]]
+    return _page(qs, since, edge, started)
@@ -0,0 +1,92 @@
+"""
+🪶 حقول مختارة (sparse fieldsets) لموارد الـ API في طلبات القراءة:
+
+  ?fields=id,title,created_at   هذه المفاتيح فقط
+  ?omit=message,response        كل المفاتيح عدا هذه (يمكن الجمع بينهما)
+
+يقلّص الحمولة وقائمة أعمدة SQL معًا: only() أمام الـ ModelSerializer، وأعمدة values() في
+ValuesSerializer (core/serializers.py). الأسماء من المستوى الأعلى فقط (section يبقى كاملًا أو يُحذف)،
+واسم غير معروف → 400 مع قائمة الحقول المتاحة.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def select_fields(params, available):
+    """الحقول المطلوبة بترتيب available، أو None إن لم يُطلب تقليص."""
+    fields, omit = _names(params.get('fields')), _names(params.get('omit'))
+    if not fields and not omit:
+        return None
+    unknown = [name for name in fields + omit if name not in available]
+    if unknown:
+        raise ValidationError({'fields': [
+            f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}"
+        ]})
+    keep = set(fields or available) - set(omit)
+    return [name for name in available if name in keep]
+
+
+def model_columns(serializer, selected):
+    """أعمدة only() لحقول الـ serializer المختارة، أو None إن كان مصدر أحدها غير عمود معروف."""
+    opts = serializer.Meta.model._meta
+    columns = {opts.pk.name}
+    for name in selected:
+        source = serializer.fields[name].source.split('.')[0]
+        if source.startswith('get_') and source.endswith('_display'):
+            source = source[len('get_'):-len('_display')]
+        try:
+            field = opts.get_field(source)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete:
+            return None
+        columns.add(field.name)
+    return columns
+
+
+class SparseFieldsSerializerMixin:
+    """يحذف من الـ serializer الحقول غير الموجودة في context['sparse_fields']."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('sparse_fields')
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """
+    ?fields/?omit لـ ViewSet: الحقول المتاحة من serializer_class.
+    مع GenericAPIView يُطبَّق تلقائيًا (السياق + only() في filter_queryset)؛
+    مع ViewSet عادي تستدعي الأفعال sparse_fields()/sparse_queryset() بنفسها.
+    """
+
+    def sparse_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = select_fields(self.request.query_params, list(self.serializer_class().fields))
+        return self._sparse_fields
+
+    def sparse_queryset(self, queryset):
+        selected = self.sparse_fields()
+        if selected is None:
+            return queryset
+        columns = model_columns(self.serializer_class(), selected)
+        return queryset if columns is None else queryset.only(*columns)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.sparse_fields()
+        return context
+
+    def filter_queryset(self, queryset):
+        return self.sparse_queryset(super().filter_queryset(queryset))
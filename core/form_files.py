@@ -0,0 +1,45 @@
+"""
+🔖 روابط ملفات النماذج ببصمة المحتوى: /api/form-files/<id>/<hash>.pdf
+
+البصمة (FormModel.file_hash) تُحسب عند حفظ ملف جديد، فاستبدال الـ PDF (import_forms أو لوحة الإدارة)
+يغيّر الرابط تلقائيًا. لذلك يُقدَّم الرابط بـ Cache-Control: immutable لسنة (FORM_FILE_MAX_AGE):
+المتصفح والـ CDN يخدمان الفتح المتكرر للنموذج نفسه دون الوصول إلى Django.
+رابط ببصمة قديمة (واجهة محفوظة قبل التغيير) → تحويل 302 إلى الرابط الحالي.
+"""
+import hashlib
+
+from django.urls import reverse
+
+FILE_HASH_SIZE = 8  # بايت → 16 حرف hex
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(fh):
+    digest = hashlib.blake2b(digest_size=FILE_HASH_SIZE)
+    for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_hash(field_file):
+    """بصمة FieldFile (رفع جديد لم يُكتب بعد أو ملف في التخزين)، أو '' إن كان الملف مفقودًا."""
+    committed = field_file._committed
+    try:
+        field_file.open('rb')
+    except OSError:
+        return ''
+    try:
+        return content_hash(field_file)
+    finally:
+        if committed:
+            field_file.close()
+        else:
+            field_file.seek(0)  # FileField يكتبه إلى التخزين بعد قليل
+
+
+def form_file_url(storage, form_id, name, digest, request=None):
+    """الرابط الثابت؛ ملف بلا بصمة (مفقود من التخزين) → رابط MEDIA العادي كما كان."""
+    if not name:
+        return None
+    url = reverse('form-file', args=[form_id, digest]) if digest else storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
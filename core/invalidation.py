@@ -0,0 +1,167 @@
+"""
+📡 ناقل الإبطال بين العمّال: أي كاش داخل العملية (المستخدمون، كاش الاستجابات على locmem...)
+يبقى قديمًا في بقية عمّال gunicorn والنسخ الأخرى ما لم يُبلَّغوا بالتغيير.
+
+  - Postgres: NOTIFY على القناة bm_invalidate (يُسلَّم عند الـ commit)، وكل عامل يستمع (LISTEN)
+    باتصال مخصص في خيط خلفي → الإبطال شبه فوري.
+  - SQLite/غيره: جدول InvalidationVersion (رقم تسلسلي لكل قناة/مفتاح) يستطلعه كل عامل كل
+    INVALIDATION_POLL_SECONDS → تأخير أقصى بحدود فترة الاستطلاع.
+
+المُرسل يبطل كاشه بنفسه ثم يستدعي publish()، والمعالجات (subscribe) تعمل في العمّال الآخرين فقط.
+المفتاح None يعني "كل شيء": يُرسل للمعالجات بعد انقطاع الاتصال لأن رسائل قد فاتت.
+يبدأ الخيط من post_worker_init في gunicorn.conf.py.
+"""
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, connections, transaction
+
+logger = logging.getLogger('core.invalidation')
+
+PG_CHANNEL = 'bm_invalidate'
+_NONCE = uuid.uuid4().hex[:12]
+
+_handlers = defaultdict(list)
+_listener = None
+
+
+def origin():
+    # pid يميّز العمّال المتفرعين من نفس الـ master، والـ nonce يميّز الأجهزة/مرات الإقلاع
+    return f'{os.getpid()}-{_NONCE}'
+
+
+def enabled():
+    return getattr(settings, 'INVALIDATION_BUS', True)
+
+
+def subscribe(channel, handler):
+    """handler(key) يُستدعى عند وصول حدث من عامل آخر (key=None: أبطل كل شيء)."""
+    _handlers[channel].append(handler)
+
+
+def dispatch(channel, key):
+    for handler in _handlers.get(channel, ()):
+        try:
+            handler(key)
+        except Exception:
+            logger.exception('invalidation handler failed for %s:%s', channel, key)
+
+
+def dispatch_all():
+    for channel in list(_handlers):
+        dispatch(channel, None)
+
+
+def publish(channel, key):
+    """يبث الحدث لبقية العمّال؛ داخل معاملة لا يُسلَّم إلا بعد الـ commit (NOTIFY والجدول كلاهما)."""
+    if not enabled():
+        return
+    key = str(key)
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cur:
+                if connection.vendor == 'postgresql':
+                    payload = json.dumps({'c': channel, 'k': key, 'o': origin()})
+                    cur.execute('SELECT pg_notify(%s, %s)', [PG_CHANNEL, payload])
+                else:
+                    # رقم تسلسلي عام: كاتب واحد في SQLite، فـ MAX+1 فريد ومتزايد بترتيب الـ commit
+                    cur.execute(
+                        'INSERT INTO core_invalidationversion (channel, key, version, origin) '
+                        'VALUES (%s, %s, (SELECT COALESCE(MAX(version), 0) + 1 FROM core_invalidationversion), %s) '
+                        'ON CONFLICT (channel, key) DO UPDATE SET version = excluded.version, origin = excluded.origin',
+                        [channel, key, origin()],
+                    )
+    except DatabaseError:
+        # قبل migrate مثلًا: يبقى TTL الكاش المحلي حدًّا أعلى للقِدم
+        logger.warning('could not publish invalidation %s:%s', channel, key, exc_info=True)
+
+
+# ------------------------------------------------------------------ listeners
+class Listener(threading.Thread):
+
+    def __init__(self, poll_seconds):
+        super().__init__(name='invalidation-bus', daemon=True)
+        self.poll_seconds = poll_seconds
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        connected_once = False
+        while not self._stopped.is_set():
+            try:
+                if connected_once:
+                    dispatch_all()  # أحداث قد فاتت أثناء الانقطاع
+                connected_once = True
+                if connections['default'].vendor == 'postgresql':
+                    self.listen_postgres()
+                else:
+                    self.poll_table()
+            except Exception:
+                logger.exception('invalidation listener failed; reconnecting')
+                connections['default'].close()
+                self._stopped.wait(min(self.poll_seconds * 5, 30))
+
+    def listen_postgres(self):
+        # اتصال مخصص خارج تجمع الاتصالات (لا يحجز مكانًا فيه طوال عمر العامل)
+        wrapper = connections['default']
+        raw = wrapper.Database.connect(**wrapper.get_connection_params())
+        raw.autocommit = True
+        me = origin()
+        try:
+            with raw.cursor() as cur:
+                cur.execute(f'LISTEN {PG_CHANNEL}')
+            while not self._stopped.is_set():
+                for payload in self.notifications(raw):
+                    try:
+                        event = json.loads(payload)
+                    except ValueError:
+                        continue
+                    if event.get('o') != me:
+                        dispatch(event['c'], event['k'])
+        finally:
+            raw.close()
+
+    def notifications(self, raw):
+        if callable(getattr(raw, 'notifies', None)):
+            # psycopg 3: مولّد ينتهي بعد timeout
+            return [note.payload for note in raw.notifies(timeout=self.poll_seconds)]
+        # psycopg2
+        if select.select([raw], [], [], self.poll_seconds) == ([], [], []):
+            return []
+        raw.poll()
+        payloads = [note.payload for note in raw.notifies]
+        raw.notifies.clear()
+        return payloads
+
+    def poll_table(self):
+        from django.db.models import Max
+        from .models import InvalidationVersion
+
+        me = origin()
+        last = InvalidationVersion.objects.aggregate(v=Max('version'))['v'] or 0
+        while not self._stopped.wait(self.poll_seconds):
+            rows = InvalidationVersion.objects.filter(version__gt=last).order_by('version').values_list(
+                'channel', 'key', 'version', 'origin',
+            )
+            for channel, key, version, sender in rows:
+                last = version
+                if sender != me:
+                    dispatch(channel, key)
+
+
+def start_listener():
+    """يُستدعى مرة في كل عامل ويب (بعد تحميل Django)."""
+    global _listener
+    if not enabled() or _listener is not None:
+        return _listener
+    _listener = Listener(getattr(settings, 'INVALIDATION_POLL_SECONDS', 1.0))
+    _listener.start()
+    return _listener
@@ -0,0 +1,252 @@
+"""
+🧵 طابور مهام خلفية داخل قاعدة البيانات (بدون وسيط خارجي):
+
+  enqueue('send_notification', {...}, user=request.user)  → صف Job بحالة queued ويعود فورًا
+  python manage.py run_jobs                                → عامل يسحب المهام وينفّذها
+  JOB_RUN_IN_WEB=True                                      → أو خيط عامل داخل كل عامل gunicorn
+
+العامل داخل الويب (InProcessRunner) هو مسار التسليم على الخطة المجانية (بلا خدمة worker):
+يبدأ من post_worker_init في gunicorn.conf.py، ويوقظه enqueue بعد الـ commit فتُنفَّذ المهمة فورًا.
+
+السحب: SELECT ... FOR UPDATE SKIP LOCKED على Postgres (عمّال متوازيون لا ينتظر أحدهم الآخر)،
+ثم UPDATE مشروط بالحالة (يكفي وحده على SQLite حيث لا يوجد FOR UPDATE).
+الفشل: إعادة المحاولة بتأخير أُسّي JOB_RETRY_BASE_SECONDS × 2^(n-1) حتى max_attempts.
+مهمة running لم تنتهِ خلال JOB_LOCK_TIMEOUT (عامل مات) تُسحب من جديد.
+"""
+import io
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, close_old_connections, connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .counters import fan_out
+from .models import Job, Notification
+from .response_cache import invalidate
+
+logger = logging.getLogger('core.jobs')
+
+User = get_user_model()
+
+HANDLERS = {}
+FANOUT_BATCH = 2000
+OUTPUT_LIMIT = 10000
+
+_runner = None
+
+
+def register(kind):
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=3, delay=0):
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    job = Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if _runner is not None and not delay:
+        transaction.on_commit(_runner.wake)
+    return job
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, kinds=None):
+    """يحجز أقدم مهمة مستحقة لهذا العامل ويعيدها (أو None)."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    due = Q(status='queued', run_at__lte=now) | Q(status='running', locked_at__lt=stale)
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            return _claim(Job.objects.select_for_update(skip_locked=True).filter(due), worker, kinds, now)
+    # SQLite: بدون معاملة صريحة (ترقية قفل القراءة إلى كتابة تفشل فورًا بـ database is locked)
+    return _claim(Job.objects.filter(due), worker, kinds, now)
+
+
+def _claim(qs, worker, kinds, now):
+    if kinds:
+        qs = qs.filter(kind__in=kinds)
+    job = qs.order_by('run_at', 'id').first()
+    if job is None:
+        return None
+    claimed = Job.objects.filter(pk=job.pk, status=job.status, attempts=job.attempts).update(
+        status='running', attempts=job.attempts + 1, locked_by=worker, locked_at=now,
+    )
+    if not claimed:
+        return None  # سبقنا عامل آخر (SQLite)
+    job.refresh_from_db()
+    return job
+
+
+def backoff_seconds(attempts):
+    base = settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return min(base, settings.JOB_RETRY_MAX_SECONDS) * random.uniform(0.8, 1.2)
+
+
+def run(job):
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f'Unknown job kind: {job.kind}')
+        result = handler(job.payload, job)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('job %s failed (attempt %s/%s)', job.pk, job.attempts, job.max_attempts)
+        if job.attempts < job.max_attempts and handler is not None:
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', last_error=error, locked_by='', locked_at=None,
+                run_at=timezone.now() + timedelta(seconds=backoff_seconds(job.attempts)),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='failed', last_error=error, finished_at=timezone.now(),
+            )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status='succeeded', result=result, finished_at=timezone.now(),
+    )
+    return True
+
+
+class InProcessRunner(threading.Thread):
+    """عامل طابور في خيط خلفي داخل عملية الويب: نفس claim/run، فيتعايش مع run_jobs إن وُجد."""
+
+    def __init__(self, poll_seconds):
+        super().__init__(name='job-runner', daemon=True)
+        self.poll_seconds = poll_seconds
+        self.worker = f'{worker_id()}:web'
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            if not self.run_once():
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def run_once(self):
+        """ينفّذ مهمة مستحقة واحدة إن وُجدت (True)."""
+        close_old_connections()
+        try:
+            job = claim(self.worker)
+            if job is None:
+                return False
+            run(job)
+            return True
+        except DatabaseError:
+            # تعذّر الحفظ: المهمة تبقى running وتُسحب من جديد بعد JOB_LOCK_TIMEOUT
+            logger.warning('in-process job runner: database error', exc_info=True)
+            connections['default'].close()
+            return False
+
+
+def start_runner():
+    """يُستدعى مرة في كل عامل ويب (بعد تحميل Django) عند JOB_RUN_IN_WEB."""
+    global _runner
+    if not getattr(settings, 'JOB_RUN_IN_WEB', False) or _runner is not None:
+        return _runner
+    _runner = InProcessRunner(settings.JOB_POLL_SECONDS)
+    _runner.start()
+    return _runner
+
+
+def stop_runner(timeout):
+    """خروج العامل: تُكمل المهمة الجارية خلال timeout، وإلا تُسحب بعد JOB_LOCK_TIMEOUT."""
+    if _runner is not None:
+        _runner.stop()
+        _runner.join(timeout)
+
+
+def purge_finished(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    return Job.objects.filter(status='succeeded', finished_at__lt=cutoff).delete()[0]
+
+
+# ------------------------------------------------------------------ handlers
+@register('send_notification')
+def send_notification(payload, job):
+    """إنشاء UserNotification لكل المستلمين على دفعات (آمن عند إعادة المحاولة)."""
+    notification = Notification.objects.get(pk=payload['notification_id'])
+    users = User.objects.order_by('id')
+    if payload.get('usernames'):
+        users = users.filter(username__in=payload['usernames'])
+
+    created = 0
+    batch = []
+    for user_id in users.values_list('id', flat=True).iterator(chunk_size=FANOUT_BATCH):
+        batch.append(user_id)
+        if len(batch) >= FANOUT_BATCH:
+            created += fan_out(notification, batch)
+            batch = []
+    if batch:
+        created += fan_out(notification, batch)
+
+    # bulk_create لا يطلق إشارات: كل صناديق الإشعارات تعتمد على 'notifications'
+    invalidate('notifications')
+    return {'notification_id': notification.pk, 'recipients': created}
+
+
+def original_usernames(notification):
+    """
+    مستلمو أول إرسال للإشعار: قائمة usernames ([] = كل المستخدمين)، أو None إن تعذّر معرفتهم
+    (وُزّع ثم حُذفت مهمته بـ purge_finished). إشعار لم يُرسل قط → [] (للجميع).
+    """
+    job = Job.objects.filter(
+        kind='send_notification', payload__notification_id=notification.pk,
+    ).order_by('id').only('payload').first()
+    if job is not None:
+        return job.payload.get('usernames') or []
+    if notification.recipients_count or notification.usernotification_set.exists():
+        return None
+    return []
+
+
+# خيارات الأوامر المسموح تمريرها من الـ API (لا مسارات ملفات)
+COMMAND_OPTIONS = {
+    'import_forms': {'dry_run', 'sheet', 'no_create_sections'},
+    'import_employees': set(),
+}
+
+
+def run_command(name, payload):
+    options = {k: v for k, v in payload.items() if k in COMMAND_OPTIONS[name]}
+    out = io.StringIO()
+    call_command(name, stdout=out, stderr=out, **options)
+    return {'output': out.getvalue()[-OUTPUT_LIMIT:]}
+
+
+@register('import_forms')
+def import_forms(payload, job):
+    return run_command('import_forms', payload)
+
+
+@register('import_employees')
+def import_employees(payload, job):
+    return run_command('import_employees', payload)
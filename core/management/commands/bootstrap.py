@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, DatabaseError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# مفتاح ثابت لـ pg_advisory_lock (أي bigint فريد داخل قاعدة البيانات)
+ADVISORY_LOCK_KEY = 0x626D5F626F6F74  # "bm_boot"
+
+logger = logging.getLogger("core.bootstrap")
+
+
+def hash_files(paths):
+    """بصمة sha256 لقائمة ملفات (الاسم النسبي + المحتوى)، الملف المفقود يدخل كاسم فقط."""
+    h = hashlib.sha256()
+    base = Path(settings.BASE_DIR)
+    for p in sorted(Path(p) for p in paths):
+        try:
+            rel = p.resolve().relative_to(base)
+        except ValueError:
+            rel = p
+        h.update(str(rel).encode())
+        if p.is_file():
+            with open(p, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(chunk)
+        else:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def migrations_fingerprint():
+    from django.db.migrations.loader import MigrationLoader
+
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    h = hashlib.sha256(django.get_version().encode())
+    for app_label, name in sorted(loader.disk_migrations):
+        h.update(f"{app_label}.{name}".encode())
+    # محتوى ملفات المايغريشن المحلية (قد تُعدَّل دون تغيير الاسم)
+    local = [
+        p for p in Path(settings.BASE_DIR).glob("*/migrations/*.py")
+        if p.name != "__init__.py"
+    ]
+    h.update(hash_files(local).encode())
+    return h.hexdigest()
+
+
+def employees_fingerprint():
+    base = Path(settings.BASE_DIR)
+    return hash_files([base / "employees.xlsx", base / "sections.xlsx"])
+
+
+def forms_fingerprint():
+    data_dir = Path(settings.BASE_DIR) / "data"
+    files = [p for p in data_dir.iterdir() if p.is_file()] if data_dir.exists() else []
+    return hash_files(files)
+
+
+def superuser_fingerprint():
+    env = [os.environ.get(k, "") for k in (
+        "DJANGO_SUPERUSER_USERNAME", "DJANGO_SUPERUSER_EMAIL", "DJANGO_SUPERUSER_PASSWORD",
+    )]
+    return hashlib.sha256("\0".join(env).encode()).hexdigest()
+
+
+@contextmanager
+def advisory_lock():
+    """
+    قفل يمنع عمّالًا متزامنين من تكرار الإقلاع:
+    Postgres → pg_advisory_lock، وإلا → قفل ملف بجانب المشروع.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", [ADVISORY_LOCK_KEY])
+        try:
+            yield
+        finally:
+            with connection.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", [ADVISORY_LOCK_KEY])
+        return
+
+    if fcntl is None:
+        yield
+        return
+    lock_path = Path(settings.BASE_DIR) / ".bootstrap.lock"
+    with open(lock_path, "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class Command(BaseCommand):
+    help = (
+        "Idempotent boot: runs migrate, import_employees, import_forms and createsuperuser "
+        "only when their inputs changed since the last successful run."
+    )
+
+    # (الاسم، دالة البصمة، هل الفشل قاتل)
+    STEPS = [
+        ("migrate", migrations_fingerprint, True),
+        ("import_employees", employees_fingerprint, False),
+        ("import_forms", forms_fingerprint, False),
+        ("createsuperuser", superuser_fingerprint, False),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Run every step regardless of fingerprints.")
+        parser.add_argument("--only", nargs="+", choices=[s[0] for s in self.STEPS],
+                            help="Run only the given steps.")
+
+    def handle(self, *args, **opts):
+        force = opts["force"]
+        only = set(opts.get("only") or [])
+        total_start = time.perf_counter()
+
+        with advisory_lock():
+            for name, fingerprint_fn, fatal in self.STEPS:
+                if only and name not in only:
+                    continue
+                self.run_step(name, fingerprint_fn, fatal, force)
+
+        total = time.perf_counter() - total_start
+        self.stdout.write(self.style.SUCCESS(f"✔️ Bootstrap finished in {total:.2f}s"))
+
+    def run_step(self, name, fingerprint_fn, fatal, force):
+        t0 = time.perf_counter()
+        fingerprint = fingerprint_fn()
+        stored = self.stored_fingerprint(name)
+        if not force and stored == fingerprint:
+            self.stdout.write(f"⏭️  {name}: unchanged, skipped ({time.perf_counter() - t0:.3f}s)")
+            return
+
+        self.stdout.write(f"▶️  {name}: running...")
+        try:
+            if name == "migrate":
+                call_command("migrate", interactive=False, verbosity=1)
+            elif name == "createsuperuser":
+                self.create_superuser()
+            else:
+                call_command(name)
+        except Exception as e:
+            elapsed = time.perf_counter() - t0
+            if fatal:
+                raise
+            # مثل "|| true" سابقًا: أي خطأ في خطوة غير قاتلة لا يوقف الإقلاع،
+            # ولا نحفظ البصمة كي تُعاد المحاولة في الإقلاع التالي
+            logger.exception("bootstrap step %s failed", name)
+            self.stdout.write(self.style.WARNING(f"⚠️ {name}: failed after {elapsed:.2f}s — {e!r}"))
+            return
+
+        elapsed = time.perf_counter() - t0
+        self.save_fingerprint(name, fingerprint, elapsed)
+        self.stdout.write(self.style.SUCCESS(f"✅ {name}: done in {elapsed:.2f}s"))
+
+    def create_superuser(self):
+        from django.contrib.auth import get_user_model
+
+        User = get_user_model()
+        username = os.environ.get("DJANGO_SUPERUSER_USERNAME")
+        # createsuperuser يفشل إن وُجد المستخدم؛ وجوده يعني أن الخطوة تمت
+        if username and User._default_manager.filter(**{User.USERNAME_FIELD: username}).exists():
+            self.stdout.write(f"   superuser {username!r} already exists")
+            return
+        call_command("createsuperuser", interactive=False, verbosity=0)
+
+    def stored_fingerprint(self, name):
+        from core.models import BootstrapStep
+
+        try:
+            return BootstrapStep.objects.filter(name=name).values_list("fingerprint", flat=True).first()
+        except DatabaseError:
+            # الجدول غير موجود بعد (قاعدة جديدة قبل migrate)
+            return None
+
+    def save_fingerprint(self, name, fingerprint, elapsed):
+        from core.models import BootstrapStep
+
+        BootstrapStep.objects.update_or_create(
+            name=name,
+            defaults={"fingerprint": fingerprint, "duration_ms": int(elapsed * 1000)},
+        )
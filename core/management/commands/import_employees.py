@@ -1,16 +1,21 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from core.models import Section, UserSectionPermission
+from core.management.timing import PhaseTimingMixin
 import openpyxl
 
 User = get_user_model()
 
-class Command(BaseCommand):
+class Command(PhaseTimingMixin, BaseCommand):
     help = "Import sections and users from Excel files"
 
     def handle(self, *args, **kwargs):
-        self.import_sections()
-        self.import_users()
+        self.verbosity = kwargs.get("verbosity", 1)
+        self.timings = []
+        with self.phase("sections"):
+            self.import_sections()
+        with self.phase("users"):
+            self.import_users()
 
     def import_sections(self):
         self.stdout.write("📁 Importing sections from sections.xlsx...")
@@ -9,6 +9,9 @@ from django.conf import settings
 from django.db import transaction
 from django.core.files import File
 
+from core.form_files import content_hash
+from core.management.timing import PhaseTimingMixin
+
 try:
     from openpyxl import load_workbook
 except Exception:
@@ -115,7 +118,7 @@ def find_or_create_section(Section, name, create_missing=True):
            or Section.objects.filter(name_ar__icontains=name).first())
     return obj or (Section.objects.create(name_ar=name, name_en=name) if create_missing else None)
 
-class Command(BaseCommand):
+class Command(PhaseTimingMixin, BaseCommand):
     help = "يستورد ملفات PDF من data/ ويربطها بصفوف forms.xlsx (كل الشيتات) ويُنشئ الأقسام الناقصة، ولن يترك أي PDF دون إدخال."
 
     def add_arguments(self, parser):
@@ -144,46 +147,23 @@ class Command(BaseCommand):
         self.stdout.write(self.style.NOTICE(f"📂 DATA DIR: {data_dir}"))
         self.stdout.write(self.style.NOTICE(f"📄 EXCEL  : {excel_path.name}"))
 
+        self.verbosity = opts.get("verbosity", 1)
+        self.timings = []
+
         # فهرسة ملفات PDF
-        pdf_index = {}
-        for p in sorted(data_dir.glob("*.pdf")):
-            key = norm_code(p.stem)
-            if key: pdf_index[key] = p
+        with self.phase("index_pdfs"):
+            pdf_index = {}
+            for p in sorted(data_dir.glob("*.pdf")):
+                key = norm_code(p.stem)
+                if key: pdf_index[key] = p
         if not pdf_index:
             self.stdout.write(self.style.WARNING("لم يتم العثور على أي PDF في المجلد."))
 
         # قراءة الإكسل
-        wb = load_workbook(excel_path, data_only=True)
-        sheetnames = [sheet_only] if sheet_only else wb.sheetnames
-
-        rows_data = []
-        for sname in sheetnames:
-            ws = wb[sname]
-            score, header_row_idx, headers = detect_header_row(ws)
-            if score == 0:
-                self.stdout.write(self.style.WARNING(f"تخطي '{sname}' لعدم العثور على صف عناوين مناسب."))
-                continue
-
-            clean_sheet_name = sheet_clean_name(sname)
-            for row in ws.iter_rows(min_row=header_row_idx+1, values_only=True):
-                if not row: continue
-                row_dict = {}
-                for i in range(len(headers)):
-                    key = normalize_header(headers[i]) if i < len(headers) else None
-                    if key: row_dict[key] = row[i] if i < len(row) else None
-
-                serial = norm(row_dict.get("serial_number"))
-                if not serial: continue
-
-                rows_data.append({
-                    "serial_number": serial,
-                    "serial_key": norm_code(serial),
-                    "name_ar": norm(row_dict.get("name_ar")),
-                    "name_en": norm(row_dict.get("name_en")),
-                    "category": norm(row_dict.get("category")),
-                    "description": norm(row_dict.get("description")),
-                    "section": norm(row_dict.get("section")) or clean_sheet_name,
-                })
+        with self.phase("read_excel"):
+            wb = load_workbook(excel_path, data_only=True)
+            sheetnames = [sheet_only] if sheet_only else wb.sheetnames
+            rows_data = self.read_rows(wb, sheetnames)
 
         excel_index = {r["serial_key"]: r for r in rows_data if r["serial_key"]}
         self.stdout.write(self.style.NOTICE(f"🧾 Rows loaded: {len(rows_data)} from {len(sheetnames)} sheet(s)."))
@@ -234,7 +214,7 @@ class Command(BaseCommand):
                         if getattr(obj, fld) != val:
                             setattr(obj, fld, val); changed = True
                     filename = pdf_path.name
-                    if not obj.file or Path(obj.file.name).name != filename:
+                    if not obj.file or Path(obj.file.name).name != filename or self.content_changed(obj, pdf_path):
                         if not dry_run:
                             with open(pdf_path, "rb") as fh:
                                 obj.file.save(filename, File(fh), save=False)
@@ -258,8 +238,9 @@ class Command(BaseCommand):
                     created += 1
 
         if dry_run:
-            self.stdout.write(self.style.Warning("DRY RUN — لن يتم أي حفظ."))
-        do_work()
+            self.stdout.write(self.style.WARNING("DRY RUN — لن يتم أي حفظ."))
+        with self.phase("sync_db"):
+            do_work()
 
         self.stdout.write("")
         self.stdout.write(self.style.SUCCESS(f"✅ Created: {created}"))
@@ -274,3 +255,41 @@ class Command(BaseCommand):
                     self.stdout.write(f" - {k}: {it}")
             if any(len(v) > 80 for v in problems.values()):
                 self.stdout.write("... (تم تقصير القائمة)")
+
+    def content_changed(self, obj, pdf_path):
+        """نفس الاسم بمحتوى جديد → يُرفع من جديد فتتغير بصمته ورابطه الثابت (core/form_files.py)."""
+        if not getattr(obj, "file_hash", ""):
+            return False
+        with open(pdf_path, "rb") as fh:
+            return content_hash(fh) != obj.file_hash
+
+    def read_rows(self, wb, sheetnames):
+        rows_data = []
+        for sname in sheetnames:
+            ws = wb[sname]
+            score, header_row_idx, headers = detect_header_row(ws)
+            if score == 0:
+                self.stdout.write(self.style.WARNING(f"تخطي '{sname}' لعدم العثور على صف عناوين مناسب."))
+                continue
+
+            clean_sheet_name = sheet_clean_name(sname)
+            for row in ws.iter_rows(min_row=header_row_idx+1, values_only=True):
+                if not row: continue
+                row_dict = {}
+                for i in range(len(headers)):
+                    key = normalize_header(headers[i]) if i < len(headers) else None
+                    if key: row_dict[key] = row[i] if i < len(row) else None
+
+                serial = norm(row_dict.get("serial_number"))
+                if not serial: continue
+
+                rows_data.append({
+                    "serial_number": serial,
+                    "serial_key": norm_code(serial),
+                    "name_ar": norm(row_dict.get("name_ar")),
+                    "name_en": norm(row_dict.get("name_en")),
+                    "category": norm(row_dict.get("category")),
+                    "description": norm(row_dict.get("description")),
+                    "section": norm(row_dict.get("section")) or clean_sheet_name,
+                })
+        return rows_data
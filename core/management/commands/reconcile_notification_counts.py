@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core import counters
+from core.models import Notification
+
+
+class Command(BaseCommand):
+    help = "يعيد عدّ recipients_count/read_count للإشعارات من UserNotification ويصلح أي انحراف (core/counters.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--notification", type=int, action="append", default=[],
+                            help="only this notification id (repeatable)")
+        parser.add_argument("--dry-run", action="store_true", help="report drift without fixing it")
+
+    def handle(self, *args, **opts):
+        notifications = Notification.objects.all()
+        if opts["notification"]:
+            notifications = notifications.filter(pk__in=opts["notification"])
+
+        drift = list(counters.drifted(notifications).order_by("id").values_list(
+            "id", "recipients_count", "actual_recipients", "read_count", "actual_read",
+        ))
+        for pk, recipients, actual_recipients, read, actual_read in drift:
+            self.stdout.write(
+                f"#{pk}: recipients {recipients} → {actual_recipients}, read {read} → {actual_read}"
+            )
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("✅ counters match"))
+            return
+        if opts["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"DRY RUN — {len(drift)} notification(s) drifted"))
+            return
+        # إعادة العدّ داخل UPDATE نفسه (لا القيم المطبوعة أعلاه) كي لا تضيع قراءة حدثت بينهما
+        fixed = counters.recount(Notification.objects.filter(pk__in=[row[0] for row in drift]))
+        self.stdout.write(self.style.SUCCESS(f"✅ fixed {fixed} notification(s)"))
@@ -0,0 +1,82 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from core import jobs
+from core.db_router import replica_aliases, write_heartbeat
+
+
+class Command(BaseCommand):
+    help = "عامل طابور المهام الخلفية (core/jobs.py): يسحب المهام المستحقة من جدول Job وينفّذها."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--burst", action="store_true", help="exit when the queue is empty")
+        parser.add_argument("--kinds", default="", help="comma separated job kinds to run (default: all)")
+        parser.add_argument("--sleep", type=float, default=None,
+                            help="seconds to wait when idle (default JOB_POLL_SECONDS)")
+
+    def handle(self, *args, **opts):
+        kinds = [k for k in opts["kinds"].split(",") if k]
+        idle_sleep = opts["sleep"] if opts["sleep"] is not None else settings.JOB_POLL_SECONDS
+        worker = jobs.worker_id()
+        self.stopping = False
+
+        # SIGTERM (إعادة نشر): نُكمل المهمة الحالية ثم نخرج
+        def stop(signum, frame):
+            self.stopping = True
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(self.style.NOTICE(f"🧵 worker {worker} ({', '.join(kinds) or 'all kinds'})"))
+        if replica_aliases():
+            # نبضة قياس تأخر نسخ القراءة (core/db_router.py) في خيط مستقل: لا تتوقف أثناء مهمة طويلة
+            threading.Thread(target=self.heartbeat, name="replica-heartbeat", daemon=True).start()
+        last_purge = 0.0
+        while not self.stopping:
+            close_old_connections()
+            try:
+                if time.monotonic() - last_purge > 3600:
+                    last_purge = time.monotonic()
+                    purged = jobs.purge_finished(settings.JOB_KEEP_DAYS)
+                    if purged:
+                        self.stdout.write(f"🧹 purged {purged} finished job(s)")
+                job = jobs.claim(worker, kinds)
+            except DatabaseError as e:
+                # القاعدة مشغولة/منقطعة: نعيد المحاولة بدل إسقاط العامل
+                self.stderr.write(f"database error while claiming: {e}")
+                time.sleep(idle_sleep)
+                continue
+            if job is None:
+                if opts["burst"]:
+                    break
+                time.sleep(idle_sleep)
+                continue
+
+            t0 = time.perf_counter()
+            try:
+                ok = jobs.run(job)
+            except DatabaseError as e:
+                # تعذّر حفظ النتيجة: تبقى running وتُسحب من جديد بعد JOB_LOCK_TIMEOUT
+                self.stderr.write(f"database error while finishing {job.kind} #{job.pk}: {e}")
+                continue
+            elapsed = time.perf_counter() - t0
+            style = self.style.SUCCESS if ok else self.style.WARNING
+            self.stdout.write(style(
+                f"{'✅' if ok else '⚠️'} {job.kind} #{job.pk} attempt {job.attempts}/{job.max_attempts} "
+                f"in {elapsed:.2f}s"
+            ))
+        self.stdout.write("👋 worker stopped")
+
+    def heartbeat(self):
+        while not self.stopping:
+            try:
+                write_heartbeat()
+            except DatabaseError as e:
+                self.stderr.write(f"database error while writing replica heartbeat: {e}")
+            finally:
+                close_old_connections()
+            time.sleep(settings.REPLICA_CHECK_SECONDS)
@@ -0,0 +1,260 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import (
+    Complaint, FormModel, Notification, Section, UserNotification, UserSectionPermission,
+)
+from core.counters import recount
+from core.form_files import content_hash
+from core.response_cache import invalidate
+
+User = get_user_model()
+
+DEFAULT_ANCHOR = "2025-09-01"
+ROLE_WEIGHTS = (("employee", 90), ("hr", 6), ("manager", 4))
+
+
+def placeholder_pdf(title):
+    """PDF صغير صالح يحمل رقم النموذج (محتوى مختلف لكل نموذج)."""
+    text = title.replace("(", "").replace(")", "")
+    stream = f"BT /F1 24 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """تعطيل auto_now_add مؤقتًا كي تُحفظ التواريخ المولّدة كما هي."""
+    saved = [(f, f.auto_now_add) for f in fields]
+    for f, _ in saved:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, value in saved:
+            f.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic, production-scale dataset (users, sections, permissions, forms, "
+        "notifications, complaints) with batched inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--sections", type=int, default=12)
+        parser.add_argument("--forms", type=int, default=200)
+        parser.add_argument("--notifications", type=int, default=200)
+        parser.add_argument("--broadcast-ratio", type=float, default=0.3,
+                            help="Share of notifications sent to every user.")
+        parser.add_argument("--targeted-size", type=int, default=50,
+                            help="Recipients of a non-broadcast notification.")
+        parser.add_argument("--read-ratio", type=float, default=0.7)
+        parser.add_argument("--complaints", type=int, default=5000)
+        parser.add_argument("--reply-ratio", type=float, default=0.6)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="seed", help="Prefix for generated usernames/serials.")
+        parser.add_argument("--password", default="seed-pass-123", help="Password for every generated user.")
+        parser.add_argument("--anchor", default=DEFAULT_ANCHOR,
+                            help="Reference date (YYYY-MM-DD) for generated timestamps.")
+
+    def handle(self, *args, **opts):
+        self.rnd = random.Random(opts["seed"])
+        self.batch_size = opts["batch_size"]
+        self.prefix = opts["prefix"]
+        try:
+            self.anchor = datetime.strptime(opts["anchor"], "%Y-%m-%d").replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            raise CommandError(f"Invalid --anchor: {opts['anchor']!r}")
+
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(f"Users with prefix '{self.prefix}_' already exist; use another --prefix.")
+
+        started = time.perf_counter()
+        sections = self.step("sections", self.create_sections, opts["sections"])
+        users = self.step("users", self.create_users, opts["users"], opts["password"])
+        self.step("permissions", self.create_permissions, users, sections)
+        self.step("forms", self.create_forms, opts["forms"], sections)
+        self.step("notifications", self.create_notifications, users, opts)
+        self.step("complaints", self.create_complaints, users, opts)
+        # bulk_create لا يطلق إشارات: نُبطل كاش الاستجابات يدويًا
+        invalidate("sections", "forms", "notifications", "users", "complaints:hr", "complaints:manager")
+        self.stdout.write(self.style.SUCCESS(f"✔️ Seed completed in {time.perf_counter() - started:.1f}s"))
+
+    # ------------------------------------------------------------------ helpers
+    def step(self, name, fn, *args):
+        t0 = time.perf_counter()
+        result, count = fn(*args)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {name}: {count} rows in {time.perf_counter() - t0:.1f}s"
+        ))
+        return result
+
+    def bulk_insert(self, model, rows):
+        """إدخال مولّد صفوف على دفعات دون تحميله كاملًا في الذاكرة."""
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                count += self.flush(model, batch)
+                batch = []
+        if batch:
+            count += self.flush(model, batch)
+        return count
+
+    def flush(self, model, batch):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+        return len(batch)
+
+    def random_time(self, days_back=365):
+        return self.anchor - timedelta(seconds=self.rnd.randint(0, days_back * 86400))
+
+    # ------------------------------------------------------------------ steps
+    def create_sections(self, n):
+        names = [f"{self.prefix.title()} Section {i:03d}" for i in range(n)]
+        Section.objects.bulk_create([Section(name_ar=name, name_en=name) for name in names])
+        # الصلاحيات والنماذج تتوزع على كل الأقسام (الموجودة مسبقًا + الجديدة)
+        sections = list(Section.objects.order_by("id").values_list("id", flat=True))
+        return sections, len(names)
+
+    def create_users(self, n, password):
+        hashed = make_password(password)  # PBKDF2 مرة واحدة لكل المستخدمين
+        roles, weights = zip(*ROLE_WEIGHTS)
+        now = self.anchor
+
+        def rows():
+            for i in range(n):
+                # أول مستخدمَين hr ثم manager كي تكون للشكاوى جهة رد دائمًا
+                role = ("hr", "manager")[i] if i < 2 else self.rnd.choices(roles, weights)[0]
+                yield User(
+                    username=f"{self.prefix}_{i:07d}", email=f"{self.prefix}{i}@example.com",
+                    password=hashed, role=role, is_staff=role != "employee", date_joined=now,
+                )
+
+        count = self.bulk_insert(User, rows())
+        users = {role: [] for role in roles}
+        for pk, role in User.objects.filter(username__startswith=f"{self.prefix}_").order_by("id").values_list("id", "role").iterator():
+            users[role].append(pk)
+        return users, count
+
+    def create_permissions(self, users, sections):
+        def rows():
+            for role, ids in users.items():
+                for user_id in ids:
+                    granted = sections if role != "employee" else self.rnd.sample(sections, min(len(sections), self.rnd.randint(1, 3)))
+                    for section_id in granted:
+                        yield UserSectionPermission(user_id=user_id, section_id=section_id)
+
+        return None, self.bulk_insert(UserSectionPermission, rows())
+
+    def create_forms(self, n, sections):
+        categories = ["عام", "مالي", "إداري", "فني"]
+
+        def rows():
+            for i in range(n):
+                serial = f"{self.prefix.upper()}-{i:05d}"
+                # bulk_create لا يمر بـ FormModel.save: البصمة تُحسب هنا
+                pdf = ContentFile(placeholder_pdf(serial))
+                file_hash = content_hash(pdf)
+                pdf.seek(0)
+                name = default_storage.save(f"forms/{serial}.pdf", pdf)
+                yield FormModel(
+                    section_id=self.rnd.choice(sections), serial_number=serial,
+                    name_ar=f"نموذج {serial}", name_en=f"Form {serial}",
+                    category=self.rnd.choice(categories), description=f"Generated form {serial}",
+                    file=name, file_hash=file_hash,
+                )
+
+        return None, self.bulk_insert(FormModel, rows())
+
+    def create_notifications(self, users, opts):
+        all_users = [pk for ids in users.values() for pk in ids]
+        created_field = Notification._meta.get_field("created_at")
+        titles = [f"{self.prefix} notification {i}" for i in range(opts["notifications"])]
+
+        with explicit_timestamps(created_field):
+            self.bulk_insert(Notification, (
+                Notification(
+                    title=title, message="lorem ipsum dolor sit amet " * self.rnd.randint(2, 20),
+                    importance=self.rnd.choices(["normal", "important"], [85, 15])[0],
+                    created_at=self.random_time(),
+                )
+                for title in titles
+            ))
+        notification_ids = list(Notification.objects.filter(title__in=titles).order_by("id").values_list("id", flat=True))
+
+        read_ratio = opts["read_ratio"]
+
+        def rows():
+            for notification_id in notification_ids:
+                if self.rnd.random() < opts["broadcast_ratio"]:
+                    recipients = all_users
+                else:
+                    recipients = self.rnd.sample(all_users, min(len(all_users), opts["targeted_size"]))
+                for user_id in recipients:
+                    yield UserNotification(
+                        user_id=user_id, notification_id=notification_id,
+                        is_read=self.rnd.random() < read_ratio,
+                    )
+
+        count = len(notification_ids) + self.bulk_insert(UserNotification, rows())
+        # bulk_create يتجاوز عدّادات الوصول (core/counters.py)
+        recount(Notification.objects.filter(pk__in=notification_ids))
+        return None, count
+
+    def create_complaints(self, users, opts):
+        senders = users["employee"] or [pk for ids in users.values() for pk in ids]
+        responders = {"hr": users["hr"] or senders, "manager": users["manager"] or senders}
+        created_field = Complaint._meta.get_field("created_at")
+
+        def rows():
+            for i in range(opts["complaints"]):
+                recipient_type = self.rnd.choice(["hr", "manager"])
+                created_at = self.random_time()
+                complaint = Complaint(
+                    sender_id=self.rnd.choice(senders), recipient_type=recipient_type,
+                    title=f"{self.prefix} complaint {i}",
+                    message="lorem ipsum dolor sit amet " * self.rnd.randint(3, 40),
+                    created_at=created_at, is_seen_by_employee=True,
+                    is_seen_by_recipient=self.rnd.random() < 0.8,
+                )
+                if self.rnd.random() < opts["reply_ratio"]:
+                    complaint.response = "reply " * self.rnd.randint(3, 30)
+                    complaint.is_responded = True
+                    complaint.responded_by_id = self.rnd.choice(responders[recipient_type])
+                    complaint.responded_at = created_at + timedelta(hours=self.rnd.randint(1, 24 * 14))
+                    complaint.is_seen_by_recipient = True
+                    complaint.is_seen_by_employee = self.rnd.random() < 0.7
+                yield complaint
+
+        with explicit_timestamps(created_field):
+            return None, self.bulk_insert(Complaint, rows())
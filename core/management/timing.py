@@ -0,0 +1,30 @@
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+class PhaseTimingMixin:
+    """
+    قياس مراحل أمر الإدارة: الزمن وعدد الاستعلامات لكل مرحلة في self.timings
+    (تطبع مع --verbosity 2، ويقرؤها bench/imports.py).
+    """
+
+    @contextmanager
+    def phase(self, name):
+        if not hasattr(self, "timings"):
+            self.timings = []
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        t0 = time.perf_counter()
+        with connection.execute_wrapper(count):
+            yield
+        elapsed = time.perf_counter() - t0
+        self.timings.append({"phase": name, "seconds": round(elapsed, 4), "queries": queries})
+        if getattr(self, "verbosity", 1) >= 2:
+            self.stdout.write(f"⏱️  {name}: {elapsed:.3f}s, {queries} queries")
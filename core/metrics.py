@@ -0,0 +1,256 @@
+"""
+📈 مقاييس Prometheus لكل مسار (اسم الـ URL المحلول): عدد الطلبات، زمنها، عدد/زمن الاستعلامات،
+وحجم الاستجابة. مع gunicorn تُجمع عبر العمّال بمجمّع prometheus_client متعدد العمليات
+(ملفات mmap في PROMETHEUS_MULTIPROC_DIR، انظر gunicorn.conf.py) وتُعرض على /metrics.
+"""
+import contextvars
+import hmac
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.exceptions import AuthenticationFailed
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route', ['route', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route', ['route', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'DB queries per request by route', ['route'],
+    buckets=QUERY_BUCKETS,
+)
+DB_TIME = Histogram(
+    'http_request_db_seconds', 'DB time per request by route', ['route'],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    'http_response_bytes', 'Response body size by route', ['route'],
+    buckets=BYTES_BUCKETS,
+)
+
+# 🏊 تجمع اتصالات Postgres (psycopg_pool): تُقرأ إحصاءاته كل FLUSH_SECONDS من خيط المقاييس الجانبي
+POOL_SIZE = Gauge('db_pool_connections', 'Open pooled connections', ['alias'], multiprocess_mode='livesum')
+POOL_AVAILABLE = Gauge('db_pool_available', 'Idle pooled connections', ['alias'], multiprocess_mode='livesum')
+POOL_WAITING = Gauge('db_pool_waiting', 'Requests waiting for a connection', ['alias'], multiprocess_mode='livesum')
+POOL_CHECKOUTS = Counter('db_pool_checkouts_total', 'Connections handed out by the pool', ['alias'])
+POOL_WAIT = Counter('db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection', ['alias'])
+POOL_TIMEOUTS = Counter('db_pool_timeouts_total', 'Checkouts that timed out or failed', ['alias'])
+POOL_LOST = Counter('db_pool_connections_lost_total', 'Broken connections found by checks or on return', ['alias'])
+
+
+def record_pool_stats():
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        # pop_stats يعيد العدادات منذ آخر قراءة ويصفّرها
+        stats = pool.pop_stats()
+        POOL_SIZE.labels(alias).set(stats.get('pool_size', 0))
+        POOL_AVAILABLE.labels(alias).set(stats.get('pool_available', 0))
+        POOL_WAITING.labels(alias).set(stats.get('requests_waiting', 0))
+        POOL_CHECKOUTS.labels(alias).inc(stats.get('requests_num', 0))
+        POOL_WAIT.labels(alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+        POOL_TIMEOUTS.labels(alias).inc(stats.get('requests_errors', 0))
+        POOL_LOST.labels(alias).inc(stats.get('connections_lost', 0) + stats.get('returns_bad', 0))
+
+
+# 🔌 أغلفة استعلامات الطلب الحالي (Metrics/Profiling/SlowQuery) في contextvar بدل
+# connection.execute_wrapper: ينتقل مع الطلب إلى خيوط sync_to_async تحت ASGI بلا قفزة خيط لتثبيته،
+# ولا يلمس الاتصال (Local) في كل طلب. run_query_wrappers مثبّت مرة واحدة على كل اتصال.
+_query_wrappers = contextvars.ContextVar('query_wrappers', default=())
+
+
+def run_query_wrappers(execute, sql, params, many, context):
+    for wrapper in reversed(_query_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_wrappers(sender, connection, **kwargs):
+    if run_query_wrappers not in connection.execute_wrappers:
+        connection.execute_wrappers.append(run_query_wrappers)
+
+
+@contextmanager
+def query_wrapper(wrapper):
+    """مثل connection.execute_wrapper لكل استعلامات الطلب الحالي (sync أو async)."""
+    token = _query_wrappers.set(_query_wrappers.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        _query_wrappers.reset(token)
+
+
+def query_counter(db):
+    """غلاف execute يجمع [عدد الاستعلامات، زمنها] في db."""
+    def count(execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            db[0] += 1
+            db[1] += time.perf_counter() - t0
+    return count
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+# ⏱️ الطلب يضيف صفًا إلى _pending فقط (deque.append آمن بين الخيوط)؛ تحديث الـ histograms
+# (قفل لكل قيمة، وكتابة mmap مع المجمّع متعدد العمليات) يتم في خيط جانبي كل FLUSH_SECONDS
+FLUSH_SECONDS = 1.0
+_pending = deque()
+_children = {}
+_flusher = {'pid': None}
+_flush_lock = threading.Lock()
+
+
+def children(route, method, status):
+    # labels() يتحقق ويقفل في كل استدعاء؛ نخزّن الأبناء لكل تركيبة تسميات
+    key = (route, method, status)
+    found = _children.get(key)
+    if found is None:
+        found = _children[key] = (
+            REQUESTS.labels(route, method, status),
+            LATENCY.labels(route, method),
+            DB_QUERIES.labels(route),
+            DB_TIME.labels(route),
+            RESPONSE_BYTES.labels(route),
+        )
+    return found
+
+
+def flush():
+    """ينقل القياسات المعلّقة إلى مقاييس Prometheus (الخيط الجانبي، و/metrics، وworker_exit)."""
+    with _flush_lock:
+        while _pending:
+            route, method, status, elapsed, queries, db_time, size = _pending.popleft()
+            requests_total, latency, db_queries, db_seconds, response_bytes = children(route, method, status)
+            requests_total.inc()
+            latency.observe(elapsed)
+            db_queries.observe(queries)
+            db_seconds.observe(db_time)
+            if size is not None:
+                response_bytes.observe(size)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        try:
+            flush()
+            record_pool_stats()
+        except Exception:
+            pass  # المقاييس لا تُسقط العامل
+
+
+def ensure_flusher():
+    # بعد fork (عمّال gunicorn) لا ينتقل الخيط: خيط لكل عملية
+    pid = os.getpid()
+    if _flusher['pid'] != pid:
+        with _flush_lock:
+            if _flusher['pid'] != pid:
+                _flusher['pid'] = pid
+                threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+def response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    return None
+
+
+class MetricsMiddleware:
+    """
+    يُوضع أول MIDDLEWARE كي يقيس الطلب كاملًا. sync وasync (تحت ASGI لا يُحوَّل إلى خيط).
+    كلفته في مسار الطلب: مؤقّتان وcontextvar وإلحاق صف؛ المقاييس تُحدَّث في الخيط الجانبي.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        ensure_flusher()
+        db = [0, 0.0]
+        start = time.perf_counter()
+        with query_wrapper(query_counter(db)):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, db)
+        return response
+
+    async def __acall__(self, request):
+        ensure_flusher()
+        db = [0, 0.0]
+        start = time.perf_counter()
+        with query_wrapper(query_counter(db)):
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, db)
+        return response
+
+    @staticmethod
+    def record(request, response, elapsed, db):
+        _pending.append((
+            route_name(request), request.method, response.status_code, elapsed, db[0], db[1],
+            response_size(response),
+        ))
+
+
+def metrics_view(request):
+    """
+    GET /metrics — محمي بـ METRICS_TOKEN (Authorization: Bearer <token>)،
+    وإن لم يُضبط فللمستخدمين staff فقط (JWT).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(header, f'Bearer {token}'):
+            return HttpResponseForbidden('Forbidden')
+    else:
+        from .authentication import ClaimsJWTAuthentication
+        try:
+            result = ClaimsJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            result = None
+        if not result or not result[0].is_staff:
+            return HttpResponseForbidden('Forbidden')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    flush()
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:41
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# فهارس البحث بالبادئة في دليل المستخدمين: lower(col) LIKE 'abc%'
+# على Postgres نحتاج text_pattern_ops كي يُستخدم الفهرس مع LIKE تحت أي collation، وIndex لا يقبل
+# opclasses مع التعابير إلا بـ OpClass الخاص بـ Postgres (يكسر SQLite): الحالة من CustomUser.Meta.indexes
+# والـ SQL هنا حسب قاعدة البيانات.
+PREFIX_INDEXES = [
+    ('core_user_username_prefix', 'username'),
+    ('core_user_email_prefix', 'email'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    opclass = ' text_pattern_ops' if schema_editor.connection.vendor == 'postgresql' else ''
+    for name, column in PREFIX_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON core_customuser ((lower({column})){opclass})'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    for name, _ in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_bootstrapstep'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(create_indexes, drop_indexes)],
+            state_operations=[
+                migrations.AddIndex(model_name='customuser', index=models.Index(Lower(column), name=name))
+                for name, column in PREFIX_INDEXES
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_slowquery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvalidationVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=30)),
+                ('key', models.CharField(max_length=200)),
+                ('version', models.BigIntegerField(db_index=True)),
+                ('origin', models.CharField(blank=True, max_length=40)),
+            ],
+            options={
+                'unique_together': {('channel', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:12
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def backfill(apps, schema_editor):
+    # آخر تغيير معروف بدل وقت الترحيل (UserNotification لا تاريخ لها: يبقى وقت الترحيل)
+    Notification = apps.get_model('core', 'Notification')
+    Complaint = apps.get_model('core', 'Complaint')
+    Notification.objects.update(updated_at=models.F('created_at'))
+    Complaint.objects.update(updated_at=Coalesce('responded_at', 'created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='usernotification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['recipient_type', 'updated_at', 'id'], name='core_complaint_box_changed'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['sender', 'updated_at', 'id'], name='core_complaint_sender_changed'),
+        ),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='core_usernotif_user_changed'),
+        ),
+    ]
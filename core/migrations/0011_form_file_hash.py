@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:16
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def file_hash(field_file):
+    # نسخة ثابتة من core.form_files.file_hash: المايغريشن لا يستورد كود التطبيق الذي قد يتغير لاحقًا
+    try:
+        field_file.open('rb')
+    except OSError:
+        return ''
+    try:
+        digest = hashlib.blake2b(digest_size=8)
+        for chunk in iter(lambda: field_file.read(64 * 1024), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+    finally:
+        field_file.close()
+
+
+def backfill(apps, schema_editor):
+    # بصمات الملفات الموجودة؛ الملف المفقود يبقى بلا بصمة (رابط MEDIA العادي)
+    FormModel = apps.get_model('core', 'FormModel')
+    for form in FormModel.objects.exclude(file='').only('file').iterator():
+        FormModel.objects.filter(pk=form.pk).update(file_hash=file_hash(form.file))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formmodel',
+            name='file_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
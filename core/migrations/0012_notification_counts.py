@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    # = core.counters.recount على النماذج التاريخية
+    Notification = apps.get_model('core', 'Notification')
+    UserNotification = apps.get_model('core', 'UserNotification')
+    rows = UserNotification.objects.filter(notification=OuterRef('pk')).order_by().values('notification')
+    Notification.objects.update(
+        recipients_count=Coalesce(Subquery(rows.annotate(n=Count('pk')).values('n')), 0),
+        read_count=Coalesce(Subquery(rows.filter(is_read=True).annotate(n=Count('pk')).values('n')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_form_file_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='read_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recipients_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
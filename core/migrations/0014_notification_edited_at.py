@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:01
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill(apps, schema_editor):
+    # بدون هذا تأخذ كل الإشعارات وقت المايغريشن فتُعاد في ?since= لكل الصناديق مرة
+    Notification = apps.get_model('core', 'Notification')
+    Notification.objects.update(edited_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_user_claims_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='edited_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
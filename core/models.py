@@ -1,7 +1,12 @@
+import secrets
+
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 
+from .form_files import file_hash
+
 class CustomUser(AbstractUser):
     ROLE_CHOICES = [
         ('manager', 'Management'),
@@ -9,10 +14,29 @@ class CustomUser(AbstractUser):
         ('employee', 'Employee'),
     ]
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='employee')
+    # 🔑 يتغير مع كل حفظ (إلا last_login وحده): التوكنات الصادرة قبله تُقرأ حقولها من قاعدة البيانات
+    # (core/authentication.py). update() لا يغيّره، فتعطيل/ترقية جماعية تتم عبر save()
+    claims_version = models.IntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        # 🔎 البحث بالبادئة في دليل المستخدمين: lower(col) LIKE 'abc%'
+        # على Postgres تُنشأ بـ text_pattern_ops (core/migrations/0004_user_directory_prefix_indexes.py)
+        indexes = [
+            models.Index(Lower('username'), name='core_user_username_prefix'),
+            models.Index(Lower('email'), name='core_user_email_prefix'),
+        ]
 
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) - {'last_login', 'claims_version'}:
+            self.claims_version = secrets.randbits(31)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'claims_version'}
+        super().save(*args, **kwargs)
+
 
 class Section(models.Model):
     name_ar = models.CharField(max_length=100)
@@ -29,10 +53,23 @@ class FormModel(models.Model):
     category = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     file = models.FileField(upload_to='forms/') 
+    # 🔖 بصمة محتوى الملف في رابطه الثابت (core/form_files.py)
+    file_hash = models.CharField(max_length=32, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.name_ar} ({self.serial_number})"
 
+    def save(self, *args, **kwargs):
+        # ملف جديد (اسم مختلف عن المحفوظ) → بصمة جديدة → رابط جديد
+        if not self.file:
+            self.file_hash = ''
+        elif not self.file_hash or not FormModel.objects.filter(pk=self.pk, file=self.file.name).exists():
+            self.file_hash = file_hash(self.file)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'file' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'file_hash'}
+        super().save(*args, **kwargs)
+
 class UserSectionPermission(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     section = models.ForeignKey(Section, on_delete=models.CASCADE)
@@ -50,6 +87,17 @@ class Notification(models.Model):
     message = models.TextField()
     importance = models.CharField(max_length=10, choices=IMPORTANCE_CHOICES, default='normal')
     created_at = models.DateTimeField(auto_now_add=True)
+    # 🔄 للمزامنة التفاضلية ?since= (core/delta.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # ✏️ آخر حفظ للإشعار نفسه (العنوان/النص/الأهمية)؛ العدّادات تُحدَّث بـ update() فلا تلمسه.
+    # صندوق كل مستلم يقارنه بـ UserNotification.updated_at في ?since= بدل الكتابة في صفوف المستلمين
+    edited_at = models.DateTimeField(auto_now=True)
+    # 📈 عدد المستلمين ومن قرأ منهم، يُحدَّثان مع التوزيع والقراءة (core/counters.py)
+    recipients_count = models.PositiveIntegerField(default=0, editable=False)
+    read_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['-created_at'], name='core_notif_created_at')]
 
     def __str__(self):
         return self.title
@@ -58,9 +106,12 @@ class UserNotification(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     notification = models.ForeignKey(Notification, on_delete=models.CASCADE)
     is_read = models.BooleanField(default=False)
+    # يتغير مع is_read؛ تعديل الإشعار نفسه يظهر في المزامنة عبر Notification.edited_at (core/views.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('user', 'notification')
+        indexes = [models.Index(fields=['user', 'updated_at', 'id'], name='core_usernotif_user_changed')]
 
 
 from django.contrib.auth import get_user_model
@@ -85,6 +136,100 @@ class Complaint(models.Model):
     is_seen_by_recipient = models.BooleanField(default=False)  # for manager or HR
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # الرد والقراءة (is_seen_*) يحدّثانه؛ مع update()/update_fields يجب تمريره صراحةً
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # صناديق HR/الإدارة (recipient_type + الأحدث أولًا) وقائمة لوحة الإدارة/date_hierarchy
+        indexes = [
+            models.Index(fields=['recipient_type', '-created_at'], name='core_complaint_recipient_at'),
+            models.Index(fields=['-created_at'], name='core_complaint_created_at'),
+            # المزامنة التفاضلية لكل صندوق: (الصندوق، updated_at، id)
+            models.Index(fields=['recipient_type', 'updated_at', 'id'], name='core_complaint_box_changed'),
+            models.Index(fields=['sender', 'updated_at', 'id'], name='core_complaint_sender_changed'),
+        ]
+
+    def __str__(self):
+        return f"Complaint by {self.sender.username} to {self.recipient_type}"
+
+
+class BootstrapStep(models.Model):
+    """بصمة مدخلات كل خطوة إقلاع (migrate/import...) لتخطيها إن لم تتغير."""
+    name = models.CharField(max_length=50, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    duration_ms = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.fingerprint[:12]})"
+
+
+class SlowQuery(models.Model):
+    """شكل استعلام (بعد التطبيع) تجاوز SLOW_QUERY_MS، مع موضع استدعائه وخطة التنفيذ (EXPLAIN)."""
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField()
+    example_sql = models.TextField(blank=True)
+    view = models.CharField(max_length=200, blank=True)
+    call_site = models.CharField(max_length=300, blank=True)
+    explain = models.TextField(blank=True)
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.view or '-'}: {self.sql[:60]}"
+
+
+class InvalidationVersion(models.Model):
+    """ناقل الإبطال على SQLite: آخر رقم تسلسلي لكل (قناة، مفتاح)، يستطلعه كل عامل (core/invalidation.py)."""
+    channel = models.CharField(max_length=30)
+    key = models.CharField(max_length=200)
+    version = models.BigIntegerField(db_index=True)
+    origin = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        unique_together = ('channel', 'key')
+
+    def __str__(self):
+        return f"{self.channel}:{self.key} v{self.version}"
+
+
+class ReplicaHeartbeat(models.Model):
+    """صف واحد (pk=1) يُحدَّث على الأساسية ويُقرأ من نسخ القراءة لقياس تأخرها (core/db_router.py)."""
+    beat = models.FloatField()
+
+    def __str__(self):
+        return f"heartbeat {self.beat}"
+
+
+class Job(models.Model):
+    """مهمة خلفية في طابور قاعدة البيانات (core/jobs.py)، يُنفّذها: python manage.py run_jobs"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'], name='core_job_status_run_at')]
 
     def __str__(self):
-        return f"Complaint by {self.sender.username} to {self.recipient_type}"
\ No newline at end of file
+        return f"{self.kind} #{self.pk} ({self.status})"
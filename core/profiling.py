@@ -0,0 +1,218 @@
+"""
+🔬 مُعايِن عيّنات عند الطلب: يلتقط مكدس خيط الطلب كل بضعة ميلي ثوانٍ أثناء تنفيذ العرض،
+ويحفظ النتيجة بصيغة folded (متوافقة مع flamegraph.pl / speedscope) مع استعلامات SQL المنفّذة.
+
+التفعيل:
+  - PROFILING_ENABLED=True (وإلا يُزال الـ middleware من السلسلة كليًا: كلفة صفرية)
+  - طلب من مستخدم staff يحمل ترويسة X-Profile: 1
+  - أو عيّنة عشوائية بنسبة PROFILE_SAMPLE_RATE من كل الطلبات
+قائمة الملفات الأخيرة: /admin/profiles/
+"""
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from rest_framework.exceptions import AuthenticationFailed
+
+from .metrics import query_wrapper
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+
+def profile_dir():
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class StackSampler:
+    """
+    خيط جانبي يقرأ sys._current_frames() لخيوط الطلب ويعدّ المكدسات (folded).
+    تحت ASGI: خيط حلقة الأحداث (قد تظهر فيه طلبات أخرى متزامنة) وخيط الـ sync الخاص بالطلب.
+    """
+
+    def __init__(self, thread_ids, interval):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in self.thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common()) + '\n'
+
+
+def query_recorder(queries):
+    def record(execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            queries.append({'sql': sql, 'ms': round((time.perf_counter() - t0) * 1000, 3)})
+    return record
+
+
+def is_staff_request(request):
+    from .authentication import ClaimsJWTAuthentication
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        result = None
+    user = result[0] if result else getattr(request, 'user', None)
+    return bool(user is not None and user.is_staff)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+        self.interval = settings.PROFILE_INTERVAL_MS / 1000
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        queries = []
+        sampler = StackSampler([threading.get_ident()], self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            with query_wrapper(query_recorder(queries)):
+                response = self.get_response(request)
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - start
+
+        save_profile(request, response, elapsed, sampler, queries)
+        return response
+
+    async def __acall__(self, request):
+        if request.META.get(PROFILE_HEADER) == '1':
+            profile = await sync_to_async(is_staff_request)(request)
+        else:
+            profile = self.should_sample()
+        if not profile:
+            return await self.get_response(request)
+
+        queries = []
+        sync_thread = await sync_to_async(threading.get_ident)()
+        sampler = StackSampler([threading.get_ident(), sync_thread], self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            with query_wrapper(query_recorder(queries)):
+                response = await self.get_response(request)
+        finally:
+            await sync_to_async(sampler.stop, thread_sensitive=False)()
+        elapsed = time.perf_counter() - start
+
+        await sync_to_async(save_profile, thread_sensitive=False)(request, response, elapsed, sampler, queries)
+        return response
+
+    def should_profile(self, request):
+        if request.META.get(PROFILE_HEADER) == '1':
+            return is_staff_request(request)
+        return self.should_sample()
+
+    def should_sample(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+
+def save_profile(request, response, elapsed, sampler, queries):
+    match = getattr(request, 'resolver_match', None)
+    route = (match.view_name if match else None) or 'unmatched'
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', route)}"
+    base = profile_dir()
+
+    (base / f'{name}.folded').write_text(sampler.folded(), encoding='utf-8')
+    (base / f'{name}.json').write_text(json.dumps({
+        'route': route,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'duration_ms': round(elapsed * 1000, 3),
+        'samples': sum(sampler.stacks.values()),
+        'interval_ms': sampler.interval * 1000,
+        'queries': queries,
+    }, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    # الاحتفاظ بآخر PROFILE_KEEP فقط
+    metas = sorted(base.glob('*.json'))
+    for old in metas[:-settings.PROFILE_KEEP]:
+        old.unlink(missing_ok=True)
+        old.with_suffix('.folded').unlink(missing_ok=True)
+
+
+# 📋 صفحة إدارية بآخر الملفات
+@staff_member_required
+def profile_list(request):
+    profiles = []
+    for meta_path in sorted(profile_dir().glob('*.json'), reverse=True):
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        queries = meta.pop('queries', [])
+        meta['name'] = meta_path.stem
+        meta['query_count'] = len(queries)
+        meta['sql_ms'] = round(sum(q['ms'] for q in queries), 3)
+        profiles.append(meta)
+    return render(request, 'core/profiles.html', {
+        'profiles': profiles,
+        'title': 'Request profiles',
+        'enabled': getattr(settings, 'PROFILING_ENABLED', False),
+        'sample_rate': getattr(settings, 'PROFILE_SAMPLE_RATE', 0),
+    })
+
+
+@staff_member_required
+def profile_download(request, name, kind):
+    if not re.fullmatch(r'[A-Za-z0-9_.-]+', name) or kind not in ('folded', 'json'):
+        raise Http404
+    path = profile_dir() / f'{name}.{kind}'
+    if not path.exists():
+        raise Http404
+    content_type = 'application/json' if kind == 'json' else 'text/plain; charset=utf-8'
+    return FileResponse(open(path, 'rb'), content_type=content_type, as_attachment=kind == 'folded',
+                        filename=path.name)
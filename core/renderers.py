@@ -0,0 +1,61 @@
+"""
+⚡ JSON أسرع للـ API عبر orjson (مكتبة C) بنفس بايتات JSONRenderer/JSONParser في DRF:
+
+  - مضغوط، UTF-8 بلا هروب للأحرف العربية، و\\u2028/\\u2029 مهرّبة كما في DRF
+  - التواريخ والأوقات والـ Decimal وغيرها تمر على JSONEncoder الخاص بـ DRF (نفس التنسيق: ...Z)
+  - طلب indent (الواجهة القابلة للتصفح أو Accept: application/json; indent=4) أو قيمة لا يدعمها
+    orjson (عدد أكبر من 64 بت) → نعود إلى مُرمِّز DRF العادي
+
+orjson اختياري: بدونه يعمل الصنفان تمامًا كأصليهما.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders, json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_default = encoders.JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact \
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        data = stream.read()
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+        # نفس رسائل الخطأ السابقة (وأعداد أكبر من 64 بت يرفضها orjson)
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.loads(data.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
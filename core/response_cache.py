@@ -0,0 +1,232 @@
+"""
+🗄️ كاش الاستجابات للقراءات المتكررة (list/retrieve وصناديق الشكاوى والإشعارات).
+
+المفتاح = العرض + المستخدم (إن كانت الاستجابة خاصة به) + معاملات الاستعلام + "أجيال" النطاقات
+التي تعتمد عليها الاستجابة. الإبطال لا يحذف مفاتيح (غير ممكن بنمط على locmem/file) بل يزيد جيل
+النطاق، فتصبح كل المفاتيح القديمة يتيمة وتنتهي بـ RESPONSE_CACHE_TTL.
+ما يُخزَّن يُحسب من قاعدة البيانات الأساسية دائمًا، لا من نسخ القراءة (core/db_router.py).
+
+النطاقات نصوص مثل 'forms' أو 'inbox:{user}' ({user} = id المستخدم الحالي)، وتُبطل من
+core/signals.py عند حفظ/حذف النماذج، ويدويًا بعد update()/bulk_create التي لا تطلق إشارات.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+from rest_framework.response import Response
+
+from .db_router import primary_reads
+from .invalidation import publish
+
+KEY_PREFIX = 'resp'
+# ?since= (core/delta.py): token مختلف لكل عميل وكل استطلاع، تخزينه يملأ الكاش فقط
+UNCACHED_PARAMS = ('since',)
+GEN_PREFIX = 'gen'
+
+
+def cache_ttl():
+    return getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+
+
+def is_process_local():
+    return isinstance(caches['default'], LocMemCache)
+
+
+def _gen_keys(scopes):
+    return [f'{GEN_PREFIX}:{s}' for s in scopes]
+
+
+def _new_gen():
+    # جيل جديد لا يتكرر حتى لو طُرد المفتاح من الكاش وأعيد إنشاؤه
+    return time.time_ns()
+
+
+def generations(scopes):
+    keys = _gen_keys(scopes)
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_gen(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[k] for k in keys]
+
+
+async def agenerations(scopes):
+    keys = _gen_keys(scopes)
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, _new_gen(), timeout=None)
+            found[key] = await cache.aget(key)
+    return [found[k] for k in keys]
+
+
+def bump(scopes):
+    """يزيد أجيال النطاقات. None = مسح الكاش كله (locmem فقط، بعد انقطاع ناقل الإبطال)."""
+    if scopes is None:
+        cache.clear()
+        return
+    for key in _gen_keys(scopes):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_gen(), timeout=None)
+
+
+def bump_everywhere(scopes):
+    bump(scopes)
+    # locmem خاص بكل عملية: بقية العمّال يُبلَّغون عبر الناقل (الكاش المشترك يكفيه bump واحد)
+    if is_process_local():
+        for scope in scopes:
+            publish('scope', scope)
+
+
+def bump_from_bus(scope):
+    """معالج أحداث 'scope' من عمّال آخرين (core/invalidation.py)؛ الكاش المشترك لا يحتاج شيئًا."""
+    if is_process_local():
+        bump(None if scope is None else [scope])
+
+
+def invalidate(*scopes):
+    """
+    يبطل النطاقات بعد الـ commit (وإلا قد يعيد قارئ متزامن تخزين البيانات القديمة بالجيل الجديد).
+    داخل معاملة تُجمع النطاقات وتُبطل مرة واحدة: استيراد آلاف الصفوف = زيادة واحدة لكل نطاق.
+    """
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        bump_everywhere(scopes)
+        return
+
+    pending = getattr(conn, 'pending_cache_scopes', None)
+    if pending is None or not any(entry[1] is pending[1] for entry in conn.run_on_commit):
+        scopes_set = set()
+
+        def flush():
+            conn.pending_cache_scopes = None
+            bump_everywhere(scopes_set)
+
+        pending = conn.pending_cache_scopes = (scopes_set, flush)
+        transaction.on_commit(flush)
+    pending[0].update(scopes)
+
+
+def _resolve(scopes, request):
+    user_id = getattr(request.user, 'pk', None)
+    return [s.format(user=user_id) for s in scopes]
+
+
+def _key(view_id, request, scopes, per_user, kwargs, gens):
+    params = sorted((k, request.GET.getlist(k)) for k in request.GET)
+    # المضيف جزء من المفتاح: روابط الملفات في FormModelSerializer مطلقة (build_absolute_uri)
+    raw = repr((request.get_host(), params, sorted(kwargs.items()), gens))
+    user = request.user.pk if per_user else '-'
+    return f'{KEY_PREFIX}:{view_id}:{user}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+
+def _pack(response):
+    if response.status_code != 200:
+        return None
+    if isinstance(response, Response):
+        return ('data', response.data)
+    if isinstance(response, HttpResponse):
+        return ('raw', response['Content-Type'], response.content)
+    return None  # streaming وغيرها لا تُخزَّن
+
+
+def _unpack(entry, key):
+    if entry[0] == 'data':
+        response = Response(entry[1])
+    else:
+        response = HttpResponse(entry[2], content_type=entry[1])
+    response['X-Cache'] = 'HIT'
+    # core/compression.py يعيد استخدام الجسم المضغوط المخزّن لنفس المفتاح
+    response.cache_key = key
+    return response
+
+
+def _mark_miss(response, key):
+    response['X-Cache'] = 'MISS'
+    response.cache_key = key
+    return response
+
+
+def cached_call(view_id, request, scopes, per_user, kwargs, compute):
+    """يعيد الاستجابة من الكاش أو يحسبها (compute) ويخزّنها إن كانت 200."""
+    ttl = cache_ttl()
+    if ttl <= 0 or request.method != 'GET' or any(p in request.GET for p in UNCACHED_PARAMS):
+        return compute()
+    resolved = _resolve(scopes, request)
+    key = _key(view_id, request, resolved, per_user, kwargs, generations(resolved))
+    entry = cache.get(key)
+    if entry is not None:
+        return _unpack(entry, key)
+    with primary_reads():
+        response = compute()
+    packed = _pack(response)
+    if packed is not None:
+        cache.set(key, packed, ttl)
+        _mark_miss(response, key)
+    return response
+
+
+def cache_response(*scopes, per_user=False):
+    """
+    مزخرف لعروض DRF (دالة @api_view أو action داخل ViewSet) وللعروض async التي تعيد HttpResponse.
+    يُوضع بعد مزخرفات المصادقة (request.user جاهز). وجود {user} في نطاق يجعل الكاش خاصًا بالمستخدم.
+    """
+    per_user = per_user or any('{user}' in s for s in scopes)
+
+    def decorator(view):
+        view_id = view.__qualname__
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                ttl = cache_ttl()
+                if ttl <= 0 or request.method != 'GET' or any(p in request.GET for p in UNCACHED_PARAMS):
+                    return await view(request, *args, **kwargs)
+                resolved = _resolve(scopes, request)
+                key = _key(view_id, request, resolved, per_user, kwargs, await agenerations(resolved))
+                entry = await cache.aget(key)
+                if entry is not None:
+                    return _unpack(entry, key)
+                with primary_reads():
+                    response = await view(request, *args, **kwargs)
+                packed = _pack(response)
+                if packed is not None:
+                    await cache.aset(key, packed, ttl)
+                    _mark_miss(response, key)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # دالة عرض: (request, ...) — action: (self, request, ...)
+            request = args[0] if isinstance(args[0], HttpRequest) or hasattr(args[0], 'query_params') else args[1]
+            return cached_call(view_id, request, scopes, per_user, kwargs, lambda: view(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+class CachedReadMixin:
+    """يضيف الكاش إلى list/retrieve في ViewSet. cache_scopes كما في cache_response."""
+    cache_scopes = ()
+    cache_per_user = False
+
+    def _cached(self, action, request, *args, **kwargs):
+        per_user = self.cache_per_user or any('{user}' in s for s in self.cache_scopes)
+        compute = lambda: getattr(super(CachedReadMixin, self), action)(request, *args, **kwargs)
+        return cached_call(f'{type(self).__qualname__}.{action}', request, self.cache_scopes, per_user,
+                           kwargs, compute)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached('list', request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached('retrieve', request, *args, **kwargs)
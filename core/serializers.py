@@ -1,28 +1,54 @@
+from operator import itemgetter
+
 from rest_framework import serializers
 from .models import Section, FormModel
 from .models import Notification, UserNotification
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .models import Complaint
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .models import Complaint, Job
+
+from .authentication import ClaimsRefreshToken, token_claims
+from .fieldsets import SparseFieldsSerializerMixin
+from .form_files import form_file_url
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
 
-        # نضيف معلومات إضافية داخل التوكن
-        token['username'] = user.username
-        token['is_staff'] = user.is_staff
-        token['is_superuser'] = user.is_superuser
+        # نضيف معلومات إضافية داخل التوكن: تكفي لبناء المستخدم دون استعلام (انظر core/authentication.py)
+        for claim, value in token_claims(user).items():
+            token[claim] = value
 
         return token
-    
-class SectionSerializer(serializers.ModelSerializer):
+
+
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    simplejwt ينسخ حقول الـ refresh كما هي إلى الـ access الجديد، فمستخدم خُفّضت صلاحياته أو عُطّل
+    كان يحتفظ بها طوال عمر الـ refresh. التحقق والتدوير والـ blacklist من simplejwt كما هي،
+    وClaimsRefreshToken يبني حقول الـ access من صف المستخدم الحالي مع كل تجديد.
+    """
+
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        try:
+            return super().validate(attrs)
+        except get_user_model().DoesNotExist as e:
+            # مستخدم حُذف بعد إصدار الـ refresh: 401 كالمعطّل لا 500
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account') from e
+
+
+class SectionSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Section
         fields = ['id', 'name_ar', 'name_en']
 
-class FormModelSerializer(serializers.ModelSerializer):
+class FormModelSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     section = SectionSerializer(read_only=True)
+    file = serializers.SerializerMethodField()
 
     class Meta:
         model = FormModel
@@ -31,14 +57,29 @@ class FormModelSerializer(serializers.ModelSerializer):
             'category', 'description', 'file', 'section'
         ]
 
+    def get_file(self, form):
+        return form_file_url(form.file.storage, form.pk, form.file.name, form.file_hash, self.context.get('request'))
 
-class NotificationSerializer(serializers.ModelSerializer):
+
+class NotificationSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     importance_display = serializers.CharField(source='get_importance_display', read_only=True)
 
     class Meta:
         model = Notification
         fields = ['id', 'title', 'message', 'importance', 'importance_display', 'created_at']
 
+
+class NotificationStatsSerializer(NotificationSerializer):
+    """
+    مع عدّادات الوصول (core/counters.py): لـ NotificationViewSet فقط. الصندوق الوارد لا يعرضها،
+    فقراءة مستخدم لا تُبطل صناديق الآخرين.
+    """
+
+    class Meta(NotificationSerializer.Meta):
+        fields = NotificationSerializer.Meta.fields + ['recipients_count', 'read_count']
+        read_only_fields = ['recipients_count', 'read_count']
+
+
 class UserNotificationSerializer(serializers.ModelSerializer):
     notification = NotificationSerializer()
 
@@ -66,4 +107,131 @@ class ComplaintSerializer(serializers.ModelSerializer):
         ]
 
     def get_recipient_display(self, obj):
-        return obj.get_recipient_type_display()
\ No newline at end of file
+        return obj.get_recipient_type_display()
+
+
+class JobSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'attempts', 'max_attempts', 'run_at',
+            'created_at', 'finished_at', 'last_error', 'result',
+        ]
+
+
+# ⚡ مسار قراءة سريع لقوائم الصناديق والكتالوج: قواميس مباشرة من صفوف values()
+#    (استعلام واحد بـ JOIN، بلا كائنات نماذج ولا حقول DRF) بنفس مخرجات الـ serializers أعلاه حرفيًا:
+#    نفس المفاتيح وترتيبها وتنسيق التواريخ. أي حقل يُضاف هناك يُضاف هنا أيضًا
+#    (python -m bench.serialization يتحقق من التطابق).
+class ValuesSerializer:
+    """
+    fields: {المفتاح: عمود | (عمود، تحويل) | ((أعمدة...)، تحويل) | {مفتاح متداخل: ...}} بترتيب المخرجات.
+    التحويل دالة على القيمة (أو على قيم الأعمدة بالترتيب)، أو اسم دالة في الصنف إن احتاجت السياق (request مثلًا).
+    selected (من ?fields/?omit، core/fieldsets.py) يحصر المفاتيح وأعمدة values() معًا.
+    """
+    fields = {}
+
+    def __init__(self, context=None, selected=None):
+        self.context = context or {}
+        names = list(self.fields) if selected is None else selected
+        self.values = []
+        self.plan = [(name, self.compile(self.fields[name])) for name in names]
+
+    def compile(self, spec):
+        if isinstance(spec, dict):
+            plan = [(name, self.compile(sub)) for name, sub in spec.items()]
+            return lambda row: {name: get(row) for name, get in plan}
+        column, convert = spec if isinstance(spec, tuple) else (spec, None)
+        columns = column if isinstance(column, tuple) else (column,)
+        for name in columns:
+            if name not in self.values:
+                self.values.append(name)
+        get = itemgetter(*columns)
+        if convert is None:
+            return get
+        if isinstance(convert, str):
+            convert = getattr(self, convert)
+        if len(columns) > 1:
+            return lambda row: convert(*get(row))
+        return lambda row: convert(get(row))
+
+    def to_dict(self, row):
+        return {name: get(row) for name, get in self.plan}
+
+    def serialize(self, qs):
+        return [self.to_dict(row) for row in qs.values(*self.values)]
+
+    async def aserialize(self, qs):
+        return [self.to_dict(row) async for row in qs.values(*self.values)]
+
+
+_datetime = serializers.DateTimeField().to_representation
+
+
+def _display(model, field):
+    """= get_<field>_display"""
+    choices = dict(model._meta.get_field(field).flatchoices)
+    return lambda value: choices.get(value, value)
+
+
+class FormModelValuesSerializer(ValuesSerializer):
+    """= FormModelSerializer(many=True)"""
+    fields = {
+        'id': 'id',
+        'serial_number': 'serial_number',
+        'name_ar': 'name_ar',
+        'name_en': 'name_en',
+        'category': 'category',
+        'description': 'description',
+        'file': (('id', 'file', 'file_hash'), 'file_url'),
+        'section': {
+            'id': 'section_id',
+            'name_ar': 'section__name_ar',
+            'name_en': 'section__name_en',
+        },
+    }
+
+    def __init__(self, context=None, selected=None):
+        self.storage = FormModel._meta.get_field('file').storage
+        self.request = (context or {}).get('request')
+        super().__init__(context, selected)
+
+    def file_url(self, pk, name, digest):
+        return form_file_url(self.storage, pk, name, digest, self.request)
+
+
+class UserNotificationValuesSerializer(ValuesSerializer):
+    """= UserNotificationSerializer(many=True)"""
+    fields = {
+        'id': 'id',
+        'notification': {
+            'id': 'notification_id',
+            'title': 'notification__title',
+            'message': 'notification__message',
+            'importance': 'notification__importance',
+            'importance_display': ('notification__importance', _display(Notification, 'importance')),
+            'created_at': ('notification__created_at', _datetime),
+        },
+        'is_read': 'is_read',
+    }
+
+
+class ComplaintValuesSerializer(ValuesSerializer):
+    """= ComplaintSerializer(many=True)"""
+    fields = {
+        'id': 'id',
+        'sender_username': 'sender__username',
+        'recipient_display': ('recipient_type', _display(Complaint, 'recipient_type')),
+        'is_seen_by_employee': 'is_seen_by_employee',
+        'is_seen_by_recipient': 'is_seen_by_recipient',
+        'recipient_type': 'recipient_type',
+        'title': 'title',
+        'message': 'message',
+        'response': 'response',
+        'is_responded': 'is_responded',
+        'responded_at': ('responded_at', _datetime),
+        'created_at': ('created_at', _datetime),
+        'updated_at': ('updated_at', _datetime),
+        'sender': 'sender_id',
+        'responded_by': 'responded_by_id',
+    }
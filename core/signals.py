@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .counters import add_counts
+from .invalidation import publish, subscribe
+from .models import Complaint, FormModel, Notification, Section, UserNotification, UserSectionPermission
+from .response_cache import bump_from_bus, invalidate
+
+User = get_user_model()
+
+
+# 🔐 أي تعديل على المستخدم (الدور، التعطيل، الحذف) يُبطل الكاش والحقول الموقّعة السابقة
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # مستخدم جديد لا كاش له في أي عامل
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_user(instance.pk)
+    publish('user', instance.pk)
+    # 'users': أسماء المرسلين داخل صناديق الشكاوى
+    invalidate(f'user:{instance.pk}', 'users')
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    publish('user', instance.pk)
+    invalidate(f'user:{instance.pk}', 'users')
+
+
+# 📡 أحداث العمّال الآخرين (core/invalidation.py)
+subscribe('user', invalidate_user)
+subscribe('scope', bump_from_bus)
+
+
+# 🗄️ إبطال كاش الاستجابات (core/response_cache.py) حسب النطاقات التي تعتمد عليها
+@receiver([post_save, post_delete], sender=Section)
+def section_changed(sender, instance, **kwargs):
+    invalidate('sections', 'forms')
+
+
+@receiver([post_save, post_delete], sender=FormModel)
+def form_changed(sender, instance, **kwargs):
+    invalidate('forms')
+
+
+@receiver([post_save, post_delete], sender=UserSectionPermission)
+def permission_changed(sender, instance, **kwargs):
+    invalidate(f'perms:{instance.user_id}')
+
+
+@receiver([post_save, post_delete], sender=Complaint)
+def complaint_changed(sender, instance, **kwargs):
+    invalidate(f'complaints:{instance.recipient_type}', f'complaints:sender:{instance.sender_id}')
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    invalidate('notifications')
+
+
+@receiver([post_save, post_delete], sender=UserNotification)
+def user_notification_changed(sender, instance, **kwargs):
+    invalidate(f'inbox:{instance.user_id}')
+
+
+# 📈 عدّادات الوصول (core/counters.py) لصف مفرد: إضافة من لوحة الإدارة، حذف مستخدم
+@receiver(post_save, sender=UserNotification)
+def user_notification_added(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        add_counts('recipients_count', {instance.notification_id: 1})
+        if instance.is_read:
+            add_counts('read_count', {instance.notification_id: 1})
+
+
+@receiver(post_delete, sender=UserNotification)
+def user_notification_removed(sender, instance, origin=None, **kwargs):
+    # حذف الإشعار نفسه يحذف صفوفه: لا معنى لإنقاص عدّاداته صفًا صفًا
+    if isinstance(origin, Notification) or getattr(origin, 'model', None) is Notification:
+        return
+    add_counts('recipients_count', {instance.notification_id: -1})
+    if instance.is_read:
+        add_counts('read_count', {instance.notification_id: -1})
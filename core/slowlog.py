@@ -0,0 +1,168 @@
+"""
+🐢 سجل الاستعلامات البطيئة: كل استعلام يتجاوز SLOW_QUERY_MS يُسجَّل مع العرض وموضع الاستدعاء
+(ملف:سطر داخل المشروع) في سجل دوّار (SLOW_QUERY_LOG)، ويُجمَّع حسب شكله المطبَّع في جدول SlowQuery.
+أول ظهور لكل شكل يُلتقط له EXPLAIN (أو EXPLAIN QUERY PLAN على SQLite) ويظهر في لوحة الإدارة.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .metrics import query_wrapper
+
+logger = logging.getLogger('core.slowlog')
+# ملفات الـ execute_wrapper نفسها لا تُعد موضع استدعاء
+INSTRUMENTATION_FILES = {'core/slowlog.py', 'core/metrics.py', 'core/profiling.py', 'bench/middleware.py'}
+
+_explained = set()  # أشكال التُقطت خطتها في هذه العملية
+
+
+def normalize_sql(sql):
+    """شكل الاستعلام: بدون قيم حرفية، وقوائم IN مطوية، ومسافات موحّدة."""
+    s = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    s = re.sub(r'\b\d+(?:\.\d+)?\b', '?', s)
+    s = s.replace('%s', '?')
+    s = re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(...)', s)
+    return re.sub(r'\s+', ' ', s).strip()
+
+
+def fingerprint(shape):
+    return hashlib.sha1(shape.encode()).hexdigest()
+
+
+def call_site():
+    """أقرب إطار داخل المشروع (خارج site-packages وملفات القياس)."""
+    base = Path(settings.BASE_DIR).resolve()
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        path = Path(frame.filename).resolve()
+        if 'site-packages' in path.parts or not path.is_relative_to(base):
+            continue
+        rel = path.relative_to(base).as_posix()
+        if rel not in INSTRUMENTATION_FILES:
+            return f'{rel}:{frame.lineno} in {frame.name}'
+    return ''
+
+
+def get_logger():
+    if not logger.handlers:
+        path = Path(settings.SLOW_QUERY_LOG)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            path, maxBytes=settings.SLOW_QUERY_LOG_BYTES, backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def explain(sql, params):
+    vendor = connection.vendor
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    prefix = 'EXPLAIN QUERY PLAN ' if vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        with connection.cursor() as cur:
+            cur.execute(prefix + sql, params)
+            rows = cur.fetchall()
+    except DatabaseError as e:
+        return f'EXPLAIN failed: {e}'
+    return '\n'.join(' | '.join(str(c) for c in row) for row in rows)
+
+
+class SlowQueryMiddleware:
+    """يراقب استعلامات الطلب، ويسجّل البطيء منها بعد انتهاء الطلب (خارج أي معاملة للعرض)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.threshold = getattr(settings, 'SLOW_QUERY_MS', 0) / 1000
+        if self.threshold <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        slow = []
+        with query_wrapper(self.watcher(slow)):
+            response = self.get_response(request)
+        if slow:
+            record_slow_queries(view_label(request), slow)
+        return response
+
+    async def __acall__(self, request):
+        slow = []
+        with query_wrapper(self.watcher(slow)):
+            response = await self.get_response(request)
+        if slow:
+            await sync_to_async(record_slow_queries)(view_label(request), slow)
+        return response
+
+    def watcher(self, slow):
+        threshold = self.threshold
+
+        def watch(execute, sql, params, many, context):
+            t0 = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                elapsed = time.perf_counter() - t0
+                if elapsed >= threshold:
+                    slow.append((sql, params, many, elapsed, call_site()))
+        return watch
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name or match._func_path) if match else request.path
+
+
+def record_slow_queries(view, slow):
+    from .models import SlowQuery
+
+    log = get_logger()
+    now = timezone.now()
+    for sql, params, many, elapsed, site in slow:
+        shape = normalize_sql(sql)
+        fp = fingerprint(shape)
+        ms = round(elapsed * 1000, 3)
+        log.info(json.dumps({
+            'time': now.isoformat(), 'ms': ms, 'view': view, 'call_site': site,
+            'fingerprint': fp, 'sql': sql,
+        }, ensure_ascii=False))
+
+        try:
+            updated = SlowQuery.objects.filter(fingerprint=fp).update(
+                count=F('count') + 1, total_ms=F('total_ms') + ms,
+                max_ms=Greatest('max_ms', ms), last_seen=now,
+            )
+            if updated:
+                continue
+            plan = '' if many or fp in _explained else explain(sql, params)
+            _explained.add(fp)
+            SlowQuery.objects.get_or_create(fingerprint=fp, defaults={
+                'sql': shape, 'example_sql': sql, 'view': view[:200], 'call_site': site[:300],
+                'explain': plan, 'count': 1, 'total_ms': ms, 'max_ms': ms, 'last_seen': now,
+            })
+        except DatabaseError:
+            # الجدول غير موجود (قبل migrate) أو المعاملة معطوبة: يبقى السطر في السجل الدوّار
+            continue
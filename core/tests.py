@@ -1,3 +1,679 @@
-from django.test import TestCase
+import csv
+import gzip
+import os
+import tempfile
+from datetime import timedelta
+import importlib.util
+from importlib import import_module
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ImproperlyConfigured
+from django.test import AsyncClient, Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from openpyxl import load_workbook
+from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import authentication, db_router, jobs
+from .admin import NotificationAdmin
+from .compression import CompressionMiddleware
+from .metrics import REGISTRY, MetricsMiddleware, flush
+from .profiling import ProfilingMiddleware
+from .slowlog import SlowQueryMiddleware
+from .counters import fan_out, mark_read
+from .delta import changed_since, encode_token, parse_since
+from .form_files import file_hash
+from .models import (
+    BootstrapStep, Complaint, FormModel, Job, Notification, ReplicaHeartbeat, Section, UserNotification,
+)
+from .response_cache import cached_call
+from .views import INBOX_CHANGED_AT, inbox_queryset
+from .renderers import FastJSONRenderer
+from .serializers import MyTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+def bearer(user):
+    return f'Bearer {MyTokenObtainPairSerializer.get_token(user).access_token}'
+
+
+class ClaimsAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('boss', password='pw', role='manager', is_staff=True)
+
+    def setUp(self):
+        self.restart()
+
+    def restart(self):
+        # عملية جديدة: كاش المستخدمين ونسخ الحقول فارغ
+        authentication.invalidate_user(None)
+
+    def authenticate(self, access):
+        auth = authentication.ClaimsJWTAuthentication()
+        return auth.get_user(auth.get_validated_token(str(access).encode()))
+
+    def test_fresh_claims_skip_user_row(self):
+        access = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.authenticate(access)  # تحميل نسخة الحقول
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+        self.assertEqual((user.pk, user.is_staff, user.role), (self.user.pk, True, 'manager'))
+
+    def test_demotion(self):
+        access = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.assertTrue(self.authenticate(access).is_staff)
+        self.user.is_staff = False
+        self.user.role = 'employee'
+        self.user.save()
+        user = self.authenticate(access)
+        self.assertEqual((user.is_staff, user.role), (False, 'employee'))
+
+    def test_demotion_survives_restart(self):
+        access = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        # التغيير في عامل آخر لم يصل إبطاله لهذه العملية، ثم أُعيد تشغيلها
+        with mock.patch('core.signals.invalidate_user'), mock.patch('core.signals.publish'):
+            User.objects.get(pk=self.user.pk).save(update_fields=['is_staff'])
+            User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        self.restart()
+        self.assertFalse(self.authenticate(access).is_staff)
+
+    def test_deactivation(self):
+        access = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.authenticate(access)
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+    def test_cached_user_is_not_shared(self):
+        first = authentication.get_cached_user(self.user.pk)
+        first.role = 'changed'
+        with self.assertNumQueries(0):
+            second = authentication.get_cached_user(self.user.pk)
+        self.assertIsNot(first, second)
+        self.assertEqual((second.role, second.username), ('manager', 'boss'))
+        self.assertFalse(second._state.adding)
+
+    def test_last_login_keeps_tokens_fresh(self):
+        access = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.authenticate(access)
+        with self.assertNumQueries(0):
+            self.authenticate(access)
+
+    def test_refresh_rebuilds_claims(self):
+        refresh = str(MyTokenObtainPairSerializer.get_token(self.user))
+        self.user.is_staff = False
+        self.user.save()
+
+        response = Client().post('/api/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, 200)
+        access = AccessToken(response.json()['access'])
+        self.assertFalse(access['is_staff'])
+        self.assertEqual(access['claims_version'], User.objects.get(pk=self.user.pk).claims_version)
+        self.assertFalse(self.authenticate(access).is_staff)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(Client().post('/api/token/refresh/', {'refresh': refresh}).status_code, 401)
+        User.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(Client().post('/api/token/refresh/', {'refresh': refresh}).status_code, 401)
+
+
+class UserListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'user{i}', f'user{i}@example.com', 'pw') for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def test_limit_is_clamped(self):
+        for limit, expected in (('0', 1), ('-5', 1), ('1000', 3)):
+            response = self.client.get('/api/users/', {'limit': limit})
+            self.assertEqual(response.status_code, 200, limit)
+            self.assertEqual(len(response.data['results']), expected, limit)
+
+    def test_invalid_params_are_400(self):
+        for params in ({'after': '-1'}, {'after': 'x'}, {'limit': 'x'}, {'section': 'abc'}):
+            self.assertEqual(self.client.get('/api/users/', params).status_code, 400, params)
+
+    def test_stream_matches_paginated_bytes(self):
+        User.objects.filter(pk=self.users[2].pk).update(username='مستخدم', email='a\u2028b@example.com')
+        streamed = b''.join(self.client.get('/api/users/').streaming_content)
+        results = self.client.get('/api/users/', {'limit': '10'}).data['results']
+        self.assertEqual(streamed, FastJSONRenderer().render(results))
+        self.assertIn('مستخدم'.encode(), streamed)
+
+    def test_prefix_search(self):
+        response = self.client.get('/api/users/', {'q': 'USER1'})
+        self.assertEqual([row['username'] for row in response.data['results']], ['user1'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class FormFileTests(TestCase):
+    content = b'%PDF-1.4 ' + b'x' * 100_000
+
+    @classmethod
+    def setUpTestData(cls):
+        section = Section.objects.create(name_ar='قسم', name_en='Section')
+        cls.form = FormModel(section=section, serial_number='F-1', name_ar='نموذج', name_en='Form', category='c')
+        cls.form.file.save('form.pdf', ContentFile(cls.content))
+
+    def urls(self):
+        return [f'/api/preview-form/{self.form.pk}/', f'/api/form-files/{self.form.pk}/{self.form.file_hash}.pdf']
+
+    def test_wsgi_uses_file_response(self):
+        for url in self.urls():
+            response = Client().get(url)
+            self.assertIsInstance(response, FileResponse, url)
+            self.assertEqual(response['Content-Length'], str(len(self.content)))
+            self.assertEqual(b''.join(response.streaming_content), self.content)
+            response.close()
+
+    async def test_asgi_streams_asynchronously(self):
+        for url in self.urls():
+            response = await AsyncClient().get(url)
+            self.assertNotIsInstance(response, FileResponse, url)
+            self.assertIsInstance(response, StreamingHttpResponse)
+            self.assertTrue(response.is_async)
+            self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.content)
+
+    def test_migration_hash_matches(self):
+        migration = import_module('core.migrations.0011_form_file_hash')
+        self.assertEqual(migration.file_hash(self.form.file), self.form.file_hash)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_seeded_forms_have_hashes(self):
+        call_command('seed_scale', users=3, sections=1, forms=3, notifications=0, complaints=0,
+                     prefix='hash', stdout=StringIO())
+        for form in FormModel.objects.filter(serial_number__startswith='HASH-'):
+            self.assertEqual(form.file_hash, file_hash(form.file), form.serial_number)
+
+
+class NotificationCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'user{i}', password='pw') for i in range(3)]
+        # الإبطال مؤجل إلى on_commit: بدون تنفيذه هنا تتراكم إبطالات الاختبارات في معاملة الصنف
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.notification = Notification.objects.create(title='t', message='m')
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self):
+        self.notification.refresh_from_db()
+        return self.notification.recipients_count, self.notification.read_count
+
+    def test_fan_out_and_mark_read(self):
+        ids = [user.pk for user in self.users]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(fan_out(self.notification, ids[:2]), 2)
+            self.assertEqual(fan_out(self.notification, ids), 1)  # إعادة محاولة: الجدد فقط
+        self.assertEqual(self.counts(), (3, 0))
+
+        receipts = UserNotification.objects.filter(notification=self.notification)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mark_read(receipts.filter(user=self.users[0])), 1)
+            self.assertEqual(mark_read(receipts.filter(user=self.users[0])), 0)
+        self.assertEqual(self.counts(), (3, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mark_read(receipts), 2)
+        self.assertEqual(self.counts(), (3, 3))
+
+    def test_reconcile_fixes_drift(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            fan_out(self.notification, [user.pk for user in self.users])
+            mark_read(UserNotification.objects.filter(user=self.users[0]))
+        Notification.objects.update(recipients_count=10, read_count=7)
+        call_command('reconcile_notification_counts', stdout=StringIO())
+        self.assertEqual(self.counts(), (3, 1))
+
+    def test_counters_only_on_notification_endpoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            fan_out(self.notification, [user.pk for user in self.users])
+        client = Client(headers={'Authorization': bearer(self.users[0])})
+
+        inbox = client.get('/api/user-notifications/').json()
+        self.assertNotIn('read_count', inbox[0]['notification'])
+        self.assertNotIn('recipients_count', inbox[0]['notification'])
+
+        url = f'/api/notifications/{self.notification.pk}/'
+        self.assertEqual(client.get(url).json()['read_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_read(UserNotification.objects.filter(user=self.users[1]))
+        # الاستجابة المخزّنة أُبطلت ('notification-counts')
+        self.assertEqual(client.get(url).json()['read_count'], 1)
+
+
+class JobQueueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'user{i}', password='pw') for i in range(3)]
+        cls.admin = User.objects.create_superuser('admin', password='pw')
+
+    def test_enqueue_and_claim(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no_such_job')
+        later = jobs.enqueue('import_forms', delay=60)
+        job = jobs.enqueue('import_forms')
+        self.assertEqual(job.status, 'queued')
+
+        claimed = jobs.claim('w1')
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts, claimed.locked_by), (job.pk, 'running', 1, 'w1'))
+        self.assertIsNone(jobs.claim('w2'))  # المهمة الأخرى غير مستحقة بعد
+
+        # عامل مات: running أقدم من JOB_LOCK_TIMEOUT تُسحب من جديد
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(jobs.claim('w2').pk, job.pk)
+        self.assertEqual(Job.objects.get(pk=later.pk).status, 'queued')
+
+    def test_failed_job_is_retried_then_failed(self):
+        job = jobs.enqueue('send_notification', {'notification_id': 0}, max_attempts=2)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertFalse(jobs.run(jobs.claim('w')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('DoesNotExist', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertFalse(jobs.run(jobs.claim('w')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNone(jobs.claim('w'))
+
+    def test_in_process_runner_delivers(self):
+        notification = Notification.objects.create(title='t', message='m')
+        with mock.patch.object(jobs, '_runner') as runner, self.captureOnCommitCallbacks(execute=True):
+            job = jobs.enqueue('send_notification', {'notification_id': notification.pk})
+            jobs.enqueue('import_forms', delay=60)
+        runner.wake.assert_called_once_with()  # المهمة المؤجلة لا توقظه
+
+        runner = jobs.InProcessRunner(0)
+        self.assertTrue(runner.run_once())
+        self.assertFalse(runner.run_once())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(notification.usernotification_set.count(), User.objects.count())
+
+    def broadcast(self, queryset):
+        request = RequestFactory().post('/')
+        request.user = self.admin
+        with mock.patch.object(NotificationAdmin, 'message_user'):
+            NotificationAdmin(Notification, site).broadcast(request, queryset)
+
+    def run_all(self):
+        while (job := jobs.claim('w')) is not None:
+            self.assertTrue(jobs.run(job))
+
+    def test_admin_resend_keeps_original_recipients(self):
+        targeted = Notification.objects.create(title='targeted', message='m')
+        jobs.enqueue('send_notification', {'notification_id': targeted.pk, 'usernames': ['user0']})
+        fresh = Notification.objects.create(title='new', message='m')
+        self.run_all()
+
+        self.broadcast(Notification.objects.filter(pk__in=[targeted.pk, fresh.pk]))
+        self.run_all()
+        self.assertEqual(list(targeted.usernotification_set.values_list('user__username', flat=True)), ['user0'])
+        self.assertEqual(fresh.usernotification_set.count(), User.objects.count())
+
+        # مهمة الإرسال الأصلية حُذفت: المستلمون غير معروفين فلا يُرسل لأحد
+        Job.objects.all().delete()
+        self.broadcast(Notification.objects.filter(pk=targeted.pk))
+        self.assertFalse(Job.objects.exists())
+
+
+@mock.patch('core.db_router.replica_aliases', return_value=['replica0'])
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def test_pin_needs_shared_cache(self, aliases):
+        with self.assertRaises(ImproperlyConfigured):
+            db_router.ReplicaRoutingMiddleware(lambda request: None)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp(),
+        }}):
+            db_router.ReplicaRoutingMiddleware(lambda request: None)
+
+    @mock.patch('core.db_router.replica_status', return_value=db_router.ReplicaStatus(0.0, True, 0.0))
+    def test_cached_responses_are_read_from_primary(self, status, aliases):
+        router = db_router.ReplicaRouter()
+        request = RequestFactory().get('/api/notifications/')
+        request.user = AnonymousUser()
+        used = []
+
+        def compute():
+            used.append(router.db_for_read(Notification))
+            return Response({})
+
+        token = db_router._replica_allowed.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Notification), 'replica0')
+            cached_call('replica-test', request, ['notifications'], False, {}, compute)
+        finally:
+            db_router._replica_allowed.reset(token)
+        self.assertEqual(used, [db_router.PRIMARY])
+
+
+class ReplicaLagTests(TestCase):
+
+    def test_measure_lag_is_read_only(self):
+        self.assertEqual(db_router.measure_lag('default'), float('inf'))
+        self.assertFalse(ReplicaHeartbeat.objects.exists())
+
+        db_router.write_heartbeat()
+        self.assertEqual(db_router.measure_lag('default'), 0.0)
+
+        # لا عامل يكتب النبضة: التأخر غير معروف
+        ReplicaHeartbeat.objects.update(beat=0)
+        self.assertEqual(db_router.measure_lag('default'), float('inf'))
+
+
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp(),
+}}
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=1.0, PROFILE_DIR=tempfile.mkdtemp(),
+                   SLOW_QUERY_MS=0.000001, CACHES=SHARED_CACHE)
+class AsyncMiddlewareTests(TestCase):
+    """تحت ASGI تبقى هذه الـ middleware في حلقة الأحداث بدل تحويلها إلى خيط لكل طلب."""
+
+    @staticmethod
+    async def view(request):
+        users = await sync_to_async(lambda: list(User.objects.values_list('pk', flat=True)))()
+        return JsonResponse({'users': users, 'padding': 'x' * 4096})
+
+    def request(self, method='get', path='/api/metrics-test/'):
+        return getattr(RequestFactory(), method)(path, HTTP_ACCEPT_ENCODING='gzip')
+
+    async def test_async_capable(self):
+        with mock.patch('core.db_router.replica_aliases', return_value=['replica0']):
+            classes = [MetricsMiddleware, ProfilingMiddleware, SlowQueryMiddleware, CompressionMiddleware,
+                       db_router.ReplicaRoutingMiddleware]
+            for cls in classes:
+                self.assertTrue(cls.async_capable, cls)
+                self.assertTrue(iscoroutinefunction(cls(self.view)), cls)
+                self.assertFalse(iscoroutinefunction(cls(lambda request: None)), cls)
+
+    async def test_metrics_count_queries(self):
+        sample = lambda: REGISTRY.get_sample_value('http_request_db_queries_count', {'route': 'unmatched'}) or 0
+        before = sample()
+        await MetricsMiddleware(self.view)(self.request())
+        flush()
+        self.assertEqual(sample(), before + 1)
+        total = REGISTRY.get_sample_value('http_request_db_queries_sum', {'route': 'unmatched'})
+        self.assertGreaterEqual(total, 1)
+
+    def test_sync_metrics_count_queries(self):
+        sample = lambda: REGISTRY.get_sample_value('http_request_db_queries_sum', {'route': 'unmatched'}) or 0
+        before = sample()
+        MetricsMiddleware(lambda request: JsonResponse({'users': list(User.objects.values_list('pk'))}))(
+            self.request())
+        flush()
+        self.assertEqual(sample(), before + 1)
+
+    async def test_slow_queries_and_profiles_are_recorded(self):
+        with mock.patch('core.slowlog.record_slow_queries') as record:
+            await SlowQueryMiddleware(self.view)(self.request())
+        self.assertTrue(record.called)
+
+        from django.conf import settings
+        await ProfilingMiddleware(self.view)(self.request())
+        self.assertTrue(list(Path(settings.PROFILE_DIR).glob('*.json')))
+
+    async def test_compression(self):
+        response = await CompressionMiddleware(self.view)(self.request())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'padding', gzip.decompress(response.content))
+
+        async def chunks():
+            for i in range(100):
+                yield b'{"row": %d},' % i
+
+        async def stream(request):
+            return StreamingHttpResponse(chunks(), content_type='application/json')
+
+        response = await CompressionMiddleware(stream)(self.request())
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(gzip.decompress(body), b''.join([chunk async for chunk in chunks()]))
+
+    @mock.patch('core.db_router.replica_aliases', return_value=['replica0'])
+    async def test_replica_pin(self, aliases):
+        user = await User.objects.acreate(username='writer')
+        seen = []
+
+        async def view(request):
+            seen.append(db_router._replica_allowed.get())
+            return JsonResponse({})
+
+        middleware = db_router.ReplicaRoutingMiddleware(view)
+        with mock.patch('core.db_router.request_user_id', return_value=user.pk):
+            await middleware(self.request())
+            await middleware(self.request('post'))
+            await middleware(self.request())
+        self.assertEqual(seen, [True, False, False])
+
+
+class BootstrapTests(TestCase):
+
+    def bootstrap(self, *steps):
+        call_command('bootstrap', '--force', '--only', *steps, stdout=StringIO())
+
+    def test_non_fatal_step_errors_do_not_abort(self):
+        with mock.patch('core.management.commands.bootstrap.call_command', side_effect=ValueError('bad sheet')), \
+                self.assertLogs('core.bootstrap', 'ERROR'):
+            self.bootstrap('import_employees')
+        self.assertFalse(BootstrapStep.objects.filter(name='import_employees').exists())
+
+    @mock.patch.dict(os.environ, {'DJANGO_SUPERUSER_USERNAME': 'admin', 'DJANGO_SUPERUSER_PASSWORD': 'pw',
+                                  'DJANGO_SUPERUSER_EMAIL': 'admin@example.com'})
+    def test_createsuperuser_skips_existing_user(self):
+        self.bootstrap('createsuperuser')
+        self.assertTrue(User.objects.get(username='admin').is_superuser)
+        BootstrapStep.objects.all().delete()
+
+        self.bootstrap('createsuperuser')  # كان يفشل في كل إقلاع بعد الأول
+        self.assertTrue(BootstrapStep.objects.filter(name='createsuperuser').exists())
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_user('hr', password='pw', role='hr')
+        cls.employee = User.objects.create_user('@employee', password='pw', role='employee')
+        for i in range(5):
+            Complaint.objects.create(sender=cls.employee, recipient_type='hr', title=f'c{i}', message='m')
+        Complaint.objects.create(sender=cls.employee, recipient_type='manager', title='other box', message='m')
+        cls.formula = Complaint.objects.create(
+            sender=cls.employee, recipient_type='hr', title='=HYPERLINK("x")', message='+1', response='-2',
+        )
+
+    def get(self, user, path='/api/exports/complaints.csv', **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(path, params)
+
+    @mock.patch('core.exports.CSV_BATCH_ROWS', 2)
+    def test_csv_streams_rows(self):
+        response = self.get(self.hr)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 3)  # العناوين ثم دفعات من صفين
+        text = b''.join(chunks).decode('utf-8')
+        self.assertTrue(text.startswith('\ufeffid,created_at,sender'))
+        rows = list(csv.reader(StringIO(text.lstrip('\ufeff'))))[1:]
+        # HR يصدّر صندوقه فقط
+        self.assertEqual(len(rows), 6)
+        self.assertNotIn('other box', text)
+
+    def test_formula_cells_are_escaped(self):
+        rows = list(csv.reader(StringIO(b''.join(self.get(self.hr).streaming_content).decode('utf-8-sig'))))
+        row = next(r for r in rows if r[0] == str(self.formula.pk))
+        self.assertEqual((row[2], row[4], row[5], row[7]), ("'@employee", '\'=HYPERLINK("x")', "'+1", "'-2"))
+
+        response = self.get(self.hr, '/api/exports/complaints.xlsx')
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True).active
+        cells = next(r for r in sheet.iter_rows(min_row=2, values_only=True) if r[0] == self.formula.pk)
+        self.assertEqual((cells[2], cells[4], cells[5]), ("'@employee", '\'=HYPERLINK("x")', "'+1"))
+
+    def test_employees_cannot_export(self):
+        for path in ('/api/exports/complaints.csv', '/api/exports/notification-receipts.xlsx'):
+            self.assertEqual(self.get(self.employee, path).status_code, 403, path)
+        self.assertEqual(self.get(self.hr, '/api/exports/complaints.pdf').status_code, 404)
+
+
+def load_tr():
+    spec = importlib.util.spec_from_file_location('tr', Path(__file__).resolve().parent.parent / 'data' / 'tr.py')
+    tr = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(tr)
+    return tr
+
+
+class FuzzyRenameTests(SimpleTestCase):
+    """data/tr.py: فهرس trigrams ودرجات Dice وقرار التطبيق التلقائي."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tr = load_tr()
+        names = {'طلب سلفة نقدية': 'FN-001', 'طلب سلفة نقدية عاجلة': 'FN-002', 'طلب إجازة سنوية': 'HR-001',
+                 'abd': 'X-1', 'طلب عهدة أ': 'WS-001', 'طلب عهدة ب': 'WS-002'}
+        cls.name_to_code = {cls.tr.normalize_key(name): code for name, code in names.items()}
+        cls.index = cls.tr.FuzzyIndex(cls.name_to_code)
+
+    def candidates(self, name, **kwargs):
+        return self.index.candidates(self.tr.normalize_key(name), **kwargs)
+
+    def test_dice_score(self):
+        # {'  a', ' ab', 'abc', 'bc '} و {'  a', ' ab', 'abd', 'bd '}: مشتركان من 4+4
+        self.assertEqual(self.candidates('abc', min_score=0), [('X-1', 0.5)])
+        # الألف والتاء المربوطة موحّدتان، و"نموذج" لا يميّز
+        self.assertEqual(self.candidates('نموذج طلب اجازه سنويه')[0], ('HR-001', 1.0))
+        codes = [code for code, _ in self.candidates('طلب سلفه نقديه', min_score=0)]
+        self.assertEqual(codes[:2], ['FN-001', 'FN-002'])
+
+    def test_empty_name_has_no_candidates(self):
+        for name in ('', '---', '.pdf'):
+            self.assertEqual(self.candidates(name, min_score=0), [], name)
+
+    def test_choice_needs_threshold_and_margin(self):
+        choice = self.tr.fuzzy_choice
+        self.assertEqual(choice([('A', 0.9), ('B', 0.8)]), 'A')
+        self.assertEqual(choice([('A', 0.85)]), 'A')
+        self.assertIsNone(choice([('A', 0.7)]))
+        self.assertIsNone(choice([('A', 0.9), ('B', 0.88)]))
+        self.assertIsNone(choice([]))
+
+    def test_plan_sends_near_ties_to_review(self):
+        folder = Path(tempfile.mkdtemp())
+        for name in ('طلب اجازة سنوي', 'طلب عهدة', 'FN-001'):
+            (folder / f'{name}.pdf').write_bytes(b'%PDF-1.4')
+        plans, unmatched, suggestions = self.tr.plan_renames(
+            folder, self.name_to_code, {'fn001': 'FN-001'}, fuzzy_index=self.index,
+        )
+        self.assertEqual([(src.stem, dst.name, reason) for src, dst, reason in plans],
+                         [('طلب اجازة سنوي', 'HR-001.pdf', 'match-by-fuzzy')])
+        # عهدة أ وعهدة ب بالدرجة نفسها: لا يُختار أحدهما تلقائيًا
+        self.assertEqual([p.stem for p in unmatched], ['طلب عهدة'])
+        tie = suggestions[unmatched[0]]
+        self.assertEqual(sorted(code for code, _ in tie[:2]), ['WS-001', 'WS-002'])
+        self.assertGreaterEqual(tie[0][1], self.tr.FUZZY_THRESHOLD)
+
+
+@mock.patch('core.delta.DELTA_PAGE_SIZE', 2)
+class DeltaSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        sender = User.objects.create_user('sender', password='pw')
+        cls.ids = [
+            Complaint.objects.create(sender=sender, recipient_type='hr', title=f'c{i}', message='m').pk
+            for i in range(5)
+        ]
+
+    def sync(self, token='0'):
+        seen = []
+        while True:
+            page, token, has_more = changed_since(Complaint.objects.all(), parse_since(token))
+            seen += [row.pk for row in page]
+            if not has_more:
+                return seen, token
+
+    def test_token_round_trip(self):
+        changed_at = timezone.now()
+        self.assertEqual(parse_since(encode_token(changed_at, 42)), (changed_at, 42))
+        self.assertIsNone(parse_since('0'))
+
+    def test_pages_cover_every_row_once(self):
+        Complaint.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        seen, token = self.sync()
+        self.assertEqual(sorted(seen), self.ids)
+        self.assertEqual(self.sync(token)[0], [])
+
+        Complaint.objects.filter(pk=self.ids[2]).update(updated_at=timezone.now())
+        self.assertEqual(self.sync(token)[0], [self.ids[2]])
+
+    def test_full_page_inside_skew_window_stops(self):
+        # كل الصفوف أحدث من الأفق: الـ token لا يتقدم فيجب ألا يطلب العميل صفحة تالية
+        page, token, has_more = changed_since(Complaint.objects.all(), None)
+        self.assertFalse(has_more)
+        self.assertEqual(len(page), 2)
+
+        # الصفوف لم تُفقد: الاستطلاع التالي بالـ token نفسه يعيدها
+        again, _, has_more = changed_since(Complaint.objects.all(), parse_since(token))
+        self.assertFalse(has_more)
+        self.assertEqual([row.pk for row in again], [row.pk for row in page])
+
+        with mock.patch('core.delta.timezone.now', return_value=timezone.now() + timedelta(minutes=1)):
+            seen, _ = self.sync(token)
+        self.assertEqual(sorted(seen), self.ids)
+
+    def test_inbox_sees_notification_edits(self):
+        reader, other = [User.objects.create_user(name, password='pw') for name in ('reader', 'other')]
+        notification = Notification.objects.create(title='t', message='m')
+        fan_out(notification, [reader.pk, other.pk])
+        hour_ago = timezone.now() - timedelta(hours=1)
+        UserNotification.objects.update(updated_at=hour_ago)
+        Notification.objects.update(edited_at=hour_ago)
+
+        def inbox(token):
+            page, token, _ = changed_since(inbox_queryset(reader), parse_since(token), INBOX_CHANGED_AT)
+            return [row.notification_id for row in page], token
+
+        seen, token = inbox('0')
+        self.assertEqual(seen, [notification.pk])
+        # قراءة مستلم آخر تغيّر عدّادات الإشعار فقط، فلا يُعاد في صندوق هذا المستخدم
+        mark_read(UserNotification.objects.filter(user=other))
+        self.assertEqual(inbox(token)[0], [])
+
+        notification.title = 'edited'
+        notification.save()
+        self.assertEqual(inbox(token)[0], [notification.pk])
+        # التعديل لا يكتب صفوف المستلمين
+        self.assertFalse(UserNotification.objects.filter(user=reader, updated_at__gt=hour_ago).exists())
@@ -6,19 +6,19 @@ from .views import (
     NotificationViewSet,
     UserNotificationViewSet,
     MyTokenObtainPairView,
+    MyTokenRefreshView,
     UserListAPIView,
     current_user_info,
+    bootstrap,
     preview_form,
+    form_file,
     public_form_preview,
     ComplaintViewSet,
+    JobViewSet,
 )
-from rest_framework_simplejwt.views import TokenRefreshView
+from .exports import export
 from .views import *
 
-user_notifications = UserNotificationViewSet.as_view({
-    'get': 'list',
-})
-
 mark_as_read = UserNotificationViewSet.as_view({
     'post': 'mark_as_read',
 })
@@ -33,24 +33,29 @@ router.register(r'forms', FormModelViewSet, basename='formmodel')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'user-notifications', UserNotificationViewSet, basename='user-notifications')
 router.register(r'complaints', ComplaintViewSet, basename='complaint')
+router.register(r'jobs', JobViewSet, basename='job')
 
 urlpatterns = [
+    # عروض async: يجب أن تسبق مسارات الـ router
+    path('user-notifications/', user_notifications_inbox, name='user-notifications-list'),
+    path('complaints/has_unread/', has_unread_complaints, name='has-unread-complaints'),
     path('', include(router.urls)),
     path('token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', MyTokenRefreshView.as_view(), name='token_refresh'),
     path('users/', UserListAPIView.as_view(), name='user-list'),
     path('me/', current_user_info, name='current-user-info'),
+    path('bootstrap/', bootstrap, name='bootstrap'),
     path('preview-form/<int:form_id>/', preview_form, name='preview-form'),
+    path('form-files/<int:form_id>/<slug:digest>.pdf', form_file, name='form-file'),
     path('public-form/<int:pk>/', public_form_preview, name='public-form-preview'),
     path('current-user/', current_user_info, name='current-user'),
     path('complaints/<int:pk>/mark_seen/', mark_complaint_as_seen),
-    path('complaints/has_unread/', has_unread_complaints, name='has-unread-complaints'),
     path('mark-all-complaints-seen/', mark_all_complaints_seen, name='mark_all_complaints_seen'),
+    path('exports/<slug:name>.<slug:ext>', export, name='export'),
 
 
 ]
 urlpatterns += [
-    path('user-notifications/', user_notifications, name='user-notifications-list'),
     path('user-notifications/<int:pk>/mark_as_read/', mark_as_read, name='user-notifications-mark-as-read'),
     path('notify-admin/send_notification/', send_notification, name='send_notification'),
 ]
\ No newline at end of file
@@ -3,21 +3,42 @@ from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, StreamingHttpResponse, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.conf import settings
 from django.utils import timezone
-
-from .models import Notification, UserNotification, Section, FormModel, Complaint
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.db.models.functions import Greatest, Lower
+import hashlib
+
+from .models import Notification, UserNotification, Section, FormModel, Complaint, Job
 from .serializers import (
     SectionSerializer,
     FormModelSerializer,
-    NotificationSerializer,
-    UserNotificationSerializer,
+    NotificationStatsSerializer,
     ComplaintSerializer,
-    MyTokenObtainPairSerializer
+    JobSerializer,
+    MyTokenObtainPairSerializer,
+    MyTokenRefreshSerializer,
+    ComplaintValuesSerializer,
+    FormModelValuesSerializer,
+    UserNotificationValuesSerializer,
 )
 
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .authentication import async_jwt_required
+from .renderers import FastJSONRenderer
+from .fieldsets import SparseFieldsViewMixin, select_fields
+from .delta import achanged_since, changed_since, parse_since
+from .form_files import form_file_url
+from .response_cache import CachedReadMixin, cache_response, generations, invalidate
+from . import jobs
+from .counters import mark_read
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
@@ -26,28 +47,96 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 
+# 🔄 تجديد التوكن بحقول المستخدم الحالية (لا المنسوخة من الـ refresh)
+class MyTokenRefreshView(TokenRefreshView):
+    serializer_class = MyTokenRefreshSerializer
+
+
 # 🔐 معلومات المستخدم الحالي
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response('user:{user}')
 def current_user_info(request):
-    user = request.user
-    return Response({
+    return Response(user_profile(request.user))
+
+
+def user_profile(user):
+    return {
         'username': user.username,
         'is_staff': user.is_staff,
         'is_superuser': user.is_superuser,
         'id': user.id,
         'email': user.email,
         'role':  user.role
-    })
+    }
 
 
 # 📋 عرض المستخدمين بالأسماء لاختيار الإشعار
 class UserListAPIView(APIView):
+    """
+    دليل المستخدمين لاختيار مستلمي الإشعارات.
+      ?q=       بحث بالبادئة في username/email (فهرس lower(col))
+      ?role=    فلترة حسب الدور
+      ?section= فلترة حسب صلاحية القسم
+      ?after=&limit=  ترقيم keyset حسب id → {'results': [...], 'next': id|null}
+    بدون ترقيم (أو مع ?export=1) يُبثّ الدليل كاملًا كمصفوفة JSON من iterator().
+    """
     permission_classes = [IsAuthenticated]
+    fields = ('id', 'username', 'email')
+    page_params = ('q', 'role', 'section', 'after', 'limit')
+    default_limit = 50
+    max_limit = 200
 
     def get(self, request):
-        users = User.objects.all().values('id', 'username', 'email')
-        return Response(list(users))
+        params = request.query_params
+        if params.get('section') and not params['section'].isdigit():
+            return Response({'error': 'section must be an integer id'}, status=400)
+        users = self.filter_queryset(User.objects.order_by('id'), params)
+
+        if params.get('export') or not any(k in params for k in self.page_params):
+            return self.stream(users)
+
+        try:
+            after = int(params.get('after') or 0)
+            limit = int(params.get('limit') or self.default_limit)
+        except ValueError:
+            return Response({'error': 'after/limit must be integers'}, status=400)
+        if after < 0:
+            return Response({'error': 'after must be >= 0'}, status=400)
+        limit = max(1, min(limit, self.max_limit))
+
+        page = list(users.filter(id__gt=after).values(*self.fields)[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        return Response({
+            'results': page,
+            'next': page[-1]['id'] if has_more else None,
+        })
+
+    def filter_queryset(self, qs, params):
+        q = (params.get('q') or '').strip().lower()
+        if q:
+            qs = qs.annotate(
+                username_lower=Lower('username'), email_lower=Lower('email'),
+            ).filter(Q(username_lower__startswith=q) | Q(email_lower__startswith=q))
+        if params.get('role'):
+            qs = qs.filter(role=params['role'])
+        if params.get('section'):
+            qs = qs.filter(usersectionpermission__section_id=params['section'])
+        return qs
+
+    def stream(self, users):
+        # نفس بايتات الاستجابة غير المتدفقة (FastJSONRenderer)
+        render = FastJSONRenderer().render
+
+        def rows():
+            yield b'['
+            first = True
+            for row in users.values(*self.fields).iterator(chunk_size=2000):
+                yield render(row) if first else b',' + render(row)
+                first = False
+            yield b']'
+        return StreamingHttpResponse(rows(), content_type='application/json')
 
 
 # 🌐 عرض النموذج للعامة بدون حماية
@@ -65,21 +154,91 @@ from django.http import FileResponse, Http404
 from django.views.decorators.clickjacking import xframe_options_exempt
 from .models import FormModel
 
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+async def aiter_file(fh, chunk_size=FILE_CHUNK_SIZE):
+    """قراءة الملف على دفعات خارج حلقة الأحداث، فلا يحجز عميل بطيء أي worker."""
+    try:
+        while True:
+            chunk = await sync_to_async(fh.read, thread_sensitive=False)(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(fh.close, thread_sensitive=False)()
+
+
+def pdf_response(request, fh, field_file):
+    """
+    تحت ASGI نبث الملف بـ aiter_file؛ تحت WSGI يُجمَّع المكرر غير المتزامن في الذاكرة ويضيع
+    wsgi.file_wrapper (sendfile)، فنعيد FileResponse العادي.
+    """
+    if isinstance(request, ASGIRequest):
+        resp = StreamingHttpResponse(aiter_file(fh), content_type='application/pdf')
+    else:
+        resp = FileResponse(fh, content_type='application/pdf')
+    resp['Content-Length'] = str(field_file.size)
+    resp['Content-Disposition'] = f'inline; filename="{field_file.name.rsplit("/",1)[-1]}"'
+    return resp
+
+
+@xframe_options_exempt
+async def preview_form(request, form_id):
+    try:
+        form = await FormModel.objects.aget(id=form_id)
+    except FormModel.DoesNotExist:
+        raise Http404("No FormModel matches the given query.")
+    if not form.file or not await sync_to_async(form.file.storage.exists)(form.file.name):
+        raise Http404("File not found on server")
+    fh = await sync_to_async(form.file.storage.open)(form.file.name, 'rb')
+    return pdf_response(request, fh, form.file)
+
+
+# 🔖 ملف النموذج برابط فيه بصمة محتواه (core/form_files.py): المتصفح/الـ CDN يحتفظ به لسنة
 @xframe_options_exempt
-def preview_form(request, form_id):
-    form = get_object_or_404(FormModel, id=form_id)
-    if not form.file or not form.file.storage.exists(form.file.name):
+async def form_file(request, form_id, digest):
+    try:
+        form = await FormModel.objects.only('file', 'file_hash').aget(id=form_id)
+    except FormModel.DoesNotExist:
+        raise Http404("No FormModel matches the given query.")
+    if not form.file_hash:
         raise Http404("File not found on server")
-    resp = FileResponse(form.file.open('rb'), content_type='application/pdf')
-    resp['Content-Disposition'] = f'inline; filename="{form.file.name.rsplit("/",1)[-1]}"'
+    if digest != form.file_hash:
+        # رابط قديم (الملف استُبدل): نحوّل إلى الحالي دون تخزين التحويل
+        resp = HttpResponseRedirect(form_file_url(form.file.storage, form.pk, form.file.name, form.file_hash))
+        resp['Cache-Control'] = 'no-cache'
+        return resp
+
+    etag = f'"{digest}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        resp = HttpResponseNotModified()
+    else:
+        try:
+            fh = await sync_to_async(form.file.storage.open)(form.file.name, 'rb')
+        except OSError:
+            raise Http404("File not found on server")
+        resp = pdf_response(request, fh, form.file)
+    resp['ETag'] = etag
+    resp['Cache-Control'] = f'public, max-age={settings.FORM_FILE_MAX_AGE}, immutable'
     return resp
 
 
 # 🔔 إرسال إشعار لمستخدمين أو للجميع
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(CachedReadMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.all()
-    serializer_class = NotificationSerializer
+    serializer_class = NotificationStatsSerializer
     permission_classes = [IsAuthenticated]
+    # 'notification-counts': يتغير مع كل توزيع/قراءة دون إبطال صناديق المستخدمين ('notifications')
+    cache_scopes = ('notifications', 'notification-counts')
+
+    def list(self, request, *args, **kwargs):
+        # ?since= (core/delta.py): الإشعارات المنشأة/المعدلة بعد الـ token فقط
+        if 'since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        since = parse_since(request.query_params['since'])
+        page, token, has_more = changed_since(self.filter_queryset(self.get_queryset()), since)
+        return Response({'results': self.get_serializer(page, many=True).data, 'next': token, 'has_more': has_more})
 
     @action(detail=False, methods=['post'])
     def send_notification(self, request):
@@ -95,66 +254,115 @@ class NotificationViewSet(viewsets.ModelViewSet):
             importance=importance
         )
 
-        if usernames:
-            users = User.objects.filter(username__in=usernames)
-        else:
-            users = User.objects.all()
+        # التوزيع على المستلمين (قد يكونون كل المستخدمين) في طابور المهام: الرد فوري
+        job = jobs.enqueue('send_notification', {
+            'notification_id': notification.pk,
+            'usernames': usernames or [],
+        }, user=request.user)
 
-        UserNotification.objects.bulk_create([
-            UserNotification(user=user, notification=notification) for user in users
-        ])
+        return Response({
+            'status': 'Notification queued',
+            'notification_id': notification.pk,
+            'job_id': job.pk,
+        }, status=status.HTTP_202_ACCEPTED)
 
-        return Response({'status': 'Notification sent successfully'}, status=status.HTTP_201_CREATED)
+
+# 🧵 حالة المهام الخلفية: كل مستخدم يرى مهامه، والـ staff يرون الكل ويمكنهم جدولة الاستيراد
+class JobViewSet(SparseFieldsViewMixin, viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = JobSerializer
+
+    def get_queryset(self, request):
+        qs = Job.objects.order_by('-id')
+        return qs if request.user.is_staff else qs.filter(created_by_id=request.user.pk)
+
+    def list(self, request):
+        qs = self.sparse_queryset(self.get_queryset(request))
+        if request.query_params.get('status'):
+            qs = qs.filter(status=request.query_params['status'])
+        return Response(JobSerializer(qs[:50], many=True, context={'sparse_fields': self.sparse_fields()}).data)
+
+    def retrieve(self, request, pk=None):
+        job = get_object_or_404(self.sparse_queryset(self.get_queryset(request)), pk=pk)
+        return Response(JobSerializer(job, context={'sparse_fields': self.sparse_fields()}).data)
+
+    def create(self, request):
+        kind = request.data.get('kind')
+        if not request.user.is_staff:
+            return Response({'error': 'Not allowed'}, status=403)
+        if kind not in jobs.COMMAND_OPTIONS:
+            return Response({'error': f'kind must be one of: {", ".join(jobs.COMMAND_OPTIONS)}'}, status=400)
+        job = jobs.enqueue(kind, request.data.get('options') or {}, user=request.user, max_attempts=1)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 # 📂 عرض الأقسام (Tabs)
-class SectionViewSet(viewsets.ReadOnlyModelViewSet):
+class SectionViewSet(CachedReadMixin, SparseFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Section.objects.all()
     serializer_class = SectionSerializer
     permission_classes = [IsAuthenticated]
+    cache_scopes = ('sections',)
+
+
+class ValuesListMixin(SparseFieldsViewMixin):
+    """list عبر values_serializer_class (core/serializers.py: ValuesSerializer) بدل الـ serializer العام."""
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.values_serializer_class(context=self.get_serializer_context(), selected=self.sparse_fields())
+        return Response(serializer.serialize(queryset))
 
 
 # 🗂️ عرض النماذج داخل كل قسم
-class FormModelViewSet(viewsets.ReadOnlyModelViewSet):
+class FormModelViewSet(CachedReadMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = FormModel.objects.all()
     serializer_class = FormModelSerializer
+    values_serializer_class = FormModelValuesSerializer
     permission_classes = [IsAuthenticated]
+    # القائمة تختلف حسب صلاحيات أقسام المستخدم
+    cache_scopes = ('forms', 'sections', 'perms:{user}')
 
     def get_queryset(self):
-        user = self.request.user
-        # المدير والموارد البشرية يمكنهم الوصول لكل النماذج
-        if hasattr(user, 'profile') and user.profile.role in ['manager', 'hr']:
-            return FormModel.objects.all()
-        allowed_sections = user.usersectionpermission_set.values_list('section_id', flat=True)
-        return FormModel.objects.filter(section__id__in=allowed_sections)
+        return permitted_forms(self.request.user)
+
+
+def permitted_forms(user):
+    # المدير والموارد البشرية يمكنهم الوصول لكل النماذج
+    if hasattr(user, 'profile') and user.profile.role in ['manager', 'hr']:
+        return FormModel.objects.all()
+    allowed_sections = user.usersectionpermission_set.values_list('section_id', flat=True)
+    return FormModel.objects.filter(section__id__in=allowed_sections)
 
 
 # 📩 إشعارات المستخدم الفردية
+# صندوق الإشعارات (GET /api/user-notifications/) عرض async: user_notifications_inbox بالأسفل
 class UserNotificationViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
-    def list(self, request):
-        user_notifications = UserNotification.objects.filter(
-            user=request.user
-        ).order_by('-notification__created_at')
-
-        serializer = UserNotificationSerializer(user_notifications, many=True)
-        return Response(serializer.data)
-
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         try:
             user_notification = UserNotification.objects.get(pk=pk, user=request.user)
-            user_notification.is_read = True
-            user_notification.save()
+            # مع عدّاد القراءة في الإشعار (core/counters.py): مرة واحدة حتى مع طلبين متزامنين
+            mark_read(UserNotification.objects.filter(pk=user_notification.pk))
             return Response({'status': 'Marked as read'})
         except UserNotification.DoesNotExist:
             return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    # كل صندوق المستخدم كمقروء: UPDATE واحد للصفوف وواحد للعدّادات
+    @action(detail=False, methods=['post'])
+    def mark_all_as_read(self, request):
+        count = mark_read(UserNotification.objects.filter(user=request.user))
+        return Response({'status': 'Marked as read', 'count': count})
+
 # 📝 API مخصصة للشكاوى
 # ====== داخل core/views.py: استبدل كتلة ComplaintViewSet بالكامل بما يلي ======
-class ComplaintViewSet(viewsets.ViewSet):
+class ComplaintViewSet(SparseFieldsViewMixin, viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    serializer_class = ComplaintSerializer
 
     # 1) إرسال شكوى من موظف
     @action(detail=False, methods=['post'])
@@ -172,21 +380,32 @@ class ComplaintViewSet(viewsets.ViewSet):
 
     # 2) شكاوى الموظف الحالي
     @action(detail=False, methods=['get'])
+    @cache_response('complaints:sender:{user}', 'users')
     def my_complaints(self, request):
         qs = Complaint.objects.filter(sender=request.user).order_by('-created_at')
-        return Response(ComplaintSerializer(qs, many=True).data)
+        return self.complaint_list(request, qs)
 
     # 3) شكاوى موجّهة للـ HR
     @action(detail=False, methods=['get'])
+    @cache_response('complaints:hr', 'users')
     def hr_complaints(self, request):
         qs = Complaint.objects.filter(recipient_type='hr').order_by('-created_at')
-        return Response(ComplaintSerializer(qs, many=True).data)
+        return self.complaint_list(request, qs)
 
     # 4) شكاوى موجّهة للمدير
     @action(detail=False, methods=['get'])
+    @cache_response('complaints:manager', 'users')
     def manager_complaints(self, request):
         qs = Complaint.objects.filter(recipient_type='manager').order_by('-created_at')
-        return Response(ComplaintSerializer(qs, many=True).data)
+        return self.complaint_list(request, qs)
+
+    def complaint_list(self, request, qs):
+        serializer = ComplaintValuesSerializer(selected=self.sparse_fields())
+        # ?since= (core/delta.py): الشكاوى الجديدة أو التي تغيّر ردها/حالة قراءتها فقط
+        if 'since' in request.query_params:
+            page, token, has_more = changed_since(qs, parse_since(request.query_params['since']))
+            return Response({'results': serializer.serialize(page), 'next': token, 'has_more': has_more})
+        return Response(serializer.serialize(qs))
 
     # 5) رد HR على شكوى
     @action(detail=True, methods=['post'])
@@ -204,7 +423,7 @@ class ComplaintViewSet(viewsets.ViewSet):
         complaint.is_seen_by_employee = False     # الموظف لديه رد جديد غير مقروء
         complaint.save(update_fields=[
             'response','is_responded','responded_by','responded_at',
-            'is_seen_by_recipient','is_seen_by_employee'
+            'is_seen_by_recipient','is_seen_by_employee','updated_at'
         ])
         return Response({'status': 'Response saved'})
 
@@ -224,7 +443,7 @@ class ComplaintViewSet(viewsets.ViewSet):
         complaint.is_seen_by_employee = False
         complaint.save(update_fields=[
             'response','is_responded','responded_by','responded_at',
-            'is_seen_by_recipient','is_seen_by_employee'
+            'is_seen_by_recipient','is_seen_by_employee','updated_at'
         ])
         return Response({'status': 'Response saved'})
 
@@ -237,10 +456,10 @@ class ComplaintViewSet(viewsets.ViewSet):
 
         if user == complaint.sender:
             complaint.is_seen_by_employee = True
-            fields = ['is_seen_by_employee']
+            fields = ['is_seen_by_employee', 'updated_at']
         elif role in ['manager', 'hr'] and complaint.recipient_type == role:
             complaint.is_seen_by_recipient = True
-            fields = ['is_seen_by_recipient']
+            fields = ['is_seen_by_recipient', 'updated_at']
         else:
             return Response({'error': 'Not allowed'}, status=403)
 
@@ -257,45 +476,145 @@ class ComplaintViewSet(viewsets.ViewSet):
             Complaint.objects.filter(
                 recipient_type=role,
                 is_seen_by_recipient=False
-            ).update(is_seen_by_recipient=True)
+            ).update(is_seen_by_recipient=True, updated_at=timezone.now())
+            invalidate(f'complaints:{role}')
         else:
             Complaint.objects.filter(
                 sender=user,
                 is_responded=True,
                 is_seen_by_employee=False
-            ).update(is_seen_by_employee=True)
+            ).update(is_seen_by_employee=True, updated_at=timezone.now())
+            invalidate(f'complaints:sender:{user.pk}')
 
         return Response({'message': 'OK'})
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def has_unread_complaints(request):
+def json_response(data, status=200):
+    """نفس مخرجات DRF Response (FastJSONRenderer) للعروض async خارج DRF."""
+    return HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status)
+
+
+@require_GET
+@async_jwt_required
+async def has_unread_complaints(request):
     """
     المدير/HR: أي شكاوى موجّهة إليهم ولم تُقرأ بعد.
     الموظف: فقط الشكاوى التي تم الرد عليها ولم يقرأها الموظف بعد.
     """
-    user = request.user
+    has_new = await unread_complaints(request.user).aexists()
+    return json_response({'has_new': has_new})
+
+
+def unread_complaints(user):
     role = getattr(user, 'role', None)
 
     if role == 'manager':
-        has_new = Complaint.objects.filter(
+        return Complaint.objects.filter(
             recipient_type='manager',
             is_seen_by_recipient=False
-        ).exists()
+        )
     elif role == 'hr':
-        has_new = Complaint.objects.filter(
+        return Complaint.objects.filter(
             recipient_type='hr',
             is_seen_by_recipient=False
-        ).exists()
-    else:
-        has_new = Complaint.objects.filter(
-            sender=user,
-            is_responded=True,
-            is_seen_by_employee=False
-        ).exists()
+        )
+    return Complaint.objects.filter(
+        sender=user,
+        is_responded=True,
+        is_seen_by_employee=False
+    )
+
+
+# 📩 صندوق إشعارات المستخدم (async: الاستطلاع المتكرر لا يحجز worker)
+@require_GET
+@async_jwt_required
+@cache_response('inbox:{user}', 'notifications')
+async def user_notifications_inbox(request):
+    try:
+        selected = select_fields(request.GET, list(UserNotificationValuesSerializer.fields))
+        since = parse_since(request.GET['since']) if 'since' in request.GET else False
+    except ValidationError as exc:
+        return json_response(exc.detail, status=400)
+    serializer = UserNotificationValuesSerializer(selected=selected)
+    qs = inbox_queryset(request.user)
+    if since is not False:
+        # ?since= (core/delta.py): الإشعارات الجديدة أو التي تغيرت حالة قراءتها أو عُدّلت فقط
+        page, token, has_more = await achanged_since(qs, since, INBOX_CHANGED_AT)
+        return json_response({'results': await serializer.aserialize(page), 'next': token, 'has_more': has_more})
+    return json_response(await serializer.aserialize(qs))
+
+
+# تعديل الإشعار يغيّر edited_at له وحده، لا لصفوف كل مستلميه
+INBOX_CHANGED_AT = Greatest('updated_at', 'notification__edited_at')
+
+
+def inbox_queryset(user):
+    return UserNotification.objects.filter(
+        user=user
+    ).order_by('-notification__created_at')
+
 
-    return Response({'has_new': has_new})
+# 🚀 كل ما تحتاجه الواجهة عند الإقلاع في طلب واحد (بدل me/sections/forms/user-notifications/has_unread)
+BOOTSTRAP_NOTIFICATIONS = 20
+
+
+def part_etag(part, *version):
+    return f'{part}-{hashlib.sha1(repr(version).encode()).hexdigest()[:16]}'
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bootstrap(request):
+    """
+    {part: {'etag': ..., 'data': ...}} للأجزاء user, sections, forms, notifications (أول صفحة), unread.
+    العميل يرسل وسوم الأجزاء التي لديه في If-None-Match ("forms-ab12...", "sections-cd34...")
+    فيعود الجزء {'etag': ..., 'not_modified': true} بلا استعلامه، وإن طابقت كلها (أو وسم الاستجابة
+    كاملة في ETag) → 304.
+    نسخة الكتالوج والإشعارات = أجيال كاش الاستجابات (core/response_cache.py)، فمعرفة أنها لم تتغير
+    لا تكلف استعلامًا؛ مع CACHE_URL=locmem لكل عامل أجياله (قد يُعاد التنزيل مرة لكل عامل).
+    الاستعلامات: 2 دائمًا (عدّادات غير المقروء) + واحد لكل جزء متغير من sections/forms/notifications.
+    """
+    user = request.user
+    have = {tag.removeprefix('W/').strip('"') for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+
+    profile = user_profile(user)
+    unread = {
+        'notifications': UserNotification.objects.filter(user=user, is_read=False).count(),
+        'complaints': unread_complaints(user).count(),
+    }
+    # الأجيال تُقرأ قبل البيانات: بيانات أحدث من وسمها تُعاد لاحقًا بلا ضرر، وأقدم منه تبقى قديمة
+    sections_gen, forms_gen, perms_gen, inbox_gen, notifications_gen = generations(
+        ['sections', 'forms', f'perms:{user.pk}', f'inbox:{user.pk}', 'notifications'],
+    )
+    parts = {
+        'user': (part_etag('user', profile), lambda: profile),
+        'sections': (
+            part_etag('sections', sections_gen),
+            lambda: list(Section.objects.values('id', 'name_ar', 'name_en')),
+        ),
+        'forms': (
+            # روابط الملفات مطلقة: المضيف جزء من النسخة
+            part_etag('forms', user.pk, request.get_host(), sections_gen, forms_gen, perms_gen),
+            lambda: FormModelValuesSerializer(context={'request': request}).serialize(permitted_forms(user)),
+        ),
+        'notifications': (
+            part_etag('notifications', user.pk, inbox_gen, notifications_gen),
+            lambda: UserNotificationValuesSerializer().serialize(inbox_queryset(user)[:BOOTSTRAP_NOTIFICATIONS]),
+        ),
+        'unread': (part_etag('unread', unread), lambda: unread),
+    }
+
+    etag = '"%s"' % part_etag('bootstrap', sorted(tag for tag, _ in parts.values()))
+    if etag.strip('"') in have or all(tag in have for tag, _ in parts.values()):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response({
+            part: {'etag': tag, 'not_modified': True} if tag in have else {'etag': tag, 'data': compute()}
+            for part, (tag, compute) in parts.items()
+        })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @api_view(['POST'])
@@ -311,10 +630,10 @@ def mark_complaint_as_seen(request, pk):
 
     if user == complaint.sender:
         complaint.is_seen_by_employee = True
-        fields = ['is_seen_by_employee']
+        fields = ['is_seen_by_employee', 'updated_at']
     elif role in ['manager', 'hr'] and complaint.recipient_type == role:
         complaint.is_seen_by_recipient = True
-        fields = ['is_seen_by_recipient']
+        fields = ['is_seen_by_recipient', 'updated_at']
     else:
         return Response({'error': 'Not allowed'}, status=403)
 
@@ -336,18 +655,21 @@ def mark_all_complaints_seen(request):
         Complaint.objects.filter(
             recipient_type='manager',
             is_seen_by_recipient=False
-        ).update(is_seen_by_recipient=True)
+        ).update(is_seen_by_recipient=True, updated_at=timezone.now())
+        invalidate('complaints:manager')
     elif role == 'hr':
         Complaint.objects.filter(
             recipient_type='hr',
             is_seen_by_recipient=False
-        ).update(is_seen_by_recipient=True)
+        ).update(is_seen_by_recipient=True, updated_at=timezone.now())
+        invalidate('complaints:hr')
     else:
         Complaint.objects.filter(
             sender=user,
             is_responded=True,
             is_seen_by_employee=False
-        ).update(is_seen_by_employee=True)
+        ).update(is_seen_by_employee=True, updated_at=timezone.now())
+        invalidate(f'complaints:sender:{user.pk}')
 
 
     return Response({'status': 'All marked as seen'})
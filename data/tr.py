@@ -7,6 +7,7 @@ import os
 import re
 import sys
 import unicodedata
+from collections import defaultdict
 from pathlib import Path
 
 try:
@@ -34,6 +35,17 @@ TRANS_DIGITS = str.maketrans({a: b for a, b in zip(AR_DIGITS, EN_DIGITS)})
 # إزالة التشكيل والمدّ
 AR_TATWEEL = "\u0640"
 
+# --------- المطابقة التقريبية (fuzzy) ----------
+# بادئات/لواحق لا تميّز نموذجًا عن آخر وتُحذف قبل المقارنة
+FUZZY_PREFIXES = ("نموذج", "form")
+FUZZY_SUFFIXES = ("form", "نموذج")
+# توحيد أشكال الحروف العربية الشائعة في الأخطاء الإملائية
+FUZZY_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ة": "ه", "ى": "ي", "ؤ": "و", "ئ": "ي"})
+FUZZY_THRESHOLD = 0.8     # فوقها تُطبَّق المطابقة تلقائيًا
+FUZZY_MARGIN = 0.05       # ...بشرط أن يتقدّم الأول على الثاني بهذا الفارق، وإلا فللمراجعة اليدوية
+FUZZY_MIN_SCORE = 0.3     # تحتها لا يُقترح المرشّح أصلًا
+FUZZY_TOP_N = 3
+
 
 def normalize_key(s: str) -> str:
     """
@@ -60,6 +72,76 @@ def normalize_key(s: str) -> str:
     return s
 
 
+def fuzzy_key(key: str) -> str:
+    """
+    تطبيع إضافي فوق normalize_key للمطابقة التقريبية:
+    توحيد الألف/التاء المربوطة/الياء وحذف "نموذج"/"form" من الطرفين.
+    """
+    s = key.translate(FUZZY_LETTERS)
+    for p in FUZZY_PREFIXES:
+        if s.startswith(p) and len(s) > len(p):
+            s = s[len(p):]
+    for p in FUZZY_SUFFIXES:
+        if s.endswith(p) and len(s) > len(p):
+            s = s[:-len(p)]
+    return s
+
+
+def trigrams(s: str) -> set:
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyIndex:
+    """
+    فهرس trigrams مقلوب فوق مفاتيح name_to_code:
+      trigram -> مجموعة المفاتيح التي تحويه
+    البحث يمرّ فقط على المفاتيح التي تشترك بـ trigram واحد على الأقل مع الاسم،
+    ويعطي درجة Dice = 2·|مشترك| / (|أ| + |ب|).
+    """
+
+    def __init__(self, name_to_code: dict):
+        self.name_to_code = name_to_code
+        self.grams = {}
+        self.postings = defaultdict(set)
+        for key in name_to_code:
+            fk = fuzzy_key(key)
+            if not fk:
+                continue
+            g = trigrams(fk)
+            self.grams[key] = len(g)
+            for t in g:
+                self.postings[t].add(key)
+
+    def candidates(self, base_key: str, top_n=FUZZY_TOP_N, min_score=FUZZY_MIN_SCORE):
+        """يعيد [(code, score), ...] مرتبة تنازليًا، مرشّح واحد لكل كود."""
+        fk = fuzzy_key(base_key)
+        if not fk:
+            return []
+        query = trigrams(fk)
+        shared = defaultdict(int)
+        for t in query:
+            for key in self.postings.get(t, ()):
+                shared[key] += 1
+
+        best = {}
+        for key, n in shared.items():
+            score = 2 * n / (len(query) + self.grams[key])
+            code = self.name_to_code[key]
+            if score >= min_score and score > best.get(code, 0):
+                best[code] = score
+        return sorted(best.items(), key=lambda kv: (-kv[1], kv[0]))[:top_n]
+
+
+def fuzzy_choice(cands, threshold=FUZZY_THRESHOLD, margin=FUZZY_MARGIN):
+    """كود المرشّح الأول إن تجاوز العتبة وتقدّم على الثاني بالفارق، وإلا None."""
+    if not cands or cands[0][1] < threshold:
+        return None
+    if len(cands) > 1 and cands[0][1] - cands[1][1] < margin:
+        return None
+    return cands[0][0]
+
+
 def find_col_idx(header_cells, candidates):
     """يعيد رقم العمود (1-based) لأول اسم متاح من candidates، أو None"""
     header = [normalize_key(c.value) if c.value else "" for c in header_cells]
@@ -123,12 +205,17 @@ def build_mapping_from_excel(excel_path: Path):
     return name_to_code, codekey_to_code
 
 
-def plan_renames(folder: Path, name_to_code: dict, codekey_to_code: dict):
+def plan_renames(folder: Path, name_to_code: dict, codekey_to_code: dict,
+                 fuzzy_index: FuzzyIndex = None, fuzzy_threshold: float = FUZZY_THRESHOLD,
+                 fuzzy_margin: float = FUZZY_MARGIN):
     """
     يبني خطة إعادة التسمية: قائمة من (src, dst, السبب)
+    إضافةً إلى suggestions: {src: [(code, score), ...]} لمرشّحي المطابقة التقريبية
+    (للملفات المطابَقة تقريبيًا وغير المطابَقة).
     """
     plans = []
     unmatched = []
+    suggestions = {}
 
     pdf_files = sorted([p for p in folder.iterdir() if p.is_file() and p.suffix.lower() == PDF_EXT])
 
@@ -145,6 +232,7 @@ def plan_renames(folder: Path, name_to_code: dict, codekey_to_code: dict):
 
         # 2) تطابق بالاسم (عربي/إنجليزي/filename)
         code = name_to_code.get(base_key)
+        reason = "match-by-name"
 
         # 3) محاولة أخف: لو الاسم يحوي الكود كجزء منه
         if not code:
@@ -152,8 +240,17 @@ def plan_renames(folder: Path, name_to_code: dict, codekey_to_code: dict):
             for ck in all_code_keys:
                 if ck and ck in base_key:
                     code = codekey_to_code[ck]
+                    reason = "match-by-substring"
                     break
 
+        # 4) مطابقة تقريبية عبر فهرس trigrams: تُطبَّق فقط فوق عتبة الثقة وبفارق واضح عن الثاني
+        if not code and fuzzy_index is not None:
+            cands = fuzzy_index.candidates(base_key)
+            if cands:
+                suggestions[p] = cands
+                code = fuzzy_choice(cands, fuzzy_threshold, fuzzy_margin)
+                reason = "match-by-fuzzy"
+
         if code:
             dst = p.with_name(f"{code}{PDF_EXT}")
             # تجنّب الكتابة فوق ملف موجود مختلف
@@ -163,12 +260,15 @@ def plan_renames(folder: Path, name_to_code: dict, codekey_to_code: dict):
                 # لو موجود مسبقًا باسم الكود، أضف لاحقة رقمية آمنة
                 final_dst = p.with_name(f"{code}__{n}{PDF_EXT}")
                 n += 1
-            reason = "match-by-name" if name_to_code.get(base_key) else "match-by-substring"
             plans.append((p, final_dst, reason))
         else:
             unmatched.append(p)
 
-    return plans, unmatched
+    return plans, unmatched, suggestions
+
+
+def format_candidates(cands) -> str:
+    return "|".join(f"{code}:{score:.2f}" for code, score in cands)
 
 
 def main():
@@ -177,6 +277,11 @@ def main():
     ap.add_argument("--folder", default=".", help="المجلد الذي يحتوي PDFs (افتراضي: المجلد الحالي)")
     ap.add_argument("--apply", action="store_true", help="تنفيذ فعلي (وإلا فسيكون Dry-Run)")
     ap.add_argument("--report", default="rename_report.csv", help="اسم تقرير CSV")
+    ap.add_argument("--fuzzy-threshold", type=float, default=FUZZY_THRESHOLD,
+                    help=f"عتبة الثقة للتطبيق التلقائي للمطابقة التقريبية (افتراضي: {FUZZY_THRESHOLD})")
+    ap.add_argument("--fuzzy-margin", type=float, default=FUZZY_MARGIN,
+                    help=f"أقل فارق بين أعلى مرشّحَين للتطبيق التلقائي (افتراضي: {FUZZY_MARGIN})")
+    ap.add_argument("--no-fuzzy", action="store_true", help="تعطيل المطابقة التقريبية")
     args = ap.parse_args()
 
     folder = Path(args.folder).resolve()
@@ -195,21 +300,34 @@ def main():
     name_to_code, codekey_to_code = build_mapping_from_excel(excel_path)
     print(f"🔎 خرائط: {len(name_to_code)} اسم → كود، {len(codekey_to_code)} كود معروف.")
 
-    plans, unmatched = plan_renames(folder, name_to_code, codekey_to_code)
+    fuzzy_index = None if args.no_fuzzy else FuzzyIndex(name_to_code)
+    plans, unmatched, suggestions = plan_renames(
+        folder, name_to_code, codekey_to_code,
+        fuzzy_index=fuzzy_index, fuzzy_threshold=args.fuzzy_threshold, fuzzy_margin=args.fuzzy_margin,
+    )
 
     # تقرير CSV
     report_path = folder / args.report
     with open(report_path, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
-        w.writerow(["src", "dst", "reason", "status"])
+        w.writerow(["src", "dst", "reason", "status", "score", "candidates"])
         for src, dst, reason in plans:
-            w.writerow([src.name, dst.name, reason, "PLANNED"])
+            cands = suggestions.get(src, [])
+            score = f"{cands[0][1]:.2f}" if reason == "match-by-fuzzy" else ""
+            w.writerow([src.name, dst.name, reason, "PLANNED", score, format_candidates(cands)])
         for p in unmatched:
-            w.writerow([p.name, "", "unmatched", "SKIPPED"])
+            cands = suggestions.get(p, [])
+            score = f"{cands[0][1]:.2f}" if cands else ""
+            # فوق العتبة لكن الثاني قريب منه: التباس يحتاج قرارًا يدويًا
+            reason = "ambiguous-fuzzy" if cands and cands[0][1] >= args.fuzzy_threshold else "unmatched"
+            w.writerow([p.name, "", reason, "SKIPPED", score, format_candidates(cands)])
 
     print(f"📝 تقرير: {report_path.name}")
     print(f"✅ خطط إعادة التسمية: {len(plans)} ملف")
     print(f"⚠ غير المطابق: {len(unmatched)} ملف")
+    fuzzy_applied = sum(1 for _, _, r in plans if r == "match-by-fuzzy")
+    if fuzzy_index is not None:
+        print(f"🔤 مطابقة تقريبية: {fuzzy_applied} مطبّقة، {sum(1 for p in unmatched if p in suggestions)} مرشّحة للمراجعة اليدوية.")
 
     if not args.apply:
         print("\n(Dry-Run) لم يتم أي تغيير. أعد التشغيل مع --apply للتنفيذ الفعلي.")
@@ -232,7 +350,8 @@ def main():
     if unmatched:
         print("\n⚠ ملفات لم يتم التعرّف عليها (حدّث الأسماء في Excel أو أعد التسمية يدويًا):")
         for p in unmatched:
-            print("   -", p.name)
+            hint = f"  (مرشّحون: {format_candidates(suggestions[p])})" if p in suggestions else ""
+            print("   -", p.name + hint)
 
     print(f"\nتم. أعيدت تسمية {applied} ملفًا، وتخطّيت {skipped}.")
 
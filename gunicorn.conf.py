@@ -0,0 +1,36 @@
+# إعدادات gunicorn (تُقرأ تلقائيًا من جذر المشروع لكلا ملفَي Procfile: wsgi و asgi)
+import os
+import shutil
+
+# مجمّع مقاييس Prometheus متعدد العمليات: يجب ضبطه قبل أي import لـ prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/bm-requests-metrics")
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    # ملفات العمّال السابقين تُمسح عند إقلاع الـ master
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # ناقل الإبطال بين العمّال (core/invalidation.py): خيط خلفي لكل عامل بعد تحميل Django
+    from core.invalidation import start_listener
+    start_listener()
+    # عامل طابور المهام داخل الويب (JOB_RUN_IN_WEB، core/jobs.py)
+    from core.jobs import start_runner
+    start_runner()
+
+
+def worker_exit(server, worker):
+    # المهمة الجارية في عامل الطابور تُكمل أولًا، ثم ما بقي في مخزن المقاييس (core/metrics.py)
+    from core.jobs import stop_runner
+    stop_runner(worker.cfg.graceful_timeout / 2)
+    from core.metrics import flush
+    flush()
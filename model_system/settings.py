@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import dj_database_url
+from importlib.util import find_spec
 from pathlib import Path
 import os
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -35,13 +36,85 @@ SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # يبني المستخدم من حقول التوكن دون استعلام، مع كاش لصفوف المستخدمين كاحتياط
+        'core.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    # ⚡ orjson بنفس مخرجات JSONRenderer/JSONParser (core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# مدة بقاء صف المستخدم في كاش المصادقة داخل كل عملية (ثوانٍ)
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "60"))
+
+# /metrics: Authorization: Bearer <METRICS_TOKEN>، وإن كان فارغًا فللـ staff فقط
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# 🗄️ الكاش: CACHE_URL = locmem:// (افتراضي، لكل عملية) | file:///path/to/dir | redis://host:6379/0
+# (redis يتطلب حزمة redis؛ أي خادم متوافق مع بروتوكول Redis يصلح محليًا)
+CACHE_URL = os.environ.get("CACHE_URL", "locmem://")
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}}
+elif CACHE_URL.startswith("file://"):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                          "LOCATION": CACHE_URL[len("file://"):] or str(BASE_DIR / "cache")}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                          "OPTIONS": {"MAX_ENTRIES": 10000}}}
+
+# مدة بقاء استجابات القراءة في الكاش (core/response_cache.py)، 0 = تعطيل
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+
+# 📡 ناقل الإبطال بين العمّال (core/invalidation.py): LISTEN/NOTIFY على Postgres، واستطلاع جدول على SQLite
+INVALIDATION_BUS = os.environ.get("INVALIDATION_BUS", "True") == "True"
+INVALIDATION_POLL_SECONDS = float(os.environ.get("INVALIDATION_POLL_SECONDS", "1"))
+
+# 🧵 طابور المهام الخلفية (core/jobs.py، العامل: python manage.py run_jobs)
+# JOB_RUN_IN_WEB: خيط عامل داخل كل عامل gunicorn (الخطة المجانية بلا خدمة worker)؛
+# أوقفوه (False) عند تشغيل run_jobs كخدمة مستقلة كي لا تنافس المهام الثقيلة الطلبات
+JOB_RUN_IN_WEB = os.environ.get("JOB_RUN_IN_WEB", "True") == "True"
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "1"))
+JOB_LOCK_TIMEOUT = int(os.environ.get("JOB_LOCK_TIMEOUT", "1800"))  # مهمة running أقدم من هذا تُعتبر عاملها ميتًا
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = float(os.environ.get("JOB_RETRY_MAX_SECONDS", "600"))
+JOB_KEEP_DAYS = int(os.environ.get("JOB_KEEP_DAYS", "7"))
+
+# 🗜️ ضغط استجابات JSON في الـ API (core/compression.py)
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "True") == "True"
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))  # بايت؛ الأصغر يُرسل كما هو
+
+# 🔖 روابط ملفات النماذج ببصمة المحتوى (core/form_files.py): مدة التخزين في المتصفح/الـ CDN
+FORM_FILE_MAX_AGE = int(os.environ.get("FORM_FILE_MAX_AGE", str(365 * 24 * 3600)))
+
+# 🔄 المزامنة التفاضلية ?since= (core/delta.py): أطول مدة متوقعة لمعاملة كتابة قبل الـ commit
+DELTA_SYNC_SKEW_SECONDS = float(os.environ.get("DELTA_SYNC_SKEW_SECONDS", "5"))
+
+# 📊 سقف العدّ في قوائم لوحة الإدارة للجداول الكبيرة (core/admin.py: EstimatedCountPaginator)
+ADMIN_COUNT_LIMIT = int(os.environ.get("ADMIN_COUNT_LIMIT", "10000"))
+
+# 🔬 مُعايِن العيّنات (core/profiling.py)
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "False") == "True"
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "2"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", str(BASE_DIR / "profiles"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+
+# 🐢 سجل الاستعلامات البطيئة (core/slowlog.py)
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", str(BASE_DIR / "logs" / "slow_queries.log"))
+SLOW_QUERY_LOG_BYTES = 5 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -57,6 +130,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',  # أولًا: يقيس الطلب كاملًا
+    'core.profiling.ProfilingMiddleware',  # يُزال تلقائيًا إن كان PROFILING_ENABLED=False
+    'core.slowlog.SlowQueryMiddleware',  # يُزال تلقائيًا إن كان SLOW_QUERY_MS=0
+    'core.compression.CompressionMiddleware',  # ضغط JSON في /api/ (br/gzip) قبل أي middleware يقرأ الجسم
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -65,6 +142,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',  # يُزال تلقائيًا إن لم تُضبط DATABASE_REPLICA_URLS
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,14 +170,57 @@ WSGI_APPLICATION = 'model_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": dj_database_url.config(
-        default=os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
-        conn_max_age=600,
-        ssl_require=False
+# 🏊 تجمع اتصالات Postgres (دعم Django الأصلي عبر psycopg_pool) مع فحص الاتصال قبل كل استخدام
+# (CONN_HEALTH_CHECKS): اتصال مقطوع بعد إعادة تشغيل القاعدة يُستبدل بدل أن يظهر 500.
+# الأحجام لكل عملية. المجموع يجب أن يبقى أقل من max_connections - 3 (محجوزة لـ superuser):
+#     النسخ × العمّال (WEB_CONCURRENCY) × (DB_POOL_MAX_SIZE + 1 لمستمع ناقل الإبطال) + أوامر الإدارة
+#   الملف                    العمّال   MIN  MAX   ملاحظة
+#   web (gunicorn sync)       2-4      1    2     كل عامل يخدم طلبًا واحدًا في كل لحظة
+#   web-asgi (uvicorn)        2        2    10    طلبات متزامنة، لكل منها خيط واتصال أثناء الاستعلام
+#   SQLite / bench            -        -    -     بلا تجمع (CONN_MAX_AGE كما هو)
+# مثال: Postgres بـ 100 اتصال، web-asgi بعاملين ونسختين → 2 × 2 × 11 = 44 ويبقى هامش للأوامر والترحيل.
+DB_POOL = os.environ.get("DB_POOL", "True") == "True"
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "2"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))  # انتظار اتصال حر قبل الخطأ
+
+
+def database_config(url):
+    config = dj_database_url.parse(
+        url,
+        # تحت ASGI يُفضَّل 0 (كل طلب async قد يفتح اتصالًا من thread مختلف)
+        conn_max_age=int(os.environ.get("DB_CONN_MAX_AGE", "600")),
+        conn_health_checks=True,
+        ssl_require=False,
     )
+    # يتطلب psycopg 3 مع psycopg_pool (requirements.txt)؛ بدونه يبقى CONN_MAX_AGE
+    if DB_POOL and config["ENGINE"] == "django.db.backends.postgresql" and find_spec("psycopg_pool"):
+        config["CONN_MAX_AGE"] = 0  # الاتصال يعود للتجمع بنهاية الطلب
+        config.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+        }
+    return config
+
+
+DATABASES = {
+    "default": database_config(os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")),
 }
 
+# 🪞 نسخ القراءة (اختياري): DATABASE_REPLICA_URLS=postgres://...,postgres://... (core/db_router.py)
+# تتطلب كاشًا مشتركًا (CACHE_URL) وعامل run_jobs يكتب نبضة قياس التأخر، وإلا تبقى القراءات على الأساسية
+DATABASE_REPLICA_URLS = [u for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u]
+for i, url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f"replica{i}"] = database_config(url)
+    DATABASES[f"replica{i}"]["TEST"] = {"MIRROR": "default"}
+if DATABASE_REPLICA_URLS:
+    DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+# بعد أي كتابة يقرأ المستخدم من الأساسية لهذه المدة (ثوانٍ)
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", "10"))
+REPLICA_CHECK_SECONDS = float(os.environ.get("REPLICA_CHECK_SECONDS", "2"))
+
 
 
 # Password validation
@@ -2,8 +2,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
+from core.metrics import metrics_view
+from core.profiling import profile_list, profile_download
 
 urlpatterns = [
+    path('admin/profiles/', profile_list, name='profile-list'),
+    path('admin/profiles/<str:name>.<str:kind>', profile_download, name='profile-download'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include('core.urls')),  # هذا يحتوي على MyTokenObtainPairView
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)